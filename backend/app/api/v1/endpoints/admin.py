@@ -7,6 +7,9 @@ import json
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.core.admin import is_admin, can_manage_users, get_admin_emails
+from app.core.tracing import trace_recorder
+from app.core.cache_engine import cache_registry
+from app.core.single_flight import flight_groups
 from app.models.user import User
 from app.models.user_role import UserRole, ModeratorRequest
 from app.models.edit_suggestion import EditSuggestion
@@ -23,6 +26,8 @@ from app.schemas.edit_suggestion import EditSuggestionResponse, EditSuggestionSt
 from app.schemas.card_document import CardDocumentResponse, CardDocumentStats, CardDocumentUpdate
 from app.schemas.chat_schemas import ChatAccessRequestListResponse
 from app.core.allowed_names import validate_category_name, validate_merchant_name
+from app.core.catalog_events import record_suggestion_change
+from app.services.reward_ranking_service import reward_ranking_service
 from datetime import datetime, timedelta
 import json
 
@@ -547,6 +552,11 @@ def review_edit_suggestion(
                             detail="Invalid fee waiver spend format. Please use format like '₹2,00,000' or '200000'"
                         )
 
+    # Keep the materialized best-card rankings in step with the approved reward change
+    if review_data.status == "approved":
+        reward_ranking_service.refresh_for_suggestion(db, suggestion)
+        record_suggestion_change(db, suggestion)
+
     # Create audit log
     audit_log = AuditLog(
         user_id=current_user.id,
@@ -796,3 +806,39 @@ def get_chat_access_stats(
         "approved_requests": approved_requests,
         "denied_requests": denied_requests
     } 
+
+
+@router.get("/traces/stats")
+def get_trace_stats(current_user: User = Depends(require_admin)):
+    """p50/p95/p99 latency and token totals per SQL agent stage"""
+    return trace_recorder.get_stats()
+
+
+@router.get("/traces")
+def get_recent_traces(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(require_admin)
+):
+    """Most recent SQL agent request traces"""
+    return trace_recorder.recent(limit)
+
+
+@router.get("/traces/{trace_id}")
+def get_trace(trace_id: str, current_user: User = Depends(require_admin)):
+    """Full span tree of one SQL agent request as JSON"""
+    trace = trace_recorder.get_trace(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found or already evicted")
+    return trace
+
+
+@router.get("/cache/stats")
+def get_cache_stats(
+    top_keys: int = Query(10, ge=0, le=100),
+    current_user: User = Depends(require_admin)
+):
+    """Hit ratio, memory, evictions and hottest keys per cache namespace, plus request coalescing"""
+    return {
+        **cache_registry.get_stats(top_keys=top_keys),
+        "single_flight": {name: group.get_stats() for name, group in flight_groups.items()}
+    }
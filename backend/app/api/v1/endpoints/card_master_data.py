@@ -1,12 +1,12 @@
 from typing import List, Optional
-from app.core.allowed_names import validate_category_name, validate_merchant_name, ORDERED_CATEGORIES, ORDERED_MERCHANTS
-from app.core.config import settings
-from app.core.merchant_popularity import merchant_popularity_service
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session, joinedload
+from app.core.allowed_names import validate_category_name, validate_merchant_name
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 from fastapi.security import HTTPAuthorizationCredentials
 
+from app.core.catalog_events import record_catalog_change
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.card_master_data import CardMasterData, CardSpendingCategory, CardMerchantReward
 from app.models.credit_card import CreditCard
@@ -24,6 +24,10 @@ from app.schemas.card_master_data import (
 )
 from app.models.user import User
 from app.core.security import get_current_user_sync, security, verify_token
+from app.services.reward_ranking_service import reward_ranking_service, MERCHANT, CATEGORY, DIMENSIONS
+from app.services.comparison_matrix_service import comparison_matrix_service
+from app.services.card_detail_service import card_detail_service, etag_matches
+from app.services.card_catalog_service import card_catalog_service, CardFilters, SORT_KEYS
 
 def get_current_user_optional() -> Optional[User]:
     """Optional authentication dependency that returns None if not authenticated"""
@@ -39,210 +43,106 @@ def get_card_master_data(
     limit: int = Query(100, ge=1, le=1000),  # Increased limit to 1000
     bank_name: Optional[str] = Query(None),
     card_tier: Optional[str] = Query(None),
-    is_active: Optional[bool] = Query(None),
-    db: Session = Depends(get_db)
+    is_active: Optional[bool] = Query(None)
 ):
     """Get all card master data with optional filters"""
-    query = db.query(CardMasterData)
-
-    if bank_name:
-        query = query.filter(CardMasterData.bank_name.ilike(f"%{bank_name}%"))
-    if card_tier:
-        query = query.filter(CardMasterData.card_tier == card_tier)
-    if is_active is not None:
-        query = query.filter(CardMasterData.is_active == is_active)
-    
-    cards = query.offset(skip).limit(limit).all()
+    # Served from the in-memory catalog snapshot, without a database session
+    cards = card_catalog_service.get_snapshot().filter(
+        bank_name=bank_name,
+        card_tier=card_tier,
+        is_active=is_active
+    )
     
     # Return basic card information
-    result = []
-    for card in cards:
-        result.append({
-            "id": card.id,
-            "bank_name": card.bank_name,
-            "card_name": card.card_name,
-            "display_name": card.display_name,
-            "card_network": card.card_network,
-            "joining_fee_display": card.joining_fee_display,
-            "annual_fee_display": card.annual_fee_display,
-            "is_active": card.is_active
-        })
-    
-    return result
+    return [card.summary() for card in cards[skip:skip + limit]]
+
+
+@router.get("/explore")
+def explore_cards(
+    bank_name: Optional[str] = Query(None),
+    card_network: Optional[str] = Query(None),
+    card_tier: Optional[str] = Query(None),
+    min_annual_fee: Optional[float] = Query(None, ge=0),
+    max_annual_fee: Optional[float] = Query(None, ge=0),
+    max_joining_fee: Optional[float] = Query(None, ge=0),
+    lifetime_free: Optional[bool] = Query(None),
+    min_domestic_lounge_visits: Optional[int] = Query(None, ge=0),
+    min_international_lounge_visits: Optional[int] = Query(None, ge=0),
+    merchant: Optional[str] = Query(None),
+    min_merchant_rate: Optional[float] = Query(None, ge=0),
+    category: Optional[str] = Query(None),
+    min_category_rate: Optional[float] = Query(None, ge=0),
+    salary: Optional[float] = Query(None, ge=0, description="Applicant's income, compared with minimum_salary"),
+    age: Optional[int] = Query(None, ge=0),
+    is_active: Optional[bool] = Query(True),
+    sort: str = Query("id", description=f"One of: {', '.join(SORT_KEYS)}"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Faceted card finder with cursor pagination; facet counts come back with every page"""
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Sort must be one of: {', '.join(SORT_KEYS)}")
+    
+    filters = CardFilters(
+        bank_name=bank_name,
+        card_network=card_network,
+        card_tier=card_tier,
+        min_annual_fee=min_annual_fee,
+        max_annual_fee=max_annual_fee,
+        max_joining_fee=max_joining_fee,
+        lifetime_free=lifetime_free,
+        min_domestic_lounge_visits=min_domestic_lounge_visits,
+        min_international_lounge_visits=min_international_lounge_visits,
+        merchant=merchant,
+        min_merchant_rate=min_merchant_rate,
+        category=category,
+        min_category_rate=min_category_rate,
+        salary=salary,
+        age=age,
+        is_active=is_active
+    )
+    try:
+        return card_catalog_service.get_snapshot().explore(filters, sort=sort, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/search")
+def search_cards(
+    q: str = Query(..., min_length=1, max_length=100, description="Search text; the last word may be partial"),
+    limit: int = Query(10, ge=1, le=50),
+    include_inactive: bool = Query(False)
+):
+    """Type-ahead card search over bank, card name, variant, reward program and description"""
+    results = card_catalog_service.get_snapshot().search(q, limit, is_active=None if include_inactive else True)
+    return [{**card.summary(), "score": score} for card, score in results]
 
 
 @router.get("/cards/{card_id}", response_model=CardMasterDataResponse)
-def get_card_master_data_by_id(card_id: int, db: Session = Depends(get_db)):
-    """Get specific card master data by ID with editable defaults"""
+def get_card_master_data_by_id(card_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get specific card master data by ID with editable defaults; supports If-None-Match"""
+    if_none_match = request.headers.get("If-None-Match")
+    
+    # Repeat views of an unchanged card are answered without touching the database
+    cached = card_detail_service.cached(card_id)
+    if cached and etag_matches(if_none_match, cached[0]):
+        return Response(status_code=304, headers={"ETag": cached[0]})
+    
     try:
-        # First try to get the card without joinedload to see if the card exists
-        card = db.query(CardMasterData).filter(CardMasterData.id == card_id).first()
-        
-        if not card:
-            raise HTTPException(status_code=404, detail="Card not found")
-        
-        # Now try to get with joinedload
-        card_with_relations = db.query(CardMasterData).options(
-        joinedload(CardMasterData.spending_categories),
-        joinedload(CardMasterData.merchant_rewards)
-    ).filter(CardMasterData.id == card_id).first()
-    
-        # Build lookup dicts from DB records, keyed by normalized name
-        existing_categories = {cat.category_name.lower().strip(): cat for cat in card_with_relations.spending_categories}
-        existing_merchants = {merchant.merchant_name.lower().strip(): merchant for merchant in card_with_relations.merchant_rewards}
-
-        # Merge against the canonical 15-slot lists — nothing outside these lists is shown
-        merged_categories = []
-        for category_name in ORDERED_CATEGORIES:
-            existing_cat = existing_categories.get(category_name.lower().strip())
-            if existing_cat:
-                merged_categories.append({
-                    "id": existing_cat.id,
-                    "card_master_id": existing_cat.card_master_id,
-                    "category_name": existing_cat.category_name,
-                    "category_display_name": existing_cat.category_display_name,
-                    "reward_rate": existing_cat.reward_rate,
-                    "reward_type": existing_cat.reward_type,
-                    "reward_cap": existing_cat.reward_cap,
-                    "reward_cap_period": existing_cat.reward_cap_period,
-                    "minimum_transaction_amount": existing_cat.minimum_transaction_amount,
-                    "is_active": existing_cat.is_active,
-                    "valid_from": existing_cat.valid_from,
-                    "valid_until": existing_cat.valid_until,
-                    "additional_conditions": existing_cat.additional_conditions,
-                    "created_at": existing_cat.created_at,
-                    "updated_at": existing_cat.updated_at,
-                    "reward_display": f"{existing_cat.reward_rate}%" if existing_cat.reward_rate is not None else "Not Available"
-                })
-            else:
-                merged_categories.append({
-                    "id": None,
-                    "card_master_id": card_id,
-                    "category_name": category_name,
-                    "category_display_name": category_name.title(),
-                    "reward_rate": 0.0,
-                    "reward_type": "points",
-                    "reward_cap": None,
-                    "reward_cap_period": None,
-                    "minimum_transaction_amount": None,
-                    "is_active": False,
-                    "valid_from": None,
-                    "valid_until": None,
-                    "additional_conditions": None,
-                    "created_at": None,
-                    "updated_at": None,
-                    "reward_display": "Not Available"
-                })
-
-        merged_merchants = []
-        for merchant_name in ORDERED_MERCHANTS:
-            existing_merchant = existing_merchants.get(merchant_name.lower().strip())
-            if existing_merchant:
-                merged_merchants.append({
-                    "id": existing_merchant.id,
-                    "card_master_id": existing_merchant.card_master_id,
-                    "merchant_name": existing_merchant.merchant_name,
-                    "merchant_display_name": existing_merchant.merchant_display_name,
-                    "merchant_category": existing_merchant.merchant_category,
-                    "reward_rate": existing_merchant.reward_rate,
-                    "reward_type": existing_merchant.reward_type or "cashback",
-                    "reward_cap": existing_merchant.reward_cap,
-                    "reward_cap_period": existing_merchant.reward_cap_period,
-                    "minimum_transaction_amount": existing_merchant.minimum_transaction_amount,
-                    "is_active": existing_merchant.is_active,
-                    "valid_from": existing_merchant.valid_from,
-                    "valid_until": existing_merchant.valid_until,
-                    "requires_registration": existing_merchant.requires_registration if existing_merchant.requires_registration is not None else False,
-                    "additional_conditions": existing_merchant.additional_conditions,
-                    "created_at": existing_merchant.created_at,
-                    "updated_at": existing_merchant.updated_at,
-                    "reward_display": f"{existing_merchant.reward_rate}%" if existing_merchant.reward_rate is not None else "Not Available"
-                })
-            else:
-                merged_merchants.append({
-                    "id": None,
-                    "card_master_id": card_id,
-                    "merchant_name": merchant_name,
-                    "merchant_display_name": merchant_name.title(),
-                    "merchant_category": None,
-                    "reward_rate": 0.0,
-                    "reward_type": "cashback",
-                    "reward_cap": None,
-                    "reward_cap_period": None,
-                    "minimum_transaction_amount": None,
-                    "is_active": False,
-                    "valid_from": None,
-                    "valid_until": None,
-                    "requires_registration": False,
-                    "additional_conditions": None,
-                    "created_at": None,
-                    "updated_at": None,
-                    "reward_display": "Not Available"
-                })
-        
-        # Convert to dict and back to handle None values properly
-        card_dict = {
-            "id": card_with_relations.id,
-            "bank_name": card_with_relations.bank_name,
-            "card_name": card_with_relations.card_name,
-            "card_variant": card_with_relations.card_variant,
-            "card_network": card_with_relations.card_network,
-            "card_tier": card_with_relations.card_tier.lower() if card_with_relations.card_tier else "basic",
-            "joining_fee": card_with_relations.joining_fee,
-            "annual_fee": card_with_relations.annual_fee,
-            "is_lifetime_free": card_with_relations.is_lifetime_free,
-            "annual_fee_waiver_spend": card_with_relations.annual_fee_waiver_spend,
-            "foreign_transaction_fee": card_with_relations.foreign_transaction_fee,
-            "late_payment_fee": card_with_relations.late_payment_fee,
-            "overlimit_fee": card_with_relations.overlimit_fee,
-            "cash_advance_fee": card_with_relations.cash_advance_fee,
-            "domestic_lounge_visits": card_with_relations.domestic_lounge_visits,
-            "international_lounge_visits": card_with_relations.international_lounge_visits,
-            "lounge_spend_requirement": card_with_relations.lounge_spend_requirement,
-            "lounge_spend_period": card_with_relations.lounge_spend_period,
-            "welcome_bonus_points": card_with_relations.welcome_bonus_points,
-            "welcome_bonus_spend_requirement": card_with_relations.welcome_bonus_spend_requirement,
-            "welcome_bonus_timeframe": card_with_relations.welcome_bonus_timeframe,
-            "minimum_credit_limit": card_with_relations.minimum_credit_limit,
-            "maximum_credit_limit": card_with_relations.maximum_credit_limit,
-            "minimum_salary": card_with_relations.minimum_salary,
-            "minimum_age": card_with_relations.minimum_age,
-            "maximum_age": card_with_relations.maximum_age,
-            "contactless_enabled": card_with_relations.contactless_enabled,
-            "chip_enabled": card_with_relations.chip_enabled,
-            "mobile_wallet_support": card_with_relations.mobile_wallet_support,
-            "insurance_benefits": card_with_relations.insurance_benefits,
-            "concierge_service": card_with_relations.concierge_service if card_with_relations.concierge_service is not None else False,
-            "milestone_benefits": card_with_relations.milestone_benefits,
-            "reward_program_name": card_with_relations.reward_program_name,
-            "reward_expiry_period": card_with_relations.reward_expiry_period,
-            "reward_conversion_rate": card_with_relations.reward_conversion_rate,
-            "minimum_redemption_points": card_with_relations.minimum_redemption_points,
-            "is_active": card_with_relations.is_active,
-            "is_available_online": card_with_relations.is_available_online,
-            "launch_date": card_with_relations.launch_date,
-            "discontinue_date": card_with_relations.discontinue_date,
-            "description": card_with_relations.description,
-            "terms_and_conditions_url": card_with_relations.terms_and_conditions_url,
-            "application_url": card_with_relations.application_url,
-            "additional_features": card_with_relations.additional_features,
-            "created_at": card_with_relations.created_at,
-            "updated_at": card_with_relations.updated_at,
-            "display_name": card_with_relations.display_name,
-            "joining_fee_display": card_with_relations.joining_fee_display,
-            "annual_fee_display": card_with_relations.annual_fee_display,
-            "spending_categories": merged_categories,
-            "merchant_rewards": merged_merchants
-        }
-        
-        # Create response using the schema
-        return CardMasterDataResponse(**card_dict)
-        
+        detail = card_detail_service.get(db, card_id)
     except Exception as e:
         print(f"Error getting card {card_id}: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    if not detail:
+        raise HTTPException(status_code=404, detail="Card not found")
+    
+    etag, body = detail
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 
 @router.post("/cards", response_model=CardMasterDataResponse)
@@ -271,6 +171,8 @@ def create_card_master_data(
     
     db_card = CardMasterData(**card_data.dict())
     db.add(db_card)
+    db.flush()
+    record_catalog_change(db, card_ids=[db_card.id], bank_names=[db_card.bank_name])
     db.commit()
     db.refresh(db_card)
     
@@ -291,10 +193,15 @@ def update_card_master_data(
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
+    previous_bank = card.bank_name
     update_data = card_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(card, field, value)
     
+    # Activation and name changes show up in every ranking the card is part of
+    ranking_keys = reward_ranking_service.card_ranking_keys(db, card_id)
+    reward_ranking_service.refresh_keys(db, ranking_keys)
+    record_catalog_change(db, card_ids=[card_id], bank_names=[previous_bank, card.bank_name], ranking_keys=ranking_keys)
     db.commit()
     db.refresh(card)
     
@@ -314,7 +221,10 @@ def delete_card_master_data(
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
+    ranking_keys = reward_ranking_service.card_ranking_keys(db, card_id)
     db.delete(card)
+    reward_ranking_service.refresh_keys(db, ranking_keys)
+    record_catalog_change(db, card_ids=[card_id], bank_names=[card.bank_name], ranking_keys=ranking_keys)
     db.commit()
     
     return {"message": "Card deleted successfully"}
@@ -342,6 +252,8 @@ def create_spending_category(
     category_data.card_master_id = card_id
     db_category = CardSpendingCategory(**category_data.dict())
     db.add(db_category)
+    reward_ranking_service.refresh(db, CATEGORY, db_category.category_name)
+    record_catalog_change(db, card_ids=[card_id], categories=[db_category.category_name])
     db.commit()
     db.refresh(db_category)
 
@@ -360,10 +272,13 @@ def update_spending_category(
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
+    previous_name = category.category_name
     update_data = category_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(category, field, value)
     
+    reward_ranking_service.refresh_keys(db, [(CATEGORY, previous_name.lower()), (CATEGORY, category.category_name.lower())])
+    record_catalog_change(db, card_ids=[category.card_master_id], categories=[previous_name, category.category_name])
     db.commit()
     db.refresh(category)
     
@@ -382,6 +297,8 @@ def delete_spending_category(
         raise HTTPException(status_code=404, detail="Category not found")
     
     db.delete(category)
+    reward_ranking_service.refresh(db, CATEGORY, category.category_name)
+    record_catalog_change(db, card_ids=[category.card_master_id], categories=[category.category_name])
     db.commit()
     
     return {"message": "Category deleted successfully"}
@@ -409,6 +326,8 @@ def create_merchant_reward(
     merchant_data.card_master_id = card_id
     db_merchant = CardMerchantReward(**merchant_data.dict())
     db.add(db_merchant)
+    reward_ranking_service.refresh(db, MERCHANT, db_merchant.merchant_name)
+    record_catalog_change(db, card_ids=[card_id], merchants=[db_merchant.merchant_name])
     db.commit()
     db.refresh(db_merchant)
 
@@ -427,10 +346,13 @@ def update_merchant_reward(
     if not merchant:
         raise HTTPException(status_code=404, detail="Merchant reward not found")
     
+    previous_name = merchant.merchant_name
     update_data = merchant_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(merchant, field, value)
     
+    reward_ranking_service.refresh_keys(db, [(MERCHANT, previous_name.lower()), (MERCHANT, merchant.merchant_name.lower())])
+    record_catalog_change(db, card_ids=[merchant.card_master_id], merchants=[previous_name, merchant.merchant_name])
     db.commit()
     db.refresh(merchant)
     
@@ -449,6 +371,8 @@ def delete_merchant_reward(
         raise HTTPException(status_code=404, detail="Merchant reward not found")
     
     db.delete(merchant)
+    reward_ranking_service.refresh(db, MERCHANT, merchant.merchant_name)
+    record_catalog_change(db, card_ids=[merchant.card_master_id], merchants=[merchant.merchant_name])
     db.commit()
     
     return {"message": "Merchant reward deleted successfully"}
@@ -479,188 +403,65 @@ def get_card_comparison_data(
         except Exception as e:
             print(f"Error authenticating user: {e}")
     
-    print(f"Comparison request - user_cards_only: {user_cards_only}, current_user: {current_user.id if current_user else None}")
-    
     # If user_cards_only is requested but no user is authenticated, return empty
     if user_cards_only and not current_user:
-        print(f"User cards only requested but no user authenticated")
         return []
     
     if user_cards_only and current_user:
-        print(f"Getting user cards for user ID: {current_user.id}")
-        
-        # Debug: Check all user cards first
-        all_user_cards = db.query(CreditCard).filter(
-            CreditCard.user_id == current_user.id
-        ).all()
-        print(f"User has {len(all_user_cards)} total cards in CreditCard table")
-        for card in all_user_cards:
-            print(f"  - Card ID: {card.id}, Master Data ID: {card.card_master_data_id}, Card Name: {card.card_name}")
-        
-        # Get cards that the user owns with card_master_data_id
-        user_cards_with_master = db.query(CreditCard).filter(
-            and_(
-                CreditCard.user_id == current_user.id,
-                CreditCard.card_master_data_id.isnot(None)
-            )
-        ).all()
-        print(f"User has {len(user_cards_with_master)} cards with card_master_data_id")
-        
-        if user_cards_with_master:
-            user_card_master_ids = [card.card_master_data_id for card in user_cards_with_master]
-            print(f"Master data IDs: {user_card_master_ids}")
-            
-            # Debug: Check if these master data IDs exist in CardMasterData table
-            master_data_cards = db.query(CardMasterData).filter(
-                CardMasterData.id.in_(user_card_master_ids)
+        # Slice the matrix to the master cards the user owns
+        user_card_master_ids = [
+            card_master_data_id for (card_master_data_id,) in db.query(CreditCard.card_master_data_id).filter(
+                and_(
+                    CreditCard.user_id == current_user.id,
+                    CreditCard.card_master_data_id.isnot(None)
+                )
             ).all()
-            print(f"Found {len(master_data_cards)} cards in CardMasterData table")
-            for card in master_data_cards:
-                print(f"  - Master Data ID: {card.id}, Bank: {card.bank_name}, Card: {card.card_name}")
-            
-            query = db.query(CardMasterData).filter(
-                CardMasterData.id.in_(user_card_master_ids)
-            )
-        else:
-            print("No cards found with card_master_data_id")
+        ]
+        if not user_card_master_ids:
             return []
+        return comparison_matrix_service.get_rows(db, user_card_master_ids)
     elif card_ids:
         # Get specific cards by IDs
-        query = db.query(CardMasterData).filter(CardMasterData.id.in_(card_ids))
-    else:
-        # Get all active cards
-        query = db.query(CardMasterData).filter(CardMasterData.is_active == True)
-    
-    cards = query.options(
-        joinedload(CardMasterData.spending_categories),
-        joinedload(CardMasterData.merchant_rewards)
-    ).all()
-    
-    print(f"Found {len(cards)} cards for comparison")
-    for card in cards:
-        print(f"  - {card.bank_name} {card.card_name}")
-    
-    # Calculate popularity scores for categories and merchants
-    category_popularity = {}
-    merchant_popularity = {}
-    
-    # Collect all categories and merchants with their reward rates
-    for card in cards:
-        for category in card.spending_categories:
-            if category.is_active:
-                category_name = category.category_name.lower().strip()
-                if category_name not in category_popularity:
-                    category_popularity[category_name] = {
-                        'total_cards': 0,
-                        'total_reward_rate': 0,
-                        'max_reward_rate': 0
-                    }
-                category_popularity[category_name]['total_cards'] += 1
-                category_popularity[category_name]['total_reward_rate'] += category.reward_rate
-                category_popularity[category_name]['max_reward_rate'] = max(
-                    category_popularity[category_name]['max_reward_rate'], 
-                    category.reward_rate
-                )
-        
-        for merchant in card.merchant_rewards:
-            if merchant.is_active:
-                merchant_name = merchant.merchant_name.lower().strip()
-                if merchant_name not in merchant_popularity:
-                    merchant_popularity[merchant_name] = {
-                        'total_cards': 0,
-                        'total_reward_rate': 0,
-                        'max_reward_rate': 0
-                    }
-                merchant_popularity[merchant_name]['total_cards'] += 1
-                merchant_popularity[merchant_name]['total_reward_rate'] += merchant.reward_rate
-                merchant_popularity[merchant_name]['max_reward_rate'] = max(
-                    merchant_popularity[merchant_name]['max_reward_rate'], 
-                    merchant.reward_rate
-                )
+        return comparison_matrix_service.get_rows(db, card_ids)
     
-    # Calculate enhanced popularity scores using market research data
-    def calculate_enhanced_popularity_score(merchant_name, stats):
-        """Calculate enhanced popularity score combining market data with card coverage"""
-        avg_reward_rate = stats['total_reward_rate'] / stats['total_cards'] if stats['total_cards'] > 0 else 0
-        coverage_percent = stats['total_cards'] / len(cards)  # Percentage of cards offering this
-        
-        # Use market research-based popularity service
-        enhanced_score = merchant_popularity_service.calculate_enhanced_popularity_score(
-            merchant_name=merchant_name,
-            card_coverage_percent=coverage_percent,
-            avg_reward_rate=avg_reward_rate
-        )
-        
-        return enhanced_score
-    
-    # Sort categories by traditional method (still useful for spending categories)
-    def calculate_category_popularity_score(stats):
-        avg_reward_rate = stats['total_reward_rate'] / stats['total_cards'] if stats['total_cards'] > 0 else 0
-        coverage_score = stats['total_cards'] / len(cards)  # Percentage of cards offering this
-        reward_score = avg_reward_rate / 10  # Normalize reward rate (assuming max ~10%)
-        max_reward_bonus = stats['max_reward_rate'] / 20  # Bonus for having high max rates
-        
-        return (coverage_score * settings.POPULARITY_COVERAGE_WEIGHT + 
-                reward_score * settings.POPULARITY_REWARD_WEIGHT + 
-                max_reward_bonus * settings.POPULARITY_MAX_REWARD_WEIGHT)
-    
-    # Use fixed ordered lists — always show all 15 categories and 15 merchants
-    # Format data for comparison page
-    comparison_data = []
-    for card in cards:
-        # Build categories dict using canonical ordered list
-        categories = {}
-        for category_name in ORDERED_CATEGORIES:
-            category = next((c for c in card.spending_categories if c.category_name.lower().strip() == category_name and c.is_active), None)
-            if category:
-                categories[category_name] = category.reward_display
-
-        # Build merchants dict using canonical ordered list
-        merchants = {}
-        for merchant_name in ORDERED_MERCHANTS:
-            merchant = next((m for m in card.merchant_rewards if m.merchant_name.lower().strip() == merchant_name and m.is_active), None)
-            if merchant:
-                merchants[merchant_name] = merchant.reward_display
-        
-        comparison_item = CardComparisonData(
-            id=card.id,
-            bank_name=card.bank_name,
-            card_name=card.card_name,
-            display_name=card.display_name,
-            joining_fee_display=card.joining_fee_display,
-            annual_fee_display=card.annual_fee_display,
-            annual_fee_waiver_spend=card.annual_fee_waiver_spend,
-            domestic_lounge_visits=card.domestic_lounge_visits,
-            international_lounge_visits=card.international_lounge_visits,
-            lounge_spend_requirement=card.lounge_spend_requirement,
-            lounge_spend_period=card.lounge_spend_period,
-            categories=categories,
-            merchants=merchants,
-        )
-        comparison_data.append(comparison_item)
+    # Get all active cards
+    return comparison_matrix_service.get_rows(db)
+
+
+@router.get("/rankings/{dimension}/{name}")
+def get_reward_rankings(
+    dimension: str,
+    name: str,
+    limit: int = Query(10, ge=1, le=settings.REWARD_RANKING_TOP_N),
+    db: Session = Depends(get_db)
+):
+    """Top cards for a merchant or spending category, ordered by reward rate"""
+    if dimension not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"Dimension must be one of: {', '.join(DIMENSIONS)}")
     
-    return comparison_data
+    return {
+        "dimension": dimension,
+        "name": name.lower(),
+        "cards": reward_ranking_service.get_rankings(db, dimension, name, limit)
+    }
 
 
 @router.get("/banks", response_model=List[str])
-def get_available_banks(db: Session = Depends(get_db)):
+def get_available_banks():
     """Get list of available banks"""
-    banks = db.query(CardMasterData.bank_name).distinct().all()
-    return [bank[0] for bank in banks]
+    return list(card_catalog_service.get_snapshot().banks)
 
 
 @router.get("/categories", response_model=List[str])
-def get_available_categories(db: Session = Depends(get_db)):
+def get_available_categories():
     """Get list of available spending categories"""
-    categories = db.query(CardSpendingCategory.category_name).distinct().all()
-    return [category[0] for category in categories]
+    return list(card_catalog_service.get_snapshot().categories)
 
 
 @router.get("/merchants", response_model=List[str])
-def get_available_merchants(db: Session = Depends(get_db)):
+def get_available_merchants():
     """Get list of available merchants"""
-    merchants = db.query(CardMerchantReward.merchant_name).distinct().all()
-    return [merchant[0] for merchant in merchants]
+    return list(card_catalog_service.get_snapshot().merchants)
 
 @router.get("/debug/user")
 def debug_user_info(request: Request, db: Session = Depends(get_db)):
@@ -9,6 +9,7 @@ from app.models.user import User
 from app.models.card_review import CardReview, ReviewVote
 from app.models.card_master_data import CardMasterData
 from app.models.credit_card import CreditCard
+from app.services.hydration_service import PageHydrator
 from app.schemas.card_review import (
     CardReviewCreate, 
     CardReviewResponse, 
@@ -43,14 +44,18 @@ def get_card_reviews(
         CardReview.card_master_id == card_id
     ).scalar() or 0.0
     
+    # Reviewers for the whole page in one query
+    reviewers = PageHydrator(db).users(review.user_id for review in reviews)
+    
     # Convert to response format
     review_responses = []
     for review in reviews:
+        reviewer = reviewers.get(review.user_id)
         review_responses.append(CardReviewResponse(
             id=review.id,
             user_id=review.user_id,
             card_master_id=review.card_master_id,
-            user_name=f"{review.user.first_name} {review.user.last_name}".strip(),
+            user_name=f"{reviewer.first_name or ''} {reviewer.last_name or ''}".strip() if reviewer else "Unknown User",
             overall_rating=review.overall_rating,
             review_title=review.review_title,
             review_content=review.review_content,
@@ -2,16 +2,21 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, asc
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from app.core.database import get_db
 from app.core.security import get_current_user, get_optional_current_user
 from app.models.user import User
-from app.models.community import CommunityPost, CommunityComment, PostVote, CommentVote
+from app.models.community import CommunityPost, CommunityComment
 from app.models.card_master_data import CardMasterData
+from app.services.discussion_ranking_service import discussion_ranking_service
+from app.services.hydration_service import PageHydrator
+from app.services.comment_thread_service import comment_thread_service
+from app.services.vote_service import post_vote_service, comment_vote_service
+from app.services.community_search_service import community_search_service
 from app.schemas.community import (
     PostCreate, PostUpdate, PostResponse, PostList, PostDetail,
-    CommentCreate, CommentUpdate, CommentResponse,
-    VoteCreate, VoteResponse
+    CommentCreate, CommentUpdate, CommentResponse, CommentPage,
+    VoteCreate, VoteResponse, SearchResults
 )
 
 router = APIRouter()
@@ -32,41 +37,8 @@ def format_time_ago(timestamp: datetime) -> str:
     else:
         return "just now"
 
-def build_comment_tree(comments: List[CommunityComment]) -> List[CommentResponse]:
-    """Build nested comment tree structure"""
-    comment_dict = {comment.id: comment for comment in comments}
-    root_comments = []
-    
-    for comment in comments:
-        if comment.parent_id is None:
-            # Root comment
-            root_comments.append(comment)
-        else:
-            # Child comment
-            parent = comment_dict.get(comment.parent_id)
-            if parent:
-                if not hasattr(parent, 'replies'):
-                    parent.replies = []
-                parent.replies.append(comment)
-    
-    def convert_to_response(comment: CommunityComment) -> CommentResponse:
-        replies = [convert_to_response(reply) for reply in getattr(comment, 'replies', [])]
-        return CommentResponse(
-            id=comment.id,
-            user_id=comment.user_id,
-            post_id=comment.post_id,
-            parent_id=comment.parent_id,
-            user_name=comment.user.full_name,
-            body=comment.body,
-            upvotes=comment.upvotes,
-            downvotes=comment.downvotes,
-            net_votes=comment.net_votes,
-            created_at=comment.created_at,
-            updated_at=comment.updated_at or comment.created_at,
-            replies=replies
-        )
-    
-    return [convert_to_response(comment) for comment in root_comments]
+def author_name(user: Optional[User]) -> str:
+    return user.full_name if user else "Unknown User"
 
 # Post endpoints
 @router.get("/cards/{card_id}/posts", response_model=PostList)
@@ -101,22 +73,19 @@ def get_card_posts(
     total_count = query.count()
     posts = query.offset(skip).limit(limit).all()
 
+    # Authors and the caller's votes for the whole page, one query each
+    hydrator = PageHydrator(db)
+    authors = hydrator.users(post.user_id for post in posts)
+    user_votes = hydrator.post_votes(current_user, [post.id for post in posts])
+
     # Convert to response format
     post_responses = []
     for post in posts:
-        user_vote = None
-        if current_user:
-            vote = db.query(PostVote).filter(
-                PostVote.user_id == current_user.id,
-                PostVote.post_id == post.id
-            ).first()
-            user_vote = vote.vote_type if vote else None
-
         post_responses.append(PostResponse(
             id=post.id,
             user_id=post.user_id,
             card_master_id=post.card_master_id,
-            user_name=post.user.full_name,
+            user_name=author_name(authors.get(post.user_id)),
             title=post.title,
             body=post.body,
             upvotes=post.upvotes,
@@ -125,7 +94,7 @@ def get_card_posts(
             comment_count=post.comment_count,
             created_at=post.created_at,
             updated_at=post.updated_at or post.created_at,
-            user_vote=user_vote
+            user_vote=user_votes.get(post.id)
         ))
 
     return PostList(posts=post_responses, total_count=total_count)
@@ -150,6 +119,7 @@ def create_post(
         title=post_data.title,
         body=post_data.body
     )
+    discussion_ranking_service.rescore(post)
     
     db.add(post)
     db.commit()
@@ -173,10 +143,13 @@ def create_post(
 @router.get("/posts/{post_id}", response_model=PostDetail)
 def get_post_detail(
     post_id: int,
+    comment_limit: int = Query(50, ge=1, le=200, description="Top-level comments to include"),
+    depth: int = Query(3, ge=1, le=10, description="Reply levels to include under each comment"),
+    replies_limit: int = Query(10, ge=1, le=100, description="Replies to include per comment"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_current_user)
 ):
-    """Get detailed post with all comments"""
+    """Get detailed post with its comment thread; deep or long threads return cursors for the rest"""
     post = db.query(CommunityPost).filter(
         CommunityPost.id == post_id,
         CommunityPost.is_deleted == False
@@ -185,41 +158,92 @@ def get_post_detail(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    # Get all comments for this post
-    comments = db.query(CommunityComment).filter(
-        CommunityComment.post_id == post_id,
-        CommunityComment.is_deleted == False
-    ).order_by(asc(CommunityComment.created_at)).all()
+    # All comments with their authors in one query, rendered only as far as the limits allow
+    thread = comment_thread_service.load(db, post_id)
+    comment_tree, comments_cursor = thread.page(limit=comment_limit, depth=depth, replies_limit=replies_limit)
 
-    # Build comment tree
-    comment_tree = build_comment_tree(comments)
+    hydrator = PageHydrator(db)
+    authors = hydrator.users([post.user_id])
 
     # Resolve user's vote on this post
-    user_vote = None
-    if current_user:
-        vote = db.query(PostVote).filter(
-            PostVote.user_id == current_user.id,
-            PostVote.post_id == post_id
-        ).first()
-        user_vote = vote.vote_type if vote else None
+    user_vote = hydrator.post_votes(current_user, [post.id]).get(post.id)
 
     return PostDetail(
         id=post.id,
         user_id=post.user_id,
         card_master_id=post.card_master_id,
-        user_name=post.user.full_name,
+        user_name=author_name(authors.get(post.user_id)),
         title=post.title,
         body=post.body,
         upvotes=post.upvotes,
         downvotes=post.downvotes,
         net_votes=post.net_votes,
-        comment_count=len(comments),
+        comment_count=len(thread),
         created_at=post.created_at,
         updated_at=post.updated_at or post.created_at,
         comments=comment_tree,
+        comments_cursor=comments_cursor,
         user_vote=user_vote
     )
 
+@router.get("/posts/{post_id}/comments", response_model=CommentPage)
+def get_post_comments(
+    post_id: int,
+    after: Optional[int] = Query(None, description="comments_cursor or next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    depth: int = Query(3, ge=1, le=10),
+    replies_limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Load more top-level comments of a post"""
+    post_exists = db.query(CommunityPost.id).filter(
+        CommunityPost.id == post_id,
+        CommunityPost.is_deleted == False
+    ).first()
+    if not post_exists:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    comments, next_cursor = comment_thread_service.load_page(
+        db, post_id, after=after, limit=limit, depth=depth, replies_limit=replies_limit
+    )
+    return CommentPage(comments=comments, next_cursor=next_cursor)
+
+@router.get("/comments/{comment_id}/replies", response_model=CommentPage)
+def get_comment_replies(
+    comment_id: int,
+    after: Optional[int] = Query(None, description="replies_cursor or next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=200),
+    depth: int = Query(3, ge=1, le=10),
+    replies_limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Load more replies to a comment (the "load more replies" link in deep or long threads)"""
+    comment = db.query(CommunityComment).filter(
+        CommunityComment.id == comment_id,
+        CommunityComment.is_deleted == False
+    ).first()
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    replies, next_cursor = comment_thread_service.load_page(
+        db, comment.post_id, parent_id=comment_id, after=after, limit=limit, depth=depth, replies_limit=replies_limit
+    )
+    return CommentPage(comments=replies, next_cursor=next_cursor)
+
+@router.get("/search", response_model=SearchResults)
+def search_community(
+    q: str = Query(..., min_length=1, max_length=200),
+    card_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Search posts and comments, most relevant first, with highlighted snippets"""
+    try:
+        return community_search_service.search(db, q, card_id=card_id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.put("/posts/{post_id}", response_model=PostResponse)
 def update_post(
     post_id: int,
@@ -326,7 +350,7 @@ def create_comment(
     db.add(comment)
     
     # Update post comment count
-    post.comment_count += 1
+    discussion_ranking_service.comment_added(db, post_id, is_reply=bool(comment_data.parent_id))
     
     db.commit()
     db.refresh(comment)
@@ -410,12 +434,7 @@ def delete_comment(
     db.flush()
 
     # Resync comment count from actual active comments to prevent drift
-    post = db.query(CommunityPost).filter(CommunityPost.id == comment.post_id).first()
-    if post:
-        post.comment_count = db.query(CommunityComment).filter(
-            CommunityComment.post_id == comment.post_id,
-            CommunityComment.is_deleted == False
-        ).count()
+    discussion_ranking_service.recount_comments(db, comment.post_id)
 
     db.commit()
     
@@ -429,60 +448,23 @@ def vote_on_post(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Vote on a post"""
-    post = db.query(CommunityPost).filter(
+    """Vote on a post; voting the same way again removes the vote"""
+    post_exists = db.query(CommunityPost.id).filter(
         CommunityPost.id == post_id,
         CommunityPost.is_deleted == False
     ).first()
     
-    if not post:
+    if not post_exists:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Check if user already voted
-    existing_vote = db.query(PostVote).filter(
-        PostVote.user_id == current_user.id,
-        PostVote.post_id == post_id
-    ).first()
-    
-    if existing_vote:
-        # Update existing vote
-        if existing_vote.vote_type == vote_data.vote_type:
-            # Remove vote if same type
-            db.delete(existing_vote)
-            if vote_data.vote_type == "upvote":
-                post.upvotes = max(0, post.upvotes - 1)
-            else:
-                post.downvotes = max(0, post.downvotes - 1)
-        else:
-            # Change vote type
-            if existing_vote.vote_type == "upvote":
-                post.upvotes = max(0, post.upvotes - 1)
-                post.downvotes += 1
-            else:
-                post.downvotes = max(0, post.downvotes - 1)
-                post.upvotes += 1
-            existing_vote.vote_type = vote_data.vote_type
-    else:
-        # Create new vote
-        vote = PostVote(
-            user_id=current_user.id,
-            post_id=post_id,
-            vote_type=vote_data.vote_type
-        )
-        db.add(vote)
-        
-        if vote_data.vote_type == "upvote":
-            post.upvotes += 1
-        else:
-            post.downvotes += 1
-    
+    vote = post_vote_service.cast(db, current_user.id, post_id, vote_data.vote_type)
     db.commit()
     
     return VoteResponse(
-        id=existing_vote.id if existing_vote else vote.id,
+        id=vote.id,
         user_id=current_user.id,
-        vote_type=vote_data.vote_type,
-        created_at=existing_vote.created_at if existing_vote else vote.created_at
+        vote_type=vote.vote_type,
+        created_at=vote.created_at
     )
 
 
@@ -493,60 +475,23 @@ def vote_on_comment(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Vote on a comment"""
-    comment = db.query(CommunityComment).filter(
+    """Vote on a comment; voting the same way again removes the vote"""
+    comment_exists = db.query(CommunityComment.id).filter(
         CommunityComment.id == comment_id,
         CommunityComment.is_deleted == False
     ).first()
     
-    if not comment:
+    if not comment_exists:
         raise HTTPException(status_code=404, detail="Comment not found")
     
-    # Check if user already voted
-    existing_vote = db.query(CommentVote).filter(
-        CommentVote.user_id == current_user.id,
-        CommentVote.comment_id == comment_id
-    ).first()
-    
-    if existing_vote:
-        # Update existing vote
-        if existing_vote.vote_type == vote_data.vote_type:
-            # Remove vote if same type
-            db.delete(existing_vote)
-            if vote_data.vote_type == "upvote":
-                comment.upvotes = max(0, comment.upvotes - 1)
-            else:
-                comment.downvotes = max(0, comment.downvotes - 1)
-        else:
-            # Change vote type
-            if existing_vote.vote_type == "upvote":
-                comment.upvotes = max(0, comment.upvotes - 1)
-                comment.downvotes += 1
-            else:
-                comment.downvotes = max(0, comment.downvotes - 1)
-                comment.upvotes += 1
-            existing_vote.vote_type = vote_data.vote_type
-    else:
-        # Create new vote
-        vote = CommentVote(
-            user_id=current_user.id,
-            comment_id=comment_id,
-            vote_type=vote_data.vote_type
-        )
-        db.add(vote)
-        
-        if vote_data.vote_type == "upvote":
-            comment.upvotes += 1
-        else:
-            comment.downvotes += 1
-    
+    vote = comment_vote_service.cast(db, current_user.id, comment_id, vote_data.vote_type)
     db.commit()
     
     return VoteResponse(
-        id=existing_vote.id if existing_vote else vote.id,
+        id=vote.id,
         user_id=current_user.id,
-        vote_type=vote_data.vote_type,
-        created_at=existing_vote.created_at if existing_vote else vote.created_at
+        vote_type=vote.vote_type,
+        created_at=vote.created_at
     )
 
 
@@ -557,62 +502,6 @@ def get_top_discussions(
 ):
     """Get top discussions using multi-tier fallback strategy"""
     
-    def calculate_engagement_score(post: CommunityPost) -> float:
-        """Calculate engagement score for a post"""
-        # Get comment count including replies
-        comment_count = db.query(CommunityComment).filter(
-            CommunityComment.post_id == post.id,
-            CommunityComment.is_deleted == False
-        ).count()
-        
-        # Get reply count (comments with parent_id)
-        reply_count = db.query(CommunityComment).filter(
-            CommunityComment.post_id == post.id,
-            CommunityComment.parent_id.isnot(None),
-            CommunityComment.is_deleted == False
-        ).count()
-        
-        # Calculate engagement score
-        engagement_score = (
-            (post.upvotes * 2) + 
-            (post.downvotes * -1) + 
-            (comment_count * 3) + 
-            (reply_count * 1.5)
-        )
-        
-        # Add recency bonus (max 12 points for posts < 24 hours old)
-        hours_since_posted = (datetime.utcnow() - post.created_at).total_seconds() / 3600
-        recency_bonus = max(0, (24 - hours_since_posted) * 0.5)
-        
-        return engagement_score + recency_bonus
-    
-    def get_discussions_by_tier(days_back: Optional[int] = None, min_engagement: float = 0) -> List[dict]:
-        """Get discussions for a specific tier"""
-        query = db.query(CommunityPost).filter(
-            CommunityPost.is_deleted == False
-        )
-        
-        if days_back:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-            query = query.filter(CommunityPost.created_at >= cutoff_date)
-        
-        posts = query.all()
-        
-        # Calculate scores and filter by minimum engagement
-        scored_posts = []
-        for post in posts:
-            score = calculate_engagement_score(post)
-            if score >= min_engagement:
-                scored_posts.append({
-                    'post': post,
-                    'score': score,
-                    'engagement_score': calculate_engagement_score(post)
-                })
-        
-        # Sort by score and return top results
-        scored_posts.sort(key=lambda x: x['score'], reverse=True)
-        return scored_posts[:limit]
-    
     # Multi-tier fallback strategy
     tiers = [
         (7, 10),    # Tier 1: Last 7 days, engagement > 10
@@ -622,25 +511,27 @@ def get_top_discussions(
         (None, 0)   # Tier 5: All-time, any engagement (fallback)
     ]
     
+    hydrator = PageHydrator(db)
     for days_back, min_engagement in tiers:
-        discussions = get_discussions_by_tier(days_back, min_engagement)
-        if discussions:
+        # Scores are stored and kept current, so each tier is one indexed top-K query
+        posts = discussion_ranking_service.top_posts(db, limit, days_back, min_engagement)
+        if posts:
+            authors = hydrator.users(post.user_id for post in posts)
+            card_names = hydrator.card_names(post.card_master_id for post in posts)
+            
             # Format response
             result = []
-            for item in discussions:
-                post = item['post']
-                card = db.query(CardMasterData).filter(CardMasterData.id == post.card_master_id).first()
-                
+            for post in posts:
                 result.append({
                     "id": post.id,
                     "title": post.title,
                     "body": post.body,
-                    "user_name": post.user.full_name,
-                    "card_name": f"{card.bank_name} {card.card_name}" if card else "Unknown Card",
+                    "user_name": author_name(authors.get(post.user_id)),
+                    "card_name": card_names.get(post.card_master_id) or "Unknown Card",
                     "upvotes": post.upvotes,
                     "downvotes": post.downvotes,
                     "comment_count": post.comment_count,
-                    "engagement_score": round(item['engagement_score'], 1),
+                    "engagement_score": round(post.hot_score or 0, 1),
                     "created_at": post.created_at,
                     "time_ago": format_time_ago(post.created_at)
                 })
@@ -10,10 +10,12 @@ from app.schemas.credit_card import (
     CreditCardCreate,
     CreditCardUpdate,
     CreditCardResponse,
-    CreditCardSummary
+    CreditCardSummary,
+    RewardOptimizationRequest
 )
 from app.models.user import User
 from app.core.security import get_current_user_sync
+from app.services.reward_optimizer_service import reward_optimizer_service
 
 router = APIRouter()
 
@@ -107,6 +109,19 @@ def get_popular_cards(
     return result
 
 
+@router.post("/optimize-rewards")
+def optimize_rewards(
+    request: RewardOptimizationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_sync)
+):
+    """Split monthly spend across the user's cards for the highest rewards net of fees"""
+    try:
+        return reward_optimizer_service.optimize(db, current_user.id, request.spend, request.ticket_sizes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{card_id}", response_model=CreditCardResponse)
 def get_credit_card(
     card_id: int,
@@ -15,6 +15,8 @@ from app.schemas.edit_suggestion import (
     EditSuggestionResponse, EditSuggestionUpdate, EditSuggestionStats
 )
 from app.core.allowed_names import validate_category_name, validate_merchant_name
+from app.core.catalog_events import record_suggestion_change
+from app.services.reward_ranking_service import reward_ranking_service
 from datetime import datetime
 
 router = APIRouter()
@@ -391,6 +393,11 @@ def review_suggestion(
                             detail="Invalid fee waiver spend format. Please use format like '₹2,00,000' or '200000'"
                         )
 
+    # Keep the materialized best-card rankings in step with the approved reward change
+    if review_data.status == "approved":
+        reward_ranking_service.refresh_for_suggestion(db, suggestion)
+        record_suggestion_change(db, suggestion)
+
     # Create audit log
     audit_log = AuditLog(
         user_id=current_user.id,
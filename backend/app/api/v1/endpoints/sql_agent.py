@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
+import json
 import logging
 
 from app.core.sql_agent import SQLAgentService
@@ -28,6 +30,7 @@ class QueryResponse(BaseModel):
     explanation: Optional[str] = None
     results: Optional[Any] = None
     error: Optional[str] = None
+    trace_id: Optional[str] = None
 
 async def get_sql_agent_service():
     """Get or initialize SQL Agent Service"""
@@ -64,7 +67,8 @@ async def process_query(
             response=result.get("response", ""),
             sql_query=result.get("sql_query"),
             explanation=result.get("explanation"),
-            results=result.get("results")
+            results=result.get("results"),
+            trace_id=result.get("trace_id")
         )
         
     except Exception as e:
@@ -75,6 +79,43 @@ async def process_query(
             error=str(e)
         )
 
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    agent_service: SQLAgentService = Depends(get_sql_agent_service)
+):
+    """
+    Server-Sent Events variant of /query: stage events (cache_hit, fast_path, vector_context,
+    sql_generated, rows_returned), then the answer as token events, then a done event with the full result.
+    """
+    async def event_stream():
+        try:
+            async for event, data in agent_service.stream_query(
+                query=request.query,
+                user_id=request.user_id,
+                context=request.context,
+                include_sql=request.include_sql,
+                include_explanation=request.include_explanation,
+                max_results=request.max_results
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming query: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/router/stats")
+async def get_router_stats(agent_service: SQLAgentService = Depends(get_sql_agent_service)):
+    """Per-route hit rates and latency of the fast-path query router"""
+    if agent_service.query_router is None:
+        return {"enabled": False}
+    return {"enabled": True, **agent_service.query_router.get_stats()}
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint for SQL Agent Service"""
@@ -226,3 +226,36 @@ async def parse_pdf(url: str) -> str:
     except Exception as e:
         logger.error(f"PDF parsing failed for {url}: {e}")
         return f"Error parsing PDF: {str(e)}"
+
+# --- Tool 4: Best Card Ranking Lookup ---
+@tool
+async def lookup_best_cards(name: str) -> str:
+    """
+    Look up the precomputed top cards for a merchant or spending category, best reward rate first.
+    Input is a single merchant or category name, e.g. "amazon" or "dining".
+    Prefer this over writing SQL for "best card for <merchant/category>" questions.
+    """
+    from app.core.allowed_names import ORDERED_MERCHANTS
+    from app.core.database import SessionLocal
+    from app.services.reward_ranking_service import reward_ranking_service, MERCHANT, CATEGORY
+
+    # Single-input tool so it works with zero-shot ReAct agents
+    name = name.strip().strip('"\'').lower()
+    dimension = MERCHANT if name in ORDERED_MERCHANTS else CATEGORY
+
+    def _lookup():
+        db = SessionLocal()
+        try:
+            return reward_ranking_service.get_rankings(db, dimension, name)
+        finally:
+            db.close()
+
+    try:
+        rankings = await asyncio.to_thread(_lookup)
+    except Exception as e:
+        logger.error(f"Ranking lookup failed for {dimension}={name}: {e}")
+        return f"Error looking up rankings: {str(e)}"
+
+    if not rankings:
+        return f"No ranked cards found for {dimension} '{name}'."
+    return json.dumps(rankings)
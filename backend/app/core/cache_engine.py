@@ -0,0 +1,436 @@
+"""
+Shared in-memory cache engine.
+An ordered-dict LRU gives O(1) get/set/evict; a min-heap of expiry times lets TTL expiry run
+lazily on read and in bounded sweeps from a background timer. Entries are bounded both by count
+and by an estimated byte size, can carry tags for group invalidation, and every namespace keeps
+its own hit/miss/eviction counters. A registry-wide maintenance loop sweeps expired entries,
+refreshes hot entries shortly before they expire (refresh-ahead) and re-accounts sizes.
+Each engine serializes its operations with its own lock: sync endpoints use engines from threadpool
+threads while maintenance and stats walk them from the event loop.
+"""
+
+import asyncio
+import functools
+import heapq
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Zero-argument coroutine function that recomputes an entry and stores it again
+Refresher = Callable[[], Awaitable[Any]]
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate payload size in bytes, computed once when a value is stored"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore"))
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+def _synchronized(method):
+    """Run an engine method under the engine's lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "tags", "hits", "refresher")
+
+    def __init__(
+        self,
+        value: Any,
+        expires_at: float,
+        size: int,
+        tags: Tuple[str, ...] = (),
+        refresher: Optional[Refresher] = None,
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tags
+        self.hits = 0
+        self.refresher = refresher
+
+
+class CacheEngine:
+    """LRU cache with per-entry TTL, an entry bound and a byte bound"""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sizeof = sizeof
+        # Reentrant: set() deletes and __contains__ reads through other locked methods
+        self._lock = threading.RLock()
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # (refresh_at, expires_at, key) for entries that can be recomputed ahead of expiry
+        self._refresh_heap: List[Tuple[float, float, str]] = []
+        self._tag_index: Dict[str, Set[str]] = {}
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @_synchronized
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING, record=False) is not _MISSING
+
+    @_synchronized
+    def get(self, key: str, default: Any = None, record: bool = True) -> Any:
+        """Return a live value and mark it most recently used; expired entries are dropped on read"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            if record:
+                self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        if record:
+            self.hits += 1
+            entry.hits += 1
+        return entry.value
+
+    @_synchronized
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+        refresher: Optional[Refresher] = None,
+    ) -> bool:
+        """
+        Store a value, evicting least recently used entries until both bounds hold.
+        With a refresher, the maintenance loop recomputes the entry shortly before it expires if it is hot.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        size = self.sizeof(value)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Would evict the whole namespace and still not fit
+            self.delete(key)
+            return False
+
+        if key in self._entries:
+            self._remove(key)
+        entry = _Entry(value, expires_at, size, tuple(tags), refresher)
+        self._entries[key] = entry
+        self.size_bytes += size
+        for tag in entry.tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+        if expires_at != float("inf"):
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            if refresher is not None:
+                refresh_at = expires_at - ttl * settings.CACHE_REFRESH_AHEAD_FRACTION
+                heapq.heappush(self._refresh_heap, (refresh_at, expires_at, key))
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.size_bytes > self.max_bytes
+        ):
+            self._unlink(*self._entries.popitem(last=False))
+            self.evictions += 1
+
+        self._compact_heap()
+        return True
+
+    @_synchronized
+    def delete(self, key: str) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    @_synchronized
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of the tags"""
+        invalidated = 0
+        for tag in tags:
+            for key in list(self._tag_index.get(tag, ())):
+                if key in self._entries:
+                    self._remove(key)
+                    invalidated += 1
+        self.invalidations += invalidated
+        return invalidated
+
+    @_synchronized
+    def ttl(self, key: str) -> Optional[float]:
+        """Seconds until a key expires; None when it is missing or never expires"""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at == float("inf"):
+            return None
+        return max(0.0, entry.expires_at - time.monotonic())
+
+    @_synchronized
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    @_synchronized
+    def clear(self):
+        self._entries.clear()
+        self._expiry_heap.clear()
+        self._refresh_heap.clear()
+        self._tag_index.clear()
+        self.size_bytes = 0
+
+    @_synchronized
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        """Drop expired entries in expiry order, touching only the entries that are due"""
+        now = time.monotonic()
+        purged = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            if limit is not None and purged >= limit:
+                break
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            # Heap items outlive overwrites and deletes; only the current expiry counts
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                self.expirations += 1
+                purged += 1
+        return purged
+
+    @_synchronized
+    def due_for_refresh(self, min_hits: int, limit: int) -> List[Tuple[str, Refresher]]:
+        """Hot entries inside their refresh-ahead window; cold ones are left to expire"""
+        now = time.monotonic()
+        due = []
+        while self._refresh_heap and self._refresh_heap[0][0] <= now and len(due) < limit:
+            _, expires_at, key = heapq.heappop(self._refresh_heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at != expires_at or entry.expires_at <= now:
+                continue
+            if entry.hits >= min_hits:
+                due.append((key, entry.refresher))
+        return due
+
+    @_synchronized
+    def top_keys(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most-read live entries since they were last stored"""
+        now = time.monotonic()
+        hottest = heapq.nlargest(limit, self._entries.items(), key=lambda item: item[1].hits)
+        return [
+            {
+                "key": key,
+                "hits": entry.hits,
+                "size_bytes": entry.size,
+                "ttl_seconds": None if entry.expires_at == float("inf") else round(max(0.0, entry.expires_at - now), 1),
+            }
+            for key, entry in hottest
+        ]
+
+    @_synchronized
+    def recount_size(self) -> int:
+        """Recompute the byte total from the entries, correcting any drift in the running count"""
+        self.size_bytes = sum(entry.size for entry in self._entries.values())
+        return self.size_bytes
+
+    @_synchronized
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "tags": len(self._tag_index),
+        }
+
+    def _remove(self, key: str):
+        self._unlink(key, self._entries.pop(key))
+
+    def _unlink(self, key: str, entry: _Entry):
+        self.size_bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def _compact_heap(self):
+        """Rebuild the expiry and refresh heaps once stale items outnumber live entries"""
+        if len(self._expiry_heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [
+                (entry.expires_at, key)
+                for key, entry in self._entries.items()
+                if entry.expires_at != float("inf")
+            ]
+            heapq.heapify(self._expiry_heap)
+        if len(self._refresh_heap) > 2 * len(self._entries) + 64:
+            live = {(entry.expires_at, key) for key, entry in self._entries.items()}
+            self._refresh_heap = [item for item in self._refresh_heap if (item[1], item[2]) in live]
+            heapq.heapify(self._refresh_heap)
+
+
+class CacheRegistry:
+    """Named cache namespaces plus the background loop that maintains them"""
+
+    def __init__(self):
+        self.namespaces: Dict[str, CacheEngine] = {}
+        self._maintenance: Optional[asyncio.Task] = None
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self._last_accounting = 0.0
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.accounted_bytes = 0
+
+    def get_cache(
+        self,
+        namespace: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+    ) -> CacheEngine:
+        """Return the namespace's engine, creating it with the given bounds on first use"""
+        engine = self.namespaces.get(namespace)
+        if engine is None:
+            engine = CacheEngine(
+                namespace,
+                max_entries=max_entries or settings.CACHE_MAX_SIZE,
+                max_bytes=max_bytes if max_bytes is not None else settings.CACHE_MAX_BYTES,
+                default_ttl=default_ttl,
+            )
+            self.namespaces[namespace] = engine
+        return engine
+
+    def sweep(self) -> int:
+        """Expire due entries in every namespace, a bounded batch at a time"""
+        return sum(
+            engine.purge_expired(limit=settings.CACHE_SWEEP_BATCH_SIZE)
+            for engine in list(self.namespaces.values())
+        )
+
+    def refresh_ahead(self) -> int:
+        """Start background recomputes for hot entries about to expire, bounded by the concurrency limit"""
+        started = 0
+        for name, engine in list(self.namespaces.items()):
+            capacity = settings.CACHE_REFRESH_AHEAD_MAX_CONCURRENT - len(self._refreshing)
+            if capacity <= 0:
+                break
+            for key, refresher in engine.due_for_refresh(settings.CACHE_REFRESH_AHEAD_MIN_HITS, capacity):
+                if (name, key) in self._refreshing:
+                    continue
+                self._refreshing.add((name, key))
+                asyncio.create_task(self._refresh(name, key, refresher))
+                started += 1
+        return started
+
+    async def _refresh(self, namespace: str, key: str, refresher: Refresher):
+        try:
+            await refresher()
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.error(f"Cache refresh-ahead failed for {namespace}:{key}: {e}")
+        finally:
+            self._refreshing.discard((namespace, key))
+
+    def account(self) -> int:
+        """Periodic size accounting across namespaces"""
+        self.accounted_bytes = sum(engine.recount_size() for engine in list(self.namespaces.values()))
+        self._last_accounting = time.monotonic()
+        return self.accounted_bytes
+
+    def maintain(self):
+        """One maintenance tick: bounded sweep, refresh-ahead, and size accounting when due"""
+        purged = self.sweep()
+        refreshed = self.refresh_ahead()
+        if time.monotonic() - self._last_accounting >= settings.CACHE_SIZE_ACCOUNTING_INTERVAL_SECONDS:
+            self.account()
+        if purged or refreshed:
+            logger.debug(f"Cache maintenance: expired {purged}, refreshing {refreshed}")
+
+    def get_stats(self, top_keys: int = 0) -> Dict[str, Any]:
+        namespaces = {}
+        for name, engine in self.namespaces.items():
+            stats = engine.get_stats()
+            if top_keys:
+                stats["top_keys"] = engine.top_keys(top_keys)
+            namespaces[name] = stats
+        return {
+            "namespaces": namespaces,
+            "total_entries": sum(stats["entries"] for stats in namespaces.values()),
+            "total_size_bytes": sum(stats["size_bytes"] for stats in namespaces.values()),
+            "accounted_size_bytes": self.accounted_bytes,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._refreshing),
+            "maintenance_running": bool(self._maintenance and not self._maintenance.done()),
+        }
+
+    def start_maintenance(self, interval: Optional[float] = None):
+        """Run cache maintenance on a timer in the current event loop"""
+        if self._maintenance and not self._maintenance.done():
+            return
+        self._maintenance = asyncio.create_task(
+            self._maintenance_loop(interval or settings.CACHE_SWEEP_INTERVAL_SECONDS)
+        )
+
+    async def stop_maintenance(self):
+        if self._maintenance:
+            self._maintenance.cancel()
+            try:
+                await self._maintenance
+            except asyncio.CancelledError:
+                pass
+            self._maintenance = None
+
+    async def _maintenance_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.maintain()
+            except Exception as e:
+                logger.error(f"Cache maintenance error: {e}")
+
+
+# Global registry
+cache_registry = CacheRegistry()
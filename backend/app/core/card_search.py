@@ -0,0 +1,133 @@
+"""
+In-process search index over the card catalog for the type-ahead box.
+Card text (bank, card name, variant, reward program, description) is tokenized into an inverted
+index with per-field weights. Query tokens match indexed terms exactly, by prefix (so a partly
+typed word already finds cards) or, for typos, by trigram similarity over the term vocabulary.
+Cards are ranked by how many query tokens they matched, then by an idf-weighted score.
+The index is immutable; it is rebuilt together with the catalog snapshot.
+"""
+
+import math
+import re
+from bisect import bisect_left
+from typing import Container, Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# How much a hit in each field counts towards a card's score
+FIELD_WEIGHTS = (
+    ("card_name", 3.0),
+    ("bank_name", 2.0),
+    ("card_variant", 2.0),
+    ("reward_program_name", 1.5),
+    ("description", 1.0),
+)
+
+# Relative credit for non-exact matches of a query token
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.6
+
+MAX_PREFIX_EXPANSIONS = 50
+MIN_FUZZY_LENGTH = 3
+MIN_SIMILARITY = 0.3
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CardSearchIndex:
+    """Inverted index with prefix and trigram lookup over the term vocabulary"""
+
+    def __init__(self, cards: Iterable):
+        self.card_ids: List[int] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+
+        for position, card in enumerate(cards):
+            self.card_ids.append(card.id)
+            for field, weight in FIELD_WEIGHTS:
+                for term in set(tokenize(getattr(card, field, None))):
+                    postings = self.postings.setdefault(term, {})
+                    # A term in several fields counts once, at its best field's weight
+                    if postings.get(position, 0.0) < weight:
+                        postings[position] = weight
+
+        total = max(len(self.card_ids), 1)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + total / len(postings)) for term, postings in self.postings.items()
+        }
+        self.vocabulary: List[str] = sorted(self.postings)
+        self.by_trigram: Dict[str, List[str]] = {}
+        for term in self.vocabulary:
+            for gram in trigrams(term):
+                self.by_trigram.setdefault(gram, []).append(term)
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _fuzzy_terms(self, token: str) -> List[Tuple[str, float]]:
+        grams = trigrams(token)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for term in self.by_trigram.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        matches = []
+        for term, count in shared.items():
+            similarity = count / (len(grams) + len(term) + 1 - count)
+            if similarity >= MIN_SIMILARITY:
+                matches.append((term, similarity))
+        return matches
+
+    def expand(self, token: str, allow_prefix: bool) -> Dict[str, float]:
+        """Indexed terms a query token stands for, with the credit each match gets"""
+        terms: Dict[str, float] = {}
+        if token in self.postings:
+            terms[token] = 1.0
+        if allow_prefix:
+            for term in self._prefix_terms(token):
+                terms.setdefault(term, PREFIX_FACTOR)
+        if not terms and len(token) >= MIN_FUZZY_LENGTH:
+            for term, similarity in self._fuzzy_terms(token):
+                terms[term] = FUZZY_FACTOR * similarity
+        return terms
+
+    def search(
+        self, query: str, limit: int = 10, positions: Optional[Container[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """(card_id, score) pairs, best first, optionally only among the given card positions"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        # The last token is still being typed; earlier ones are complete words
+        complete_query = query[-1:].isspace()
+
+        matched: Dict[int, int] = {}
+        scores: Dict[int, float] = {}
+        for index, token in enumerate(tokens):
+            allow_prefix = index == len(tokens) - 1 and not complete_query
+            best: Dict[int, float] = {}
+            for term, factor in self.expand(token, allow_prefix).items():
+                idf = self.idf[term]
+                for position, weight in self.postings[term].items():
+                    score = factor * weight * idf
+                    if score > best.get(position, 0.0):
+                        best[position] = score
+            for position, score in best.items():
+                matched[position] = matched.get(position, 0) + 1
+                scores[position] = scores.get(position, 0.0) + score
+
+        if positions is not None:
+            scores = {position: score for position, score in scores.items() if position in positions}
+        ranked = sorted(scores, key=lambda position: (-matched[position], -scores[position], position))
+        return [(self.card_ids[position], round(scores[position], 4)) for position in ranked[:limit]]
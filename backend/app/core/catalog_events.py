@@ -0,0 +1,204 @@
+"""
+Catalog change events and the cache tags they invalidate.
+Cached answers are tagged with the cards, banks, merchants and categories they were built from.
+Catalog writes record what they touched on the SQLAlchemy session; once the session commits, the
+change is published to subscribers (the answer caches), which drop exactly the entries sharing a tag.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.allowed_names import ORDERED_CATEGORIES, ORDERED_MERCHANTS
+
+logger = logging.getLogger(__name__)
+
+# Answers that do not name a merchant or category (e.g. "lowest annual fee card") can depend on
+# any card, so they carry this tag and every catalog change invalidates them
+CATALOG_TAG = "catalog:all"
+
+_PENDING_KEY = "pending_catalog_change"
+
+
+def card_tag(card_id: int) -> str:
+    return f"card:{card_id}"
+
+
+def bank_tag(bank_name: str) -> str:
+    return f"bank:{bank_name.strip().lower()}"
+
+
+def merchant_tag(merchant: str) -> str:
+    return f"merchant:{merchant.strip().lower()}"
+
+
+def category_tag(category: str) -> str:
+    return f"category:{category.strip().lower()}"
+
+
+def answer_tags(query: str, results: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    """Tags for a cached answer: entities named in the question plus the cards and banks in its rows"""
+    query_lower = query.lower()
+    tags: Set[str] = set()
+    for merchant in ORDERED_MERCHANTS:
+        if re.search(rf"\b{re.escape(merchant)}\b", query_lower):
+            tags.add(merchant_tag(merchant))
+    for category in ORDERED_CATEGORIES:
+        if re.search(rf"\b{re.escape(category)}\b", query_lower):
+            tags.add(category_tag(category))
+    if not tags:
+        tags.add(CATALOG_TAG)
+
+    for row in results or []:
+        if not isinstance(row, dict):
+            continue
+        # Router templates alias the card column as card_id; agent SQL usually keeps card_master_id
+        card_id = row.get("card_id") or row.get("card_master_id")
+        if card_id:
+            tags.add(card_tag(card_id))
+        if row.get("bank_name"):
+            tags.add(bank_tag(str(row["bank_name"])))
+    return sorted(tags)
+
+
+@dataclass
+class CatalogChange:
+    """What a committed catalog write touched"""
+
+    card_ids: Set[int] = field(default_factory=set)
+    bank_names: Set[str] = field(default_factory=set)
+    merchants: Set[str] = field(default_factory=set)
+    categories: Set[str] = field(default_factory=set)
+
+    def merge(self, other: "CatalogChange"):
+        self.card_ids |= other.card_ids
+        self.bank_names |= other.bank_names
+        self.merchants |= other.merchants
+        self.categories |= other.categories
+
+    def tags(self) -> List[str]:
+        tags = {CATALOG_TAG}
+        tags.update(card_tag(card_id) for card_id in self.card_ids)
+        tags.update(bank_tag(name) for name in self.bank_names if name)
+        tags.update(merchant_tag(name) for name in self.merchants if name)
+        tags.update(category_tag(name) for name in self.categories if name)
+        return sorted(tags)
+
+
+CatalogSubscriber = Callable[[CatalogChange], Awaitable[None]]
+
+
+class CatalogEventBus:
+    """Delivers committed catalog changes to async subscribers on the application's event loop"""
+
+    def __init__(self):
+        self.subscribers: List[CatalogSubscriber] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Remember the server loop so commits made in threadpool endpoints can reach it"""
+        self.loop = loop
+
+    def subscribe(self, handler: CatalogSubscriber):
+        if handler not in self.subscribers:
+            self.subscribers.append(handler)
+
+    def unsubscribe(self, handler: CatalogSubscriber):
+        if handler in self.subscribers:
+            self.subscribers.remove(handler)
+
+    def publish(self, change: CatalogChange):
+        for handler in list(self.subscribers):
+            self._dispatch(handler, change)
+
+    def _dispatch(self, handler: CatalogSubscriber, change: CatalogChange):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        try:
+            if running is not None:
+                running.create_task(self._deliver(handler, change))
+            elif self.loop is not None and self.loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._deliver(handler, change), self.loop)
+            else:
+                logger.debug("No event loop bound; dropping catalog change event")
+        except Exception as e:
+            logger.error(f"Failed to dispatch catalog change: {e}")
+
+    async def _deliver(self, handler: CatalogSubscriber, change: CatalogChange):
+        try:
+            await handler(change)
+        except Exception as e:
+            logger.error(f"Catalog change subscriber failed: {e}")
+
+
+# Global bus
+catalog_event_bus = CatalogEventBus()
+
+
+def record_catalog_change(
+    db: Session,
+    card_ids: Iterable[int] = (),
+    bank_names: Iterable[str] = (),
+    merchants: Iterable[str] = (),
+    categories: Iterable[str] = (),
+    ranking_keys: Iterable[Tuple[str, str]] = (),
+):
+    """
+    Queue a catalog change on the session; it is published only if the session commits.
+    ranking_keys takes the (dimension, name) pairs used by the reward ranking service.
+    """
+    change = CatalogChange(
+        card_ids={card_id for card_id in card_ids if card_id is not None},
+        bank_names={name for name in bank_names if name},
+        merchants={name.lower() for name in merchants if name},
+        categories={name.lower() for name in categories if name},
+    )
+    for dimension, name in ranking_keys:
+        (change.merchants if dimension == "merchant" else change.categories).add(name.lower())
+
+    pending = db.info.get(_PENDING_KEY)
+    if pending is None:
+        db.info[_PENDING_KEY] = change
+    else:
+        pending.merge(change)
+
+
+def record_suggestion_change(db: Session, suggestion):
+    """Queue the catalog change made by approving an edit suggestion"""
+    from app.models.card_master_data import CardMasterData
+    from app.services.reward_ranking_service import SUGGESTION_DIMENSIONS, reward_ranking_service
+
+    card_id = suggestion.card_master_id
+    dimension = SUGGESTION_DIMENSIONS.get(suggestion.field_type)
+    if dimension:
+        record_catalog_change(db, card_ids=[card_id], ranking_keys=[(dimension, suggestion.field_name)])
+        return
+
+    # Card-level fields (fees, eligibility, ...) can change any answer the card appears in
+    card = db.query(CardMasterData).filter(CardMasterData.id == card_id).first()
+    record_catalog_change(
+        db,
+        card_ids=[card_id],
+        bank_names=[card.bank_name] if card else [],
+        ranking_keys=reward_ranking_service.card_ranking_keys(db, card_id)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session):
+    change = session.info.pop(_PENDING_KEY, None)
+    if change is not None:
+        catalog_event_bus.publish(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop(_PENDING_KEY, None)
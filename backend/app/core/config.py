@@ -84,6 +84,8 @@ class Settings(BaseSettings):
     MAX_TOKENS: int = 2000
     TEMPERATURE: float = 0.7
     VECTOR_SEARCH_LIMIT: int = 5
+    RETRIEVAL_DEADLINE_SECONDS: float = 2.0  # Shared budget for the concurrent retrieval fan-out
+    EMBEDDING_MEMO_SIZE: int = 512  # Query embeddings kept in VectorService's LRU
     SIMILARITY_THRESHOLD: float = 0.75
     
     # Cache settings
@@ -91,6 +93,22 @@ class Settings(BaseSettings):
     CACHE_TTL_SECONDS: int = 3600  # 1 hour
     CACHE_MAX_SIZE: int = 1000
     CACHE_TTL: int = 3600  # Alias for CACHE_TTL_SECONDS
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Per-namespace bound on estimated payload size
+    CACHE_SWEEP_INTERVAL_SECONDS: float = 30.0
+    CACHE_SWEEP_BATCH_SIZE: int = 1000  # Max expirations per namespace per sweep
+    CACHE_REFRESH_AHEAD_FRACTION: float = 0.2  # Refresh hot entries in the last 20% of their TTL
+    CACHE_REFRESH_AHEAD_MIN_HITS: int = 3  # Reads since the entry was stored that make it "hot"
+    CACHE_REFRESH_AHEAD_MAX_CONCURRENT: int = 2
+    CACHE_SIZE_ACCOUNTING_INTERVAL_SECONDS: float = 300.0
+    CACHE_L2_ENABLED: bool = False  # Share cached entries across workers through REDIS_URL (Redis 7+ preferred)
+    CACHE_KEY_PREFIX: str = "smartcards:cache"
+    CACHE_INVALIDATION_CHANNEL: str = "smartcards:cache:invalidate"
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 120.0  # Max wait on a coalesced in-flight computation
+    ANSWER_CACHE_MAX_RESULTS: int = 50  # Rows kept with a cached answer; larger max_results skip the answer caches
+    
+    # Semantic answer cache (paraphrase matching on query embeddings)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_COLLECTION_NAME: str = "semantic_answer_cache"
     
     # SQL Agent settings
     SQL_AGENT_TABLES: list = [
@@ -98,6 +116,7 @@ class Settings(BaseSettings):
         "card_master_data", 
         "card_spending_categories",
         "card_merchant_rewards",
+        "card_reward_rankings",
         "merchants",
         "transactions",
         "rewards",
@@ -105,6 +124,17 @@ class Settings(BaseSettings):
     ]
     SQL_AGENT_MAX_RETRIES: int = 3
     SQL_AGENT_TIMEOUT: int = 30
+    SQL_AGENT_POOL_SIZE: int = 5
+    SQL_AGENT_POOL_MAX_OVERFLOW: int = 10
+    
+    # Fast-path query router (templated intents bypass the LLM agent)
+    QUERY_ROUTER_ENABLED: bool = True
+    QUERY_ROUTER_MIN_CONFIDENCE: float = 0.9
+    
+    # Per-stage request tracing
+    TRACING_ENABLED: bool = True
+    TRACE_BUFFER_SIZE: int = 200  # Recent traces kept for export
+    TRACE_SAMPLE_SIZE: int = 1000  # Latency samples per stage for percentiles
     
     # Chatbot Configuration
     MAX_CONVERSATION_HISTORY: int = 10
@@ -115,6 +145,17 @@ class Settings(BaseSettings):
     POPULARITY_COVERAGE_WEIGHT: float = 0.4
     POPULARITY_REWARD_WEIGHT: float = 0.4
     POPULARITY_MAX_REWARD_WEIGHT: float = 0.2
+    
+    # Materialized "best card per merchant/category" rankings
+    REWARD_RANKING_TOP_N: int = 10
+    COMPARISON_MATRIX_MAX_AGE_SECONDS: int = 900  # Full rebuild bound; same-worker edits are patched immediately
+    CARD_DETAIL_CACHE_SIZE: int = 500
+    CARD_DETAIL_CACHE_TTL_SECONDS: int = 900  # Bounds staleness from edits made in other workers
+    CARD_CATALOG_MAX_AGE_SECONDS: int = 900  # Same-worker edits swap in a new snapshot immediately
+    DISCUSSION_DECAY_INTERVAL_SECONDS: int = 300  # How often recent posts' hot scores are decayed
+    COMMUNITY_SEARCH_CANDIDATES: int = 1000  # Best-bm25 hits re-ranked with votes per search
+    COMMUNITY_SEARCH_VOTE_WEIGHT: float = 2.0  # Upper bound of the net-vote boost added to relevance
+    
     @field_validator("DATABASE_URL", mode="before")
     @classmethod
     def assemble_db_connection(cls, v: Optional[str], values: dict) -> str:
@@ -0,0 +1,290 @@
+"""
+Deterministic fast-path router for the SQL agent.
+Recognises templated intents ("best card for <merchant>", "best card for <category>",
+"how many cards do I have") and answers them with parameterised SQL against the
+catalog tables, so the LangChain ReAct loop only runs when the router is not confident.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.core.allowed_names import ORDERED_CATEGORIES, ORDERED_MERCHANTS
+from app.core.config import settings
+from app.core.sql_executor import AsyncSQLExecutor
+
+logger = logging.getLogger(__name__)
+
+# Common spellings that map onto a canonical merchant/category name
+MERCHANT_ALIASES: Dict[str, str] = {
+    "amazon pay": "amazon",
+    "big basket": "bigbasket",
+    "book my show": "bookmyshow",
+    "phone pe": "phonepe",
+}
+
+CATEGORY_ALIASES: Dict[str, str] = {
+    "online": "online shopping",
+    "offline": "offline spends",
+    "in-store": "offline spends",
+    "petrol": "fuel",
+    "diesel": "fuel",
+    "restaurant": "dining",
+    "restaurants": "dining",
+    "groceries": "grocery",
+    "supermarket": "grocery",
+    "flights": "travel",
+    "hotels": "travel",
+    "movies": "entertainment",
+    "movie tickets": "entertainment",
+    "ott": "entertainment",
+    "bills": "utilities",
+    "bill payments": "utilities",
+    "electricity": "utilities",
+    "upi": "wallets",
+    "forex": "international",
+    "overseas": "international",
+    "taxes": "government payments",
+    "school fees": "education",
+}
+
+RECOMMENDATION_CUES = re.compile(r"\b(best|top|which|highest|maximum|max|recommend\w*|good|better|most|ideal)\b")
+CARD_COUNT_PATTERN = re.compile(r"\b(how many|number of|count)\b.*\bcards?\b")
+PORTFOLIO_PATTERN = re.compile(r"\b(my|mine|i have|i own|i hold|portfolio)\b")
+# Questions about fees, eligibility or comparisons need the agent even when an entity is named
+DISQUALIFIERS = re.compile(
+    r"\b(compare|comparison|vs|versus|difference|fee|fees|lounge|eligib\w*|salary|apply|limit|cap|caps|why|how does)\b"
+)
+
+SQL_TEMPLATES: Dict[str, str] = {
+    # Market-wide questions read the materialized card_reward_rankings table (one indexed lookup)
+    "merchant_best": """
+        SELECT card_master_id AS card_id, card_name, bank_name, reward_rate, reward_type,
+               reward_cap, reward_cap_period
+        FROM card_reward_rankings
+        WHERE dimension = 'merchant' AND name = :merchant
+        ORDER BY rank
+        LIMIT :limit
+    """,
+    "merchant_best_portfolio": """
+        SELECT cc.user_id, c.id AS card_id, c.card_name, c.bank_name, cmr.reward_rate, cmr.reward_type,
+               cmr.reward_cap, cmr.reward_cap_period
+        FROM credit_cards cc
+        JOIN card_master_data c ON c.id = cc.card_master_data_id
+        JOIN card_merchant_rewards cmr ON cmr.card_master_id = c.id
+        WHERE cc.user_id = :user_id AND cc.is_active = :active
+          AND LOWER(cmr.merchant_name) = :merchant AND cmr.is_active = :active
+        ORDER BY cmr.reward_rate DESC
+        LIMIT :limit
+    """,
+    "category_best": """
+        SELECT card_master_id AS card_id, card_name, bank_name, reward_rate, reward_type,
+               reward_cap, reward_cap_period
+        FROM card_reward_rankings
+        WHERE dimension = 'category' AND name = :category
+        ORDER BY rank
+        LIMIT :limit
+    """,
+    "category_best_portfolio": """
+        SELECT cc.user_id, c.id AS card_id, c.card_name, c.bank_name, csc.reward_rate, csc.reward_type,
+               csc.reward_cap, csc.reward_cap_period
+        FROM credit_cards cc
+        JOIN card_master_data c ON c.id = cc.card_master_data_id
+        JOIN card_spending_categories csc ON csc.card_master_id = c.id
+        WHERE cc.user_id = :user_id AND cc.is_active = :active
+          AND LOWER(csc.category_name) = :category AND csc.is_active = :active
+        ORDER BY csc.reward_rate DESC
+        LIMIT :limit
+    """,
+    "card_count": """
+        SELECT cc.user_id, cc.card_name, c.bank_name
+        FROM credit_cards cc
+        LEFT JOIN card_master_data c ON c.id = cc.card_master_data_id
+        WHERE cc.user_id = :user_id AND cc.is_active = :active
+        ORDER BY cc.id
+    """,
+}
+
+
+@dataclass
+class RouteMatch:
+    """A recognised intent with its bound SQL parameters"""
+    intent: str
+    params: Dict[str, Any]
+    confidence: float
+    entity: Optional[str] = None
+
+
+@dataclass
+class RoutedAnswer:
+    """Rows produced by a templated query, ready for response formatting"""
+    intent: str
+    sql_query: str
+    results: List[Dict[str, Any]]
+    explanation: str
+    response: Optional[str] = None
+
+
+@dataclass
+class RouteStats:
+    """Per-route hit and latency counters"""
+    hits: int = 0
+    empty: int = 0
+    errors: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    latencies_ms: List[float] = field(default_factory=list)
+
+
+def _find_entities(query_lower: str, names: List[str], aliases: Dict[str, str]) -> List[str]:
+    """Canonical names mentioned in the query, directly or through an alias"""
+    found = []
+    for name in names:
+        if re.search(rf"\b{re.escape(name)}\b", query_lower):
+            found.append(name)
+    for alias, canonical in aliases.items():
+        if canonical not in found and re.search(rf"\b{re.escape(alias)}\b", query_lower):
+            found.append(canonical)
+    return found
+
+
+class QueryRouter:
+    """Intent classifier and SQL template engine in front of the SQL agent"""
+
+    def __init__(self, sql_executor: AsyncSQLExecutor):
+        self.min_confidence = settings.QUERY_ROUTER_MIN_CONFIDENCE
+        self.sql_executor = sql_executor
+        self.total_queries = 0
+        self.fallbacks = 0
+        self.route_stats: Dict[str, RouteStats] = {}
+
+    def classify(self, query: str, user_id: Optional[int] = None) -> Optional[RouteMatch]:
+        """Return a confident route for the query, or None to fall back to the agent"""
+        query_lower = " ".join(query.lower().split())
+
+        if DISQUALIFIERS.search(query_lower):
+            return None
+
+        if CARD_COUNT_PATTERN.search(query_lower) and PORTFOLIO_PATTERN.search(query_lower):
+            if not user_id:
+                return None
+            return RouteMatch(intent="card_count", params={"user_id": user_id}, confidence=1.0)
+
+        merchants = _find_entities(query_lower, ORDERED_MERCHANTS, MERCHANT_ALIASES)
+        categories = _find_entities(query_lower, ORDERED_CATEGORIES, CATEGORY_ALIASES)
+        # A merchant also names its category ("swiggy food delivery"); the merchant is more specific
+        if len(merchants) == 1:
+            categories = []
+
+        if len(merchants) + len(categories) != 1:
+            return None
+
+        confidence = 0.6
+        if RECOMMENDATION_CUES.search(query_lower):
+            confidence += 0.3
+        if re.search(r"\bcards?\b", query_lower):
+            confidence += 0.1
+
+        if merchants:
+            intent, param_name, entity = "merchant_best", "merchant", merchants[0]
+        else:
+            intent, param_name, entity = "category_best", "category", categories[0]
+
+        params: Dict[str, Any] = {param_name: entity}
+        if user_id and PORTFOLIO_PATTERN.search(query_lower):
+            intent += "_portfolio"
+            params["user_id"] = user_id
+
+        match = RouteMatch(intent=intent, params=params, confidence=round(confidence, 2), entity=entity)
+        return match if match.confidence >= self.min_confidence else None
+
+    async def route(self, query: str, user_id: Optional[int] = None, max_results: int = 10) -> Optional[RoutedAnswer]:
+        """Answer the query from a SQL template when confident; None means run the agent"""
+        self.total_queries += 1
+        match = self.classify(query, user_id)
+        if not match:
+            self.fallbacks += 1
+            return None
+
+        stats = self.route_stats.setdefault(match.intent, RouteStats())
+        start_time = time.perf_counter()
+        sql_query = SQL_TEMPLATES[match.intent]
+
+        try:
+            params = {**match.params, "active": True, "limit": max_results}
+            rows = await self.sql_executor.execute(sql_query, params)
+        except Exception as e:
+            logger.error(f"Query router failed for intent {match.intent}: {e}")
+            stats.errors += 1
+            self.fallbacks += 1
+            return None
+        finally:
+            self._record_latency(stats, (time.perf_counter() - start_time) * 1000)
+
+        if not rows and match.intent != "card_count":
+            stats.empty += 1
+            self.fallbacks += 1
+            return None
+
+        stats.hits += 1
+        return RoutedAnswer(
+            intent=match.intent,
+            sql_query=" ".join(sql_query.split()),
+            results=rows,
+            explanation=self._explain(match),
+            response=self._format_card_count(rows) if match.intent == "card_count" else None
+        )
+
+    def _explain(self, match: RouteMatch) -> str:
+        """Short description of what the template answered"""
+        if match.intent == "card_count":
+            return "Counted the active cards in your portfolio."
+        dimension = "merchant" if match.intent.startswith("merchant") else "category"
+        scope = "your cards" if match.intent.endswith("_portfolio") else "cards in the market"
+        return f"Ranked {scope} by {dimension} reward rate for {match.entity}."
+
+    def _format_card_count(self, rows: List[Dict[str, Any]]) -> str:
+        """Portfolio count answer"""
+        if not rows:
+            return "You don't have any active cards in your portfolio yet."
+        cards = ", ".join(
+            f"{row['card_name']} ({row['bank_name']})" if row.get("bank_name") else row["card_name"]
+            for row in rows
+        )
+        noun = "card" if len(rows) == 1 else "cards"
+        return f"You have {len(rows)} active {noun} in your portfolio: {cards}"
+
+    def _record_latency(self, stats: RouteStats, latency_ms: float):
+        stats.total_latency_ms += latency_ms
+        stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+        stats.latencies_ms.append(latency_ms)
+        # Bounded sample for percentiles
+        if len(stats.latencies_ms) > 1000:
+            del stats.latencies_ms[:len(stats.latencies_ms) - 1000]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-route hit rates and latency"""
+        routes = {}
+        for intent, stats in self.route_stats.items():
+            attempts = stats.hits + stats.empty + stats.errors
+            samples = sorted(stats.latencies_ms)
+            routes[intent] = {
+                "hits": stats.hits,
+                "empty": stats.empty,
+                "errors": stats.errors,
+                "hit_rate": round(stats.hits / self.total_queries, 4) if self.total_queries else 0.0,
+                "avg_latency_ms": round(stats.total_latency_ms / attempts, 3) if attempts else 0.0,
+                "p95_latency_ms": round(samples[int(len(samples) * 0.95) - 1], 3) if samples else 0.0,
+                "max_latency_ms": round(stats.max_latency_ms, 3),
+            }
+
+        routed = sum(stats.hits for stats in self.route_stats.values())
+        return {
+            "total_queries": self.total_queries,
+            "routed": routed,
+            "fallbacks": self.fallbacks,
+            "fast_path_rate": round(routed / self.total_queries, 4) if self.total_queries else 0.0,
+            "routes": routes,
+        }
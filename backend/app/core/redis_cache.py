@@ -0,0 +1,270 @@
+"""
+Two-level cache for multi-worker deployments.
+Each worker keeps its in-process L1 (a CacheEngine namespace) in front of a shared L2 that speaks
+the Redis protocol. Values cross the wire as msgpack, L2 TTLs are carried back into L1 on a fill,
+and every write, delete or tag invalidation is published so the other workers drop their stale
+L1 copies. Tagged entries are also indexed in L2 sets so a tag can be invalidated across workers.
+Tag-set expiry uses PEXPIRE NX/GT (Redis 7+); older servers get a read-then-extend fallback.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+
+import msgpack
+
+from app.core.cache_engine import CacheEngine, Refresher
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Invalidation message kinds
+_KEY = "key"
+_TAGS = "tags"
+_CLEAR = "clear"
+
+
+def _encode(value: Any) -> Any:
+    """msgpack fallback for values SQL rows commonly carry"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def pack(value: Any) -> bytes:
+    return msgpack.packb(value, default=_encode, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+def create_redis_client():
+    """Async client for settings.REDIS_URL"""
+    import redis.asyncio as redis
+
+    return redis.from_url(settings.REDIS_URL)
+
+
+class TieredCache:
+    """L1 CacheEngine in front of a shared Redis L2, kept coherent over pub/sub"""
+
+    def __init__(self, namespace: str, l1: CacheEngine, client=None):
+        self.namespace = namespace
+        self.l1 = l1
+        self.client = client
+        self.channel = settings.CACHE_INVALIDATION_CHANNEL
+        self.origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        # Whether the server accepts PEXPIRE NX/GT; None until the first tagged write finds out
+        self.expire_options: Optional[bool] = None
+
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:tag:{tag}"
+
+    def _redis(self):
+        if self.client is None:
+            self.client = create_redis_client()
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return self.client
+
+    async def get(self, key: str) -> Optional[Any]:
+        """L1 first; on a miss read L2 and refill L1 with the remaining L2 TTL"""
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+
+        try:
+            async with self._redis().pipeline(transaction=False) as pipe:
+                data, ttl_ms = await pipe.get(self._key(key)).pttl(self._key(key)).execute()
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"L2 cache get error: {e}")
+            return None
+
+        if data is None:
+            self.l2_misses += 1
+            return None
+
+        self.l2_hits += 1
+        value, tags = unpack(data)
+        # PTTL is -1 for keys without expiry
+        self.l1.set(key, value, ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None, tags=tags)
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+        refresher: Optional[Refresher] = None,
+    ) -> bool:
+        """Write through to L2 with the same TTL and evict the key from other workers' L1"""
+        ttl = self.l1.default_ttl if ttl is None else ttl
+        tags = list(tags)
+        self.l1.set(key, value, ttl, tags=tags, refresher=refresher)
+        try:
+            client = self._redis()
+            ttl_ms = int(ttl * 1000) if ttl else None
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(self._key(key), pack([value, tags]), px=ttl_ms)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), key)
+                await pipe.execute()
+            if tags and ttl_ms:
+                await self._extend_tag_ttls(client, [self._tag_key(tag) for tag in tags], ttl_ms)
+            await self._publish(_KEY, key)
+            return True
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"L2 cache set error: {e}")
+            return False
+
+    async def _extend_tag_ttls(self, client, tag_keys: List[str], ttl_ms: int):
+        """Tag sets live as long as their longest-lived member: set an expiry if none, otherwise only lengthen it"""
+        if self.expire_options is not False:
+            from redis.exceptions import ResponseError
+
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for tag_key in tag_keys:
+                        pipe.pexpire(tag_key, ttl_ms, nx=True)
+                        pipe.pexpire(tag_key, ttl_ms, gt=True)
+                    await pipe.execute()
+                self.expire_options = True
+                return
+            except ResponseError as e:
+                if self.expire_options:
+                    raise
+                logger.warning(f"Redis rejected PEXPIRE NX/GT (Redis 7+), extending tag TTLs by read-then-write: {e}")
+                self.expire_options = False
+
+        # Not atomic: a concurrent writer can briefly shorten a tag set's TTL
+        async with client.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.pttl(tag_key)
+            remaining = await pipe.execute()
+        async with client.pipeline(transaction=False) as pipe:
+            for tag_key, left_ms in zip(tag_keys, remaining):
+                # PTTL is -1 without an expiry
+                if left_ms < ttl_ms:
+                    pipe.pexpire(tag_key, ttl_ms)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> bool:
+        deleted = self.l1.delete(key)
+        try:
+            client = self._redis()
+            deleted = bool(await client.delete(self._key(key))) or deleted
+            await self._publish(_KEY, key)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"L2 cache delete error: {e}")
+        return deleted
+
+    async def clear(self):
+        """Drop the namespace from L2 and from every worker's L1"""
+        self.l1.clear()
+        try:
+            client = self._redis()
+            keys: List[bytes] = [key async for key in client.scan_iter(match=self._key("*"))]
+            if keys:
+                await client.delete(*keys)
+            await self._publish(_CLEAR, None)
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"L2 cache clear error: {e}")
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of the tags, in L2 and in every worker's L1"""
+        tags = list(tags)
+        invalidated = self.l1.invalidate_tags(tags)
+        try:
+            client = self._redis()
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            async with client.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = await pipe.execute()
+            keys = {
+                self._key(member.decode() if isinstance(member, bytes) else member)
+                for group in members
+                for member in group
+            }
+            if keys or tag_keys:
+                await client.delete(*keys, *tag_keys)
+            await self._publish(_TAGS, tags)
+            return max(invalidated, len(keys))
+        except Exception as e:
+            self.l2_errors += 1
+            logger.error(f"L2 cache tag invalidation error: {e}")
+            return invalidated
+
+    async def _publish(self, kind: str, payload: Any):
+        await self.client.publish(self.channel, pack([self.origin, self.namespace, kind, payload]))
+
+    async def _listen(self):
+        """Apply invalidations published by other workers to this worker's L1"""
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    origin, namespace, kind, payload = unpack(message["data"])
+                except Exception as e:
+                    logger.warning(f"Ignoring malformed cache invalidation: {e}")
+                    continue
+                if origin == self.origin or namespace != self.namespace:
+                    continue
+                if kind == _KEY:
+                    self.l1.delete(payload)
+                elif kind == _TAGS:
+                    self.l1.invalidate_tags(payload)
+                elif kind == _CLEAR:
+                    self.l1.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache invalidation listener stopped: {e}")
+        finally:
+            try:
+                await pubsub.unsubscribe(self.channel)
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    def get_stats(self):
+        return {
+            **self.l1.get_stats(),
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "l2_errors": self.l2_errors,
+            "invalidation_listener": bool(self._listener and not self._listener.done()),
+        }
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
@@ -0,0 +1,148 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one in-flight computation instead of each
+starting their own, so a popular question that just missed the cache runs the agent once.
+The shared computation is shielded from any single caller's cancellation and is only cancelled
+once every caller waiting on it has gone away. Each caller can bound its wait with a timeout.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys onto one computation"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._sync_calls: Dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Await the in-flight computation for key, starting it if there is none"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            call.waiters -= 1
+            # Nobody is left to consume the result; later callers start afresh
+            if call.waiters == 0 and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
+
+    def do_sync(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Thread-based variant for sync code such as FastAPI's threadpool endpoints"""
+        with self._lock:
+            future = self._sync_calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._sync_calls[key] = future
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._sync_calls.pop(key, None)
+            return future.result()
+
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls) + len(self._sync_calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+        }
+
+
+# Every decorated function's group, by name, for stats
+flight_groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight(
+    key: Optional[Callable[..., Optional[Hashable]]] = None,
+    timeout: Optional[float] = None,
+    name: Optional[str] = None,
+):
+    """
+    Decorate an async or sync function so concurrent calls with the same key share one run.
+    key receives the call's arguments and returns a hashable key, or None to bypass coalescing.
+    """
+    def decorator(func):
+        group = flight_groups.setdefault(name or func.__qualname__, SingleFlight(name or func.__qualname__))
+
+        def make_key(args, kwargs) -> Optional[Hashable]:
+            if key is not None:
+                return key(*args, **kwargs)
+            return (args, tuple(sorted(kwargs.items())))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                call_key = make_key(args, kwargs)
+                if call_key is None:
+                    return await func(*args, **kwargs)
+                return await group.do(call_key, lambda: func(*args, **kwargs), timeout)
+
+            async_wrapper.flight = group
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            call_key = make_key(args, kwargs)
+            if call_key is None:
+                return func(*args, **kwargs)
+            return group.do_sync(call_key, lambda: func(*args, **kwargs), timeout)
+
+        sync_wrapper.flight = group
+        return sync_wrapper
+
+    return decorator
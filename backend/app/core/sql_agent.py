@@ -1,7 +1,9 @@
 import asyncio
+import functools
 import logging
+import re
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 from langchain_community.agent_toolkits import SQLDatabaseToolkit, create_sql_agent
@@ -9,15 +11,60 @@ from langchain_community.utilities import SQLDatabase
 from langchain_community.vectorstores import Chroma
 from langchain_openai import ChatOpenAI
 from langchain_openai import OpenAIEmbeddings
+from langchain_core.callbacks import AsyncCallbackHandler
 from langchain_core.messages import BaseMessage
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.agent_tools import lookup_best_cards
+from app.core.catalog_events import CatalogChange, answer_tags, catalog_event_bus
 from app.core.config import settings
+from app.core.query_router import QueryRouter
+from app.core.single_flight import single_flight
+from app.core.sql_executor import AsyncSQLExecutor
+from app.core.tracing import TracingCallbackHandler, span, start_trace
 from app.services.vector_service import VectorService
 from app.services.cache_service import CacheService
+from app.services.semantic_cache_service import SemanticCacheService, GLOBAL_SCOPE, user_scope
 
 logger = logging.getLogger(__name__)
 
+# Stage event callback used by the streaming endpoint: await emit(event_name, data)
+EmitCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+TokenCallback = Callable[[str], Awaitable[None]]
+
+
+async def _emit(emit: Optional[EmitCallback], event: str, data: Dict[str, Any]):
+    """Send a stage event when the caller is streaming"""
+    if emit:
+        await emit(event, data)
+
+
+class _StageCallbackHandler(AsyncCallbackHandler):
+    """Surfaces each SQL statement the agent runs as a sql_generated stage event"""
+
+    def __init__(self, emit: EmitCallback, include_sql: bool):
+        self.emit = emit
+        self.include_sql = include_sql
+
+    async def on_agent_action(self, action, **kwargs):
+        if action.tool != "sql_db_query":
+            return
+        tool_input = action.tool_input
+        sql_query = tool_input.get("query", "") if isinstance(tool_input, dict) else str(tool_input)
+        await self.emit("sql_generated", {"sql_query": sql_query if self.include_sql else None})
+
+
+def _coalesce_key(
+    self, query, user_id, context, include_sql, include_explanation, max_results, emit, on_token, bypass_cache=False
+):
+    """Identical non-streaming requests share one pipeline run; streaming ones report their own stages"""
+    if emit or on_token:
+        return None
+    return (
+        self._generate_cache_key(query, user_id, context),
+        include_sql, include_explanation, max_results, bypass_cache
+    )
+
 
 class SQLAgentService:
     """Main SQL Agent service using LangChain with MCP integration"""
@@ -28,6 +75,9 @@ class SQLAgentService:
         self.target_db = None  # Target business database
         self.vector_service = None
         self.cache_service = None
+        self.semantic_cache = None
+        self.query_router = None
+        self.sql_executor = None
         self.memory = None
         self.logger = logging.getLogger(__name__)
 
@@ -36,7 +86,10 @@ class SQLAgentService:
         try:
             # Initialize services
             self.vector_service = VectorService()
-            self.cache_service = CacheService()
+            self.cache_service = CacheService(namespace="sql_agent")
+            self.semantic_cache = SemanticCacheService(self.vector_service)
+            self.sql_executor = AsyncSQLExecutor()
+            self.query_router = QueryRouter(self.sql_executor) if settings.QUERY_ROUTER_ENABLED else None
             
             # Load tuning data into vector database
             await self.vector_service.load_tuning_data()
@@ -73,9 +126,14 @@ class SQLAgentService:
                 llm=llm,
                 toolkit=self.toolkit,
                 agent_type="zero-shot-react-description",
-                verbose=True
+                verbose=True,
+                extra_tools=[lookup_best_cards],
+                agent_executor_kwargs={"return_intermediate_steps": True}
             )
 
+            # Drop cached answers built from catalog rows that have since changed
+            catalog_event_bus.subscribe(self._on_catalog_change)
+
             self.logger.info("SQL Agent Service initialized successfully")
             
         except Exception as e:
@@ -89,37 +147,149 @@ class SQLAgentService:
         context: Optional[Dict[str, Any]] = None,
         include_sql: bool = False,
         include_explanation: bool = True,
-        max_results: int = 10
+        max_results: int = 10,
+        emit: Optional[EmitCallback] = None,
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a natural language query using the SQL agent.
+        emit receives stage events and on_token receives answer tokens produced by an LLM;
+        both are only set by stream_query.
+        """
+        with start_trace("process_query", user_id=user_id) as trace:
+            # Coalesced callers share one result dict; copy before adding per-request fields
+            result = dict(await self._process_query(
+                query, user_id, context, include_sql, include_explanation, max_results, emit, on_token
+            ))
+            if trace:
+                trace.root.set(source=result.get("source"))
+                result["trace_id"] = trace.trace_id
+        return result
+    
+    @single_flight(key=_coalesce_key, timeout=settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
+    async def _process_query(
+        self,
+        query: str,
+        user_id: Optional[int],
+        context: Optional[Dict[str, Any]],
+        include_sql: bool,
+        include_explanation: bool,
+        max_results: int,
+        emit: Optional[EmitCallback],
+        on_token: Optional[TokenCallback],
+        bypass_cache: bool = False
     ) -> Dict[str, Any]:
-        """Process a natural language query using the SQL agent"""
+        """Cache, fast path, semantic cache, then the full agent pipeline"""
         
         start_time = time.time()
         
         try:
+            # Cached answers are shared by every caller of the query, so they hold the canonical answer:
+            # no SQL in the text and rows up to a fixed cap. include_sql/max_results apply when serving.
+            fetch_limit = max(max_results, settings.ANSWER_CACHE_MAX_RESULTS)
+            # Refresh-ahead recomputes skip both answer caches, as do requests for more rows than they keep
+            bypass_cache = bypass_cache or max_results > settings.ANSWER_CACHE_MAX_RESULTS
+            
             # Check cache first
             cache_key = self._generate_cache_key(query, user_id, context)
-            cached_response = await self.cache_service.get(cache_key)
+            refresher = functools.partial(self._refresh_answer, query, user_id, context)
+            cached_response = None
+            if not bypass_cache:
+                with span("cache_lookup") as stage:
+                    cached_response = await self.cache_service.get(cache_key)
+                    if stage:
+                        stage.set(hit=bool(cached_response))
             if cached_response:
-                return {
-                    **cached_response,
-                    "processing_time": time.time() - start_time,
-                    "source": "cache"
-                }
+                await _emit(emit, "cache_hit", {"source": "cache"})
+                return self._build_cached_result(
+                    cached_response, "cache", start_time,
+                    include_sql, include_explanation, max_results
+                )
+            
+            # Fast path: templated intents are answered straight from the catalog tables
+            if self.query_router:
+                with span("query_router") as stage:
+                    routed = await self.query_router.route(query, user_id, fetch_limit)
+                    if stage:
+                        stage.set(intent=routed.intent if routed else None, rows=len(routed.results) if routed else 0)
+                if routed:
+                    await _emit(emit, "fast_path", {"intent": routed.intent})
+                    await _emit(emit, "rows_returned", {"count": len(routed.results)})
+                    with span("format_response"):
+                        response = routed.response or await self._format_response(
+                            query, routed.sql_query, routed.results, routed.explanation,
+                            include_explanation, fetch_limit
+                        )
+                    cached_payload = {
+                        "response": response,
+                        "sql_query": routed.sql_query,
+                        "results": routed.results[:fetch_limit],
+                        "explanation": routed.explanation,
+                        "confidence": 1.0
+                    }
+                    await self.cache_service.set(
+                        cache_key, cached_payload, ttl=settings.CACHE_TTL,
+                        tags=answer_tags(query, routed.results), refresher=refresher
+                    )
+                    return {
+                        **self._build_cached_result(
+                            cached_payload, "fast_path", start_time,
+                            include_sql, include_explanation, max_results
+                        ),
+                        "metadata": {"intent": routed.intent, "user_id": user_id}
+                    }
+            
+            # Semantic cache: paraphrases of an earlier question reuse its answer.
+            # Caller-supplied context changes the answer, so those queries skip it.
+            query_embedding = None
+            if self.semantic_cache.enabled and not context:
+                with span("embed_query"):
+                    try:
+                        query_embedding = await self.vector_service.embed_query(query)
+                    except Exception as e:
+                        logger.warning(f"Failed to embed query for semantic cache: {e}")
+            if query_embedding is not None and not bypass_cache:
+                with span("semantic_cache") as stage:
+                    cached_response = await self.semantic_cache.lookup(query, query_embedding, user_id)
+                    if stage:
+                        stage.set(hit=bool(cached_response))
+                if cached_response:
+                    await _emit(emit, "cache_hit", {"source": "semantic_cache"})
+                    await self.cache_service.set(
+                        cache_key, cached_response, ttl=settings.CACHE_TTL,
+                        tags=answer_tags(query, cached_response.get("results")), refresher=refresher
+                    )
+                    return self._build_cached_result(
+                        cached_response, "semantic_cache", start_time,
+                        include_sql, include_explanation, max_results
+                    )
             
-            # Search vector database for relevant context
-            vector_context = await self._get_vector_context(query, user_id)
+            # Vector context, tuning examples and the user's cards are fetched concurrently
+            with span("retrieval"):
+                retrieved = await self._retrieve_context(query, user_id, context, query_embedding)
+            vector_context = retrieved["vector_context"]
+            await _emit(emit, "vector_context", {"documents": len(vector_context)})
             
             # Enhance query with context
+            if retrieved["user_cards"]:
+                context = {**(context or {}), "user_cards": retrieved["user_cards"]}
             enhanced_query = self._enhance_query_with_context(query, vector_context, context)
             
             # Generate SQL and execute query
-            sql_query, results, explanation = await self._execute_sql_query(enhanced_query, user_id)
-            
-            # Format response
-            response = await self._format_response(
-                query, sql_query, results, explanation, 
-                include_sql, include_explanation, max_results
+            callbacks = [_StageCallbackHandler(emit, include_sql)] if emit else None
+            sql_query, results, explanation = await self._execute_sql_query(
+                enhanced_query, user_id, fetch_limit, callbacks, retrieved["tuning_examples"]
             )
+            await _emit(emit, "rows_returned", {"count": len(results)})
+            
+            # Format response. Without rows or documents _validate_response replaces the answer,
+            # so only stream LLM tokens that will survive validation.
+            with span("format_response"):
+                response = await self._format_response(
+                    query, sql_query, results, explanation,
+                    include_explanation, fetch_limit,
+                    on_token=on_token if vector_context else None
+                )
             
             # Validate response is based on actual data
             response = await self._validate_response(response, results, vector_context)
@@ -128,16 +298,29 @@ class SQLAgentService:
             confidence = self._calculate_confidence(results, vector_context)
             
             # Cache response
-            await self.cache_service.set(cache_key, response, ttl=settings.CACHE_TTL)
+            cached_payload = {
+                "response": response,
+                "sql_query": sql_query,
+                "results": results[:fetch_limit] if results else None,
+                "explanation": explanation,
+                "confidence": confidence
+            }
+            tags = answer_tags(query, results)
+            await self.cache_service.set(
+                cache_key, cached_payload, ttl=settings.CACHE_TTL, tags=tags, refresher=refresher
+            )
+            if query_embedding is not None:
+                await self.semantic_cache.store(
+                    query, query_embedding, cached_payload,
+                    scope=self._semantic_cache_scope(query, sql_query, results, user_id),
+                    tags=tags
+                )
             
             return {
-                "response": response,
-                "sql_query": sql_query if include_sql else None,
-                "results": results[:max_results] if results else None,
-                "explanation": explanation if include_explanation else None,
-                "confidence": confidence,
-                "processing_time": time.time() - start_time,
-                "source": "sql_agent",
+                **self._build_cached_result(
+                    cached_payload, "sql_agent", start_time,
+                    include_sql, include_explanation, max_results
+                ),
                 "metadata": {
                     "vector_context_used": len(vector_context) > 0,
                     "user_id": user_id,
@@ -147,6 +330,7 @@ class SQLAgentService:
             
         except Exception as e:
             logger.error(f"Error processing query: {e}")
+            await _emit(emit, "error", {"error": str(e)})
             return {
                 "response": "I apologize, but I'm having trouble processing your request. Please try rephrasing your question.",
                 "sql_query": None,
@@ -158,14 +342,211 @@ class SQLAgentService:
                 "metadata": {"error": str(e)}
             }
     
-    async def _get_vector_context(self, query: str, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    async def stream_query(
+        self,
+        query: str,
+        user_id: Optional[int] = None,
+        context: Optional[Dict[str, Any]] = None,
+        include_sql: bool = False,
+        include_explanation: bool = True,
+        max_results: int = 10
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run process_query while yielding (event, data) pairs as stages complete:
+        stage events, then the answer as token events, then a final done event with the full result.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        streamed_tokens: List[str] = []
+        
+        async def emit(event: str, data: Dict[str, Any]):
+            await queue.put((event, data))
+        
+        async def on_token(token: str):
+            streamed_tokens.append(token)
+            await queue.put(("token", {"text": token}))
+        
+        async def run():
+            try:
+                result = await self.process_query(
+                    query, user_id, context, include_sql, include_explanation, max_results,
+                    emit=emit, on_token=on_token
+                )
+                await queue.put(("done", result))
+            finally:
+                await queue.put(None)
+        
+        task = asyncio.create_task(run())
+        try:
+            yield "started", {"query": query}
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                event, data = item
+                if event == "done":
+                    # Stream whatever part of the final answer was not produced token by token
+                    response = data.get("response") or ""
+                    streamed = "".join(streamed_tokens)
+                    if streamed and not response.startswith(streamed):
+                        yield "reset", {}
+                        streamed = ""
+                    for chunk in re.findall(r"\s*\S+", response[len(streamed):]):
+                        yield "token", {"text": chunk}
+                yield event, data
+        finally:
+            # Client went away: stop the agent run instead of letting it finish unobserved
+            if not task.done():
+                task.cancel()
+    
+    def _build_cached_result(
+        self,
+        cached_response: Dict[str, Any],
+        source: str,
+        start_time: float,
+        include_sql: bool,
+        include_explanation: bool,
+        max_results: int
+    ) -> Dict[str, Any]:
+        """Serve a canonical answer with this caller's include_sql and max_results applied"""
+        response = cached_response.get("response", "")
+        sql_query = cached_response.get("sql_query")
+        results = cached_response.get("results")
+        if include_sql and sql_query and results:
+            response += f"\n\nGenerated SQL: {sql_query}"
+        return {
+            "response": response,
+            "sql_query": sql_query if include_sql else None,
+            "results": results[:max_results] if results else None,
+            "explanation": cached_response.get("explanation") if include_explanation else None,
+            "confidence": cached_response.get("confidence", 0.0),
+            "processing_time": time.time() - start_time,
+            "source": source
+        }
+    
+    async def _refresh_answer(
+        self,
+        query: str,
+        user_id: Optional[int],
+        context: Optional[Dict[str, Any]]
+    ):
+        """Recompute a hot cached answer ahead of its expiry; the pipeline stores the fresh answer"""
+        await self._process_query(
+            query, user_id, context, False, True, settings.ANSWER_CACHE_MAX_RESULTS, None, None, bypass_cache=True
+        )
+
+    async def _on_catalog_change(self, change: CatalogChange):
+        """Invalidate the exact and semantic answer caches for a committed catalog change"""
+        tags = change.tags()
+        invalidated = await self.cache_service.invalidate_tags(tags)
+        await self.semantic_cache.invalidate_tags(tags)
+        logger.info(f"Catalog change invalidated {invalidated} cached answers ({len(tags)} tags)")
+
+    def _semantic_cache_scope(
+        self,
+        query: str,
+        sql_query: str,
+        results: List[Dict[str, Any]],
+        user_id: Optional[int]
+    ) -> str:
+        """Portfolio answers are only ever served back to the same user"""
+        if not user_id:
+            return GLOBAL_SCOPE
+        
+        query_type = self._classify_query_type(query, sql_query)
+        user_cards, _ = self._categorize_results(results or [], sql_query, query_type)
+        if query_type == "portfolio" or user_cards:
+            return user_scope(user_id)
+        return GLOBAL_SCOPE
+    
+    async def _retrieve_context(
+        self,
+        query: str,
+        user_id: Optional[int],
+        context: Optional[Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fan out the independent retrieval sources under one shared deadline.
+        The query is embedded once and reused for both Chroma collections; a source that
+        misses the deadline or fails contributes an empty list instead of holding up the agent.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.RETRIEVAL_DEADLINE_SECONDS
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        # The portfolio lookup does not need the embedding, so it starts first
+        if user_id and not (context and context.get("user_cards")):
+            tasks["user_cards"] = asyncio.create_task(self._traced("user_cards", self._get_user_cards(user_id)))
+        
+        if query_embedding is None:
+            try:
+                with span("embed_query"):
+                    query_embedding = await asyncio.wait_for(
+                        self.vector_service.embed_query(query), timeout=max(deadline - loop.time(), 0)
+                    )
+            except Exception as e:
+                # Each collection query retries the embedding through the shared memo
+                logger.warning(f"Failed to embed query for retrieval: {e}")
+        
+        tasks["vector_context"] = asyncio.create_task(
+            self._traced("vector_context", self._get_vector_context(query, user_id, query_embedding))
+        )
+        tasks["tuning_examples"] = asyncio.create_task(
+            self._traced("tuning_examples", self.vector_service.get_tuning_examples(query, limit=2, query_embedding=query_embedding))
+        )
+        
+        done, pending = await asyncio.wait(tasks.values(), timeout=max(deadline - loop.time(), 0))
+        for task in pending:
+            task.cancel()
+        
+        retrieved = {"vector_context": [], "tuning_examples": [], "user_cards": []}
+        for name, task in tasks.items():
+            if task in done and task.exception() is None:
+                retrieved[name] = task.result()
+            elif task in done:
+                logger.warning(f"Retrieval source '{name}' failed: {task.exception()}")
+            else:
+                logger.warning(f"Retrieval source '{name}' missed the {settings.RETRIEVAL_DEADLINE_SECONDS}s deadline")
+        return retrieved
+    
+    async def _traced(self, name: str, coro: Awaitable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Await a retrieval source inside its own span, recording how many items it returned"""
+        with span(name) as stage:
+            items = await coro
+            if stage:
+                stage.set(items=len(items))
+            return items
+    
+    async def _get_user_cards(self, user_id: int) -> List[Dict[str, Any]]:
+        """Active cards in the user's portfolio, for the agent prompt"""
+        try:
+            return await self.sql_executor.execute(
+                """
+                SELECT cc.card_name, COALESCE(c.bank_name, 'Unknown') AS bank_name
+                FROM credit_cards cc
+                LEFT JOIN card_master_data c ON c.id = cc.card_master_data_id
+                WHERE cc.user_id = :user_id AND cc.is_active = :active
+                """,
+                {"user_id": user_id, "active": True}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load user cards: {e}")
+            return []
+    
+    async def _get_vector_context(
+        self,
+        query: str,
+        user_id: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
         """Get relevant context from vector database"""
         try:
             # Search for relevant documents
             results = await self.vector_service.search(
                 query=query,
                 user_id=user_id,
-                limit=5
+                limit=5,
+                query_embedding=query_embedding
             )
             
             return results
@@ -204,12 +585,23 @@ class SQLAgentService:
         
         return " ".join(enhanced_parts)
     
-    async def _execute_sql_query(self, query: str, user_id: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]], str]:
+    async def _execute_sql_query(
+        self,
+        query: str,
+        user_id: Optional[int] = None,
+        max_results: int = 10,
+        callbacks: Optional[List[AsyncCallbackHandler]] = None,
+        tuning_examples: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[str, List[Dict[str, Any]], str]:
         """Execute SQL query using LangChain agent"""
         
         try:
-            # Get relevant tuning examples
-            tuning_examples = await self.vector_service.get_tuning_examples(query, limit=2)
+            # Get relevant tuning examples unless the retrieval fan-out already did
+            if tuning_examples is None:
+                with span("tuning_examples") as stage:
+                    tuning_examples = await self.vector_service.get_tuning_examples(query, limit=2)
+                    if stage:
+                        stage.set(examples=len(tuning_examples))
             
             # Build examples context
             examples_context = ""
@@ -263,7 +655,14 @@ class SQLAgentService:
             """
             
             # Use LangChain agent to generate and execute SQL
-            result = await self.agent.ainvoke({"input": enhanced_prompt})
+            with span("agent") as stage:
+                callbacks = list(callbacks or [])
+                if stage:
+                    callbacks.append(TracingCallbackHandler(stage))
+                result = await self.agent.ainvoke(
+                    {"input": enhanced_prompt},
+                    config={"callbacks": callbacks} if callbacks else None
+                )
             
             # Extract SQL query and results
             explanation = result.get("output", "")
@@ -272,22 +671,25 @@ class SQLAgentService:
             sql_query = ""
             results = []
             
+            # Steps are (AgentAction, observation) pairs; the last sql_db_query call is the final query
             intermediate_steps = result.get("intermediate_steps", [])
-            if intermediate_steps:
-                for step in intermediate_steps:
-                    if isinstance(step, tuple) and len(step) >= 2:
-                        action, action_input = step[0], step[1]
-                        if action and hasattr(action, 'name') and action.name == 'sql_db_query':
-                            sql_query = action_input
-                            break
-                    elif isinstance(step, dict):
-                        if step.get('tool') == 'sql_db_query':
-                            sql_query = step.get('tool_input', '')
-                            break
+            for step in intermediate_steps:
+                tool_input = None
+                if isinstance(step, tuple) and len(step) >= 2:
+                    action = step[0]
+                    if getattr(action, 'tool', None) == 'sql_db_query':
+                        tool_input = action.tool_input
+                elif isinstance(step, dict) and step.get('tool') == 'sql_db_query':
+                    tool_input = step.get('tool_input', '')
+                if tool_input:
+                    sql_query = tool_input.get('query', '') if isinstance(tool_input, dict) else str(tool_input)
             
             # Execute SQL to get actual results
             if sql_query:
-                results = await self._execute_raw_sql(sql_query)
+                with span("raw_sql") as stage:
+                    results = await self._execute_raw_sql(sql_query, max_results)
+                    if stage:
+                        stage.set(rows=len(results))
             else:
                 # If no SQL query found, try to extract results from the explanation
                 # This handles cases where the agent provides the answer directly
@@ -304,32 +706,14 @@ class SQLAgentService:
             logger.error(f"Error executing SQL query: {e}")
             return "", [], f"Error: {str(e)}"
     
-    async def _execute_raw_sql(self, sql_query: str) -> List[Dict[str, Any]]:
-        """Execute raw SQL query and return results"""
+    async def _execute_raw_sql(self, sql_query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+        """Execute agent SQL on the async pool and return typed rows as dicts"""
         try:
-            # Use the database toolkit to execute SQL
-            result = self.toolkit.db.run(sql_query)
-            
-            # Parse results properly
-            if result:
-                # If result is a string, try to parse it as JSON or return as is
-                if isinstance(result, str):
-                    try:
-                        import json
-                        parsed_result = json.loads(result)
-                        if isinstance(parsed_result, list):
-                            return parsed_result
-                        else:
-                            return [{"result": parsed_result}]
-                    except json.JSONDecodeError:
-                        return [{"result": result}]
-                elif isinstance(result, list):
-                    return result
-                else:
-                    return [{"result": result}]
-            else:
-                return []
+            return await self.sql_executor.execute(sql_query, max_rows=max_results)
             
+        except asyncio.TimeoutError:
+            logger.error(f"Raw SQL timed out after {settings.SQL_AGENT_TIMEOUT}s: {sql_query}")
+            return []
         except Exception as e:
             logger.error(f"Error executing raw SQL: {e}")
             return []
@@ -354,17 +738,17 @@ class SQLAgentService:
         sql_query: str,
         results: List[Dict[str, Any]],
         explanation: str,
-        include_sql: bool,
         include_explanation: bool,
-        max_results: int
+        max_results: int,
+        on_token: Optional[TokenCallback] = None
     ) -> str:
-        """Format the response in structured, user-friendly format"""
+        """Format the response in structured, user-friendly format; the generated SQL is added when serving"""
         
         # Handle edge cases first
         if not results:
             # Try web search as fallback
             try:
-                web_search_result = await self._perform_web_search(original_query)
+                web_search_result = await self._perform_web_search(original_query, on_token)
                 if web_search_result:
                     return web_search_result
             except Exception as e:
@@ -382,7 +766,7 @@ class SQLAgentService:
         
         # If explanation is in results, use structured formatting
         if explanation_in_results:
-            return self._format_structured_response(original_query, sql_query, results, max_results, include_sql)
+            return self._format_structured_response(original_query, sql_query, results, max_results)
         
         # Classify query type and categorize results
         query_type = self._classify_query_type(original_query, sql_query)
@@ -405,10 +789,6 @@ class SQLAgentService:
                 benefit = self._format_card_benefit(card)
                 response_parts.append(f"   a. {benefit}")
         
-        # Add SQL query if requested
-        if include_sql and sql_query:
-            response_parts.append(f"\nGenerated SQL: {sql_query}")
-        
         return "\n".join(response_parts) if response_parts else "I couldn't find any relevant information."
     
     def _format_single_result(self, result: Dict[str, Any]) -> str:
@@ -509,7 +889,7 @@ class SQLAgentService:
         # Create benefit description
         return f"{card_name} from {bank_name} is an excellent choice for your spends, thanks to: {reward_text}"
     
-    def _format_structured_response(self, query: str, sql_query: str, results: List[Dict[str, Any]], max_results: int, include_sql: bool) -> str:
+    def _format_structured_response(self, query: str, sql_query: str, results: List[Dict[str, Any]], max_results: int) -> str:
         """Format structured response when explanation is in results"""
         if not results:
             return "I couldn't find any relevant information."
@@ -544,20 +924,10 @@ class SQLAgentService:
                         benefit = self._format_card_benefit_simple(card)
                         response_parts.append(f"   a. {benefit}")
                 
-                # Add SQL query if requested
-                if include_sql and sql_query:
-                    response_parts.append(f"\nGenerated SQL: {sql_query}")
-                
                 return "\n".join(response_parts) if response_parts else "I couldn't find any relevant information."
         
         # Fallback to cleaned response for non-card queries or if parsing fails
-        cleaned_response = self._clean_response_text(result_content)
-        
-        # Add SQL query if requested
-        if include_sql and sql_query:
-            cleaned_response += f"\n\nGenerated SQL: {sql_query}"
-        
-        return cleaned_response
+        return self._clean_response_text(result_content)
     
     def _clean_response_text(self, text: str) -> str:
         """Clean and format response text for better readability"""
@@ -578,7 +948,7 @@ class SQLAgentService:
         
         return text.strip()
     
-    async def _perform_web_search(self, query: str) -> Optional[str]:
+    async def _perform_web_search(self, query: str, on_token: Optional[TokenCallback] = None) -> Optional[str]:
         """Perform web search as fallback when database can't answer"""
         try:
             # Use OpenAI's web search capabilities
@@ -617,9 +987,19 @@ class SQLAgentService:
             Source: [Website URL]
             """
             
-            # Get search results
-            response = await llm.ainvoke([HumanMessage(content=search_prompt)])
-            search_result = response.content
+            # Get search results, forwarding tokens as they arrive when streaming
+            with span("web_search") as stage:
+                callbacks = [TracingCallbackHandler(stage)] if stage else None
+                if on_token:
+                    chunks = []
+                    async for chunk in llm.astream([HumanMessage(content=search_prompt)], config={"callbacks": callbacks}):
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            await on_token(chunk.content)
+                    search_result = "".join(chunks)
+                else:
+                    response = await llm.ainvoke([HumanMessage(content=search_prompt)], config={"callbacks": callbacks})
+                    search_result = response.content
             
             # Add disclaimer and format
             if search_result and len(search_result.strip()) > 50:
@@ -0,0 +1,164 @@
+"""
+Async execution layer for SQL generated by the SQL agent.
+Runs read-only statements on a pooled async connection to the target database (made read-only
+at the session level where the dialect supports it), enforces SQL_AGENT_TIMEOUT and streams typed
+rows back as dicts.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+READ_ONLY_STATEMENT = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# Keywords that write or change session state; checked outside literals, identifiers and comments
+WRITE_KEYWORD = re.compile(
+    r"\b(insert|update|delete|merge|upsert|into|create|drop|alter|truncate|attach|detach|pragma|vacuum|"
+    r"reindex|grant|revoke|copy|call|exec|execute|set|lock)\b",
+    re.IGNORECASE
+)
+
+
+def _code_only(sql_query: str) -> str:
+    """
+    The statement with string literals and quoted identifiers masked with '#' and comments with spaces,
+    same length as the input, so keyword and separator checks never look inside them.
+    """
+    code = []
+    i, length = 0, len(sql_query)
+    while i < length:
+        char = sql_query[i]
+        if char in "'\"`":
+            # Quoted literal or identifier; a doubled quote escapes itself
+            end = i + 1
+            while end < length:
+                if sql_query[end] == char:
+                    if end + 1 < length and sql_query[end + 1] == char:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            if end >= length:
+                raise ValueError("Unterminated quoted string in SQL")
+            code.append("#" * (end + 1 - i))
+            i = end + 1
+        elif sql_query.startswith("--", i):
+            end = sql_query.find("\n", i)
+            end = length if end == -1 else end
+            code.append(" " * (end - i))
+            i = end
+        elif sql_query.startswith("/*", i):
+            end = sql_query.find("*/", i + 2)
+            if end == -1:
+                raise ValueError("Unterminated comment in SQL")
+            code.append(" " * (end + 2 - i))
+            i = end + 2
+        else:
+            code.append(char)
+            i += 1
+    return "".join(code)
+
+
+def _normalize_statement(sql_query: str) -> str:
+    """
+    Drop a trailing semicolon, rejecting anything but a single read-only statement.
+    The checks run on the literal-free form; the original text is what gets executed.
+    """
+    code = _code_only(sql_query)
+    # Trailing semicolons, whitespace and comments; positions line up with the original text
+    end = len(code.rstrip(" \t\r\n;"))
+    code, statement = code[:end], sql_query[:end].strip()
+    if not READ_ONLY_STATEMENT.match(code):
+        raise ValueError("Only SELECT statements can be executed by the SQL agent")
+    if ";" in code:
+        raise ValueError("Only a single SQL statement can be executed at a time")
+    match = WRITE_KEYWORD.search(code)
+    if match:
+        raise ValueError(f"Read-only statements cannot use {match.group(1).upper()}")
+    return statement
+
+
+# Per-connection read-only switch by dialect, so writes fail in the database even if a statement slips through
+READ_ONLY_SESSION = {
+    "sqlite": "PRAGMA query_only = ON",
+    "postgresql": "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY",
+    "mysql": "SET SESSION TRANSACTION READ ONLY",
+}
+
+
+def _make_read_only(engine):
+    statement = READ_ONLY_SESSION.get(engine.dialect.name)
+    if statement is None:
+        logger.warning(f"SQL agent connections to {engine.dialect.name} are not read-only at the database level")
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+class AsyncSQLExecutor:
+    """Pooled async executor for agent and template SQL"""
+
+    def __init__(self, database_url: Optional[str] = None, timeout: Optional[float] = None):
+        database_url = database_url or settings.TARGET_ASYNC_DATABASE_URL or settings.ASYNC_DATABASE_URL
+        engine_kwargs: Dict[str, Any] = {"pool_pre_ping": True, "pool_recycle": 300}
+        if not database_url.startswith("sqlite"):
+            engine_kwargs.update(
+                pool_size=settings.SQL_AGENT_POOL_SIZE,
+                max_overflow=settings.SQL_AGENT_POOL_MAX_OVERFLOW,
+            )
+
+        self.engine = create_async_engine(database_url, **engine_kwargs)
+        _make_read_only(self.engine)
+        self.timeout = timeout or settings.SQL_AGENT_TIMEOUT
+
+    async def stream(
+        self,
+        sql_query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield result rows as dicts without buffering the whole result set"""
+        statement = _normalize_statement(sql_query)
+
+        async with self.engine.connect() as conn:
+            result = await conn.stream(text(statement), params or {})
+            try:
+                row_count = 0
+                async for row in result:
+                    yield dict(row._mapping)
+                    row_count += 1
+                    if max_rows and row_count >= max_rows:
+                        break
+            finally:
+                await result.close()
+
+    async def execute(
+        self,
+        sql_query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a read-only query and collect up to max_rows rows within the timeout"""
+
+        async def _collect() -> List[Dict[str, Any]]:
+            return [row async for row in self.stream(sql_query, params, max_rows)]
+
+        return await asyncio.wait_for(_collect(), timeout=timeout or self.timeout)
+
+    async def dispose(self):
+        """Close pooled connections"""
+        await self.engine.dispose()
@@ -0,0 +1,270 @@
+"""
+Lightweight request tracing for the SQL agent.
+A trace is a tree of timed spans (cache lookup, vector search, each LLM call, SQL, formatting)
+carrying attributes such as row and token counts. Finished traces are kept in a bounded buffer
+for JSON export, and span durations feed per-stage p50/p95/p99 latency histograms.
+"""
+
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A timed stage of a request, with attributes and child spans"""
+
+    __slots__ = ("name", "start", "end", "attributes", "children")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.children: List["Span"] = []
+
+    def set(self, **attributes):
+        """Attach attributes such as row or token counts"""
+        self.attributes.update(attributes)
+
+    def child(self, name: str, **attributes) -> "Span":
+        span = Span(name, attributes)
+        self.children.append(span)
+        return span
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """Nested JSON form; offsets are relative to the root span so the tree reads like a flame graph"""
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span of the running request, if it is being traced"""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time a stage as a child of the current span; a no-op outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = parent.child(name, **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.set(error=str(e))
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Optional["Trace"]]:
+    """Open a root span for one request and record the trace when it closes"""
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+
+    trace = Trace(name, attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.finish()
+        _current_span.reset(token)
+        trace_recorder.record(trace)
+
+
+class Trace:
+    """Root span plus an id that requests can be looked up by"""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, attributes)
+        self.created_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "created_at": self.created_at,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "root": self.root.to_dict(),
+        }
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(percentile / 100 * len(samples))) - 1))
+    return samples[index]
+
+
+class TraceRecorder:
+    """Bounded buffer of recent traces and per-stage latency samples"""
+
+    def __init__(self, max_traces: int, max_samples: int):
+        self.max_traces = max_traces
+        self.max_samples = max_samples
+        self.traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self.samples: Dict[str, Deque[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.token_totals: Dict[str, int] = {}
+
+    def record(self, trace: Trace):
+        self.traces[trace.trace_id] = trace
+        while len(self.traces) > self.max_traces:
+            self.traces.popitem(last=False)
+
+        for stage in trace.root.walk():
+            samples = self.samples.setdefault(stage.name, deque(maxlen=self.max_samples))
+            samples.append(stage.duration_ms)
+            self.counts[stage.name] = self.counts.get(stage.name, 0) + 1
+            total_tokens = stage.attributes.get("total_tokens")
+            if total_tokens:
+                self.token_totals[stage.name] = self.token_totals.get(stage.name, 0) + total_tokens
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        trace = self.traces.get(trace_id)
+        return trace.to_dict() if trace else None
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest traces first, summarised without their span trees"""
+        traces = list(self.traces.values())[-limit:]
+        return [
+            {
+                "trace_id": trace.trace_id,
+                "name": trace.root.name,
+                "created_at": trace.created_at,
+                "duration_ms": round(trace.root.duration_ms, 3),
+                "attributes": trace.root.attributes,
+            }
+            for trace in reversed(traces)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """p50/p95/p99 latency per stage over the sample window"""
+        stages = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            stages[name] = {
+                "count": self.counts[name],
+                "p50_ms": round(_percentile(ordered, 50), 3),
+                "p95_ms": round(_percentile(ordered, 95), 3),
+                "p99_ms": round(_percentile(ordered, 99), 3),
+                "max_ms": round(ordered[-1], 3),
+                "total_tokens": self.token_totals.get(name, 0),
+            }
+        return {"traces_buffered": len(self.traces), "stages": stages}
+
+    def clear(self):
+        self.traces.clear()
+        self.samples.clear()
+        self.counts.clear()
+        self.token_totals.clear()
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Prompt/completion token counts from an LLMResult or chat message, whichever the provider filled in"""
+    llm_output = getattr(response, "llm_output", None) or {}
+    usage = llm_output.get("token_usage") if isinstance(llm_output, dict) else None
+    if usage:
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+
+    message = getattr(response, "message", None) or response
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if not usage_metadata and getattr(response, "generations", None):
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+    if usage_metadata:
+        return {
+            "prompt_tokens": usage_metadata.get("input_tokens", 0),
+            "completion_tokens": usage_metadata.get("output_tokens", 0),
+            "total_tokens": usage_metadata.get("total_tokens", 0),
+        }
+    return {}
+
+
+class TracingCallbackHandler(AsyncCallbackHandler):
+    """Records each LLM call and tool call of a LangChain run as a child span"""
+
+    def __init__(self, parent: Span):
+        self.parent = parent
+        self.open_spans: Dict[UUID, Span] = {}
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, **attributes):
+        parent = self.open_spans.get(parent_run_id) if parent_run_id else None
+        self.open_spans[run_id] = (parent or self.parent).child(name, **attributes)
+
+    def _end(self, run_id: UUID, **attributes) -> Optional[Span]:
+        span = self.open_spans.pop(run_id, None)
+        if span:
+            span.set(**attributes)
+            span.finish()
+        return span
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm_call", model=(serialized or {}).get("name"))
+
+    async def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm_call", model=(serialized or {}).get("name"))
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, **_token_usage(response))
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error))
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, f"tool:{(serialized or {}).get('name', 'unknown')}")
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output_chars=len(str(output)))
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error))
+
+
+# Global recorder
+trace_recorder = TraceRecorder(settings.TRACE_BUFFER_SIZE, settings.TRACE_SAMPLE_SIZE)
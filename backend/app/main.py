@@ -7,10 +7,14 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import structlog
 import time
+import asyncio
 
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.database import engine
+from app.core.cache_engine import cache_registry
+from app.core.catalog_events import catalog_event_bus
+from app.services.discussion_ranking_service import discussion_ranking_service
 from app.core.logging import setup_logging
 # Try to import SQL Agent - fail gracefully if not available
 try:
@@ -111,6 +115,13 @@ async def startup_event():
     """Initialize services on startup"""
     global sql_agent_service
     
+    # Sweep expired cache entries, refresh hot ones ahead of expiry and account sizes on a timer
+    cache_registry.start_maintenance()
+    # Catalog writes commit in threadpool endpoints; their change events are delivered on this loop
+    catalog_event_bus.bind_loop(asyncio.get_running_loop())
+    # Fade the recency bonus of new community posts so top discussions stay a stored-score query
+    discussion_ranking_service.start_decay()
+    
     if SQL_AGENT_AVAILABLE and SQLAgentService:
         try:
             # Initialize SQL Agent Service
@@ -181,6 +192,25 @@ async def startup_event():
         from app.core.database import init_db
         await init_db()
         
+        # Build the best-card rankings on first start
+        from app.core.database import SessionLocal
+        from app.services.reward_ranking_service import reward_ranking_service
+        
+        db = SessionLocal()
+        try:
+            await asyncio.to_thread(reward_ranking_service.ensure_built, db)
+        finally:
+            db.close()
+        
+        # Full-text index for community search (created and backfilled once)
+        from app.services.community_search_service import community_search_service
+        
+        db = SessionLocal()
+        try:
+            await asyncio.to_thread(community_search_service.ensure_index, db)
+        finally:
+            db.close()
+        
     except Exception as e:
         logger.error(f"Startup error: {e}")
         # Don't fail the startup, just log the error
@@ -192,6 +222,11 @@ async def shutdown_event():
     """Application shutdown event"""
     logger.info("Shutting down SmartCards AI API")
     
+    await cache_registry.stop_maintenance()
+    await discussion_ranking_service.stop_decay()
+    if sql_agent_service and sql_agent_service.cache_service:
+        await sql_agent_service.cache_service.close()
+    
     # Stop Card Update Scheduler
     if CARD_UPDATES_AVAILABLE and card_update_scheduler:
         try:
@@ -5,6 +5,7 @@ from .transaction import Transaction
 from .reward import Reward
 from .conversation import Conversation, ConversationMessage, CardRecommendation
 from .card_master_data import CardMasterData, CardSpendingCategory, CardMerchantReward, CardTierEnum
+from .card_reward_ranking import CardRewardRanking
 from .card_review import CardReview, ReviewVote
 from .community import CommunityPost, CommunityComment, PostVote, CommentVote
 from .user_role import UserRole, ModeratorRequest
@@ -26,6 +27,7 @@ __all__ = [
     "CardSpendingCategory",
     "CardMerchantReward",
     "CardTierEnum",
+    "CardRewardRanking",
     "CardReview",
     "ReviewVote",
     "CommunityPost",
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class CardRewardRanking(Base):
+    """
+    Materialized top-N cards per merchant and per spending category, ordered by reward rate.
+    Rebuilt for a single (dimension, name) whenever the underlying reward rows change.
+    """
+    __tablename__ = "card_reward_rankings"
+    # The unique constraint doubles as the (dimension, name, rank) lookup index
+    __table_args__ = (UniqueConstraint("dimension", "name", "rank", name="uq_ranking_dimension_name_rank"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String(20), nullable=False)  # merchant, category
+    name = Column(String(100), nullable=False)  # canonical merchant/category name
+    rank = Column(Integer, nullable=False)  # 1 = highest reward rate
+    card_master_id = Column(Integer, ForeignKey("card_master_data.id", ondelete="CASCADE"), nullable=False)
+    
+    # Denormalized so a lookup never joins back to the catalog tables
+    bank_name = Column(String(100), nullable=False)
+    card_name = Column(String(200), nullable=False)
+    reward_rate = Column(Float, nullable=False)
+    reward_type = Column(String(50), nullable=True)
+    reward_cap = Column(Float, nullable=True)
+    reward_cap_period = Column(String(20), nullable=True)
+    
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    card_master = relationship("CardMasterData")
+    
+    def __repr__(self):
+        return f"<CardRewardRanking({self.dimension}='{self.name}', rank={self.rank}, card_id={self.card_master_id}, rate={self.reward_rate}%)>"
+    
+    def to_dict(self):
+        """Convert to dictionary for API responses and agent tools"""
+        return {
+            "rank": self.rank,
+            "card_id": self.card_master_id,
+            "bank_name": self.bank_name,
+            "card_name": self.card_name,
+            "reward_rate": self.reward_rate,
+            "reward_type": self.reward_type,
+            "reward_cap": self.reward_cap,
+            "reward_cap_period": self.reward_cap_period,
+        }
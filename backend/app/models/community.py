@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -7,6 +7,7 @@ from app.core.database import Base
 
 class CommunityPost(Base):
     __tablename__ = "community_posts"
+    __table_args__ = (Index("ix_community_posts_ranking", "is_deleted", "hot_score"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -20,10 +21,15 @@ class CommunityPost(Base):
     upvotes = Column(Integer, default=0)
     downvotes = Column(Integer, default=0)
     comment_count = Column(Integer, default=0)
+    reply_count = Column(Integer, default=0)  # Comments that answer another comment
     is_deleted = Column(Boolean, default=False)
     
+    # Ranking, maintained by DiscussionRankingService
+    engagement_score = Column(Float, default=0)
+    hot_score = Column(Float, default=0)  # engagement_score plus a recency bonus that decays over the first day
+    
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
@@ -43,6 +49,8 @@ class CommunityPost(Base):
 
 class CommunityComment(Base):
     __tablename__ = "community_comments"
+    # Serves keyset pages of a post's comments or of one comment's replies
+    __table_args__ = (Index("ix_community_comments_thread", "post_id", "parent_id", "created_at", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -79,6 +87,7 @@ class CommunityComment(Base):
 
 class PostVote(Base):
     __tablename__ = "post_votes"
+    __table_args__ = (UniqueConstraint("user_id", "post_id", name="uq_post_vote_user_post"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -98,6 +107,7 @@ class PostVote(Base):
 
 class CommentVote(Base):
     __tablename__ = "comment_votes"
+    __table_args__ = (UniqueConstraint("user_id", "comment_id", name="uq_comment_vote_user_comment"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -55,6 +55,8 @@ class CommentResponse(CommentBase):
     created_at: datetime
     updated_at: datetime
     replies: List['CommentResponse'] = []
+    reply_count: int = 0  # Direct replies, including any not in `replies`
+    replies_cursor: Optional[int] = None  # Pass as `after` to load the replies not shown
     
     class Config:
         from_attributes = True
@@ -75,6 +77,27 @@ class VoteResponse(BaseModel):
 # Post Detail with Comments
 class PostDetail(PostResponse):
     comments: List[CommentResponse] = []
+    comments_cursor: Optional[int] = None  # Pass as `after` to load more top-level comments
+
+class CommentPage(BaseModel):
+    comments: List[CommentResponse]
+    next_cursor: Optional[int] = None
+
+# Search
+class SearchResult(BaseModel):
+    kind: str  # "post" or "comment"
+    post_id: int
+    comment_id: Optional[int] = None
+    card_master_id: Optional[int] = None
+    post_title: Optional[str] = None
+    title_snippet: str = ""  # HTML-escaped, hits wrapped in <mark>
+    snippet: str = ""
+    net_votes: int = 0
+    score: float
+
+class SearchResults(BaseModel):
+    results: List[SearchResult]
+    next_cursor: Optional[str] = None
 
 # Utility schemas
 class TimeAgoResponse(BaseModel):
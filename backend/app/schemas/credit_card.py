@@ -147,4 +147,9 @@ class CardComparison(BaseModel):
     """Comparison between multiple cards"""
     cards: list[CreditCardResponse]
     best_card_id: int
-    comparison_reasons: Dict[str, str] 
\ No newline at end of file
+    comparison_reasons: Dict[str, str] 
+
+class RewardOptimizationRequest(BaseModel):
+    """Monthly spend per category/merchant to split across the user's portfolio"""
+    spend: Dict[str, float]
+    ticket_sizes: Optional[Dict[str, float]] = None  # Typical transaction size per category/merchant
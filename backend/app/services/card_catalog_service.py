@@ -0,0 +1,461 @@
+import asyncio
+import base64
+import json
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.card_search import CardSearchIndex
+from app.core.catalog_events import CatalogChange, catalog_event_bus
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.card_master_data import CardMasterData
+
+logger = logging.getLogger(__name__)
+
+
+def _positions() -> array:
+    return array("I")
+
+
+class CardRecord:
+    """Read-only copy of the card fields the list pages use"""
+
+    __slots__ = (
+        "id", "bank_name", "card_name", "card_variant", "card_network", "card_tier",
+        "is_active", "display_name", "joining_fee_display", "annual_fee_display",
+        "joining_fee", "annual_fee", "is_lifetime_free", "domestic_lounge_visits",
+        "international_lounge_visits", "minimum_salary", "minimum_age", "maximum_age",
+    )
+
+    def __init__(self, card: CardMasterData):
+        self.id = card.id
+        self.bank_name = card.bank_name
+        self.card_name = card.card_name
+        self.card_variant = card.card_variant
+        self.card_network = card.card_network
+        self.card_tier = card.card_tier
+        self.is_active = card.is_active
+        self.display_name = card.display_name
+        self.joining_fee_display = card.joining_fee_display
+        self.annual_fee_display = card.annual_fee_display
+        # Missing fees are shown as ₹0 and filtered and sorted the same way
+        self.joining_fee = 0.0 if card.is_lifetime_free else card.joining_fee or 0.0
+        self.annual_fee = 0.0 if card.is_lifetime_free else card.annual_fee or 0.0
+        self.is_lifetime_free = bool(card.is_lifetime_free)
+        self.domestic_lounge_visits = card.domestic_lounge_visits or 0
+        self.international_lounge_visits = card.international_lounge_visits or 0
+        self.minimum_salary = card.minimum_salary
+        self.minimum_age = card.minimum_age
+        self.maximum_age = card.maximum_age
+
+    def summary(self) -> Dict[str, Any]:
+        """Basic card information as returned by the /cards listing"""
+        return {
+            "id": self.id,
+            "bank_name": self.bank_name,
+            "card_name": self.card_name,
+            "display_name": self.display_name,
+            "card_network": self.card_network,
+            "joining_fee_display": self.joining_fee_display,
+            "annual_fee_display": self.annual_fee_display,
+            "is_active": self.is_active
+        }
+
+    def detail(self) -> Dict[str, Any]:
+        """Listing fields plus the values the explore filters work on"""
+        return {
+            **self.summary(),
+            "card_tier": self.card_tier,
+            "joining_fee": self.joining_fee,
+            "annual_fee": self.annual_fee,
+            "is_lifetime_free": self.is_lifetime_free,
+            "domestic_lounge_visits": self.domestic_lounge_visits,
+            "international_lounge_visits": self.international_lounge_visits,
+            "minimum_salary": self.minimum_salary,
+            "minimum_age": self.minimum_age,
+            "maximum_age": self.maximum_age
+        }
+
+
+# Explore sort orders: key function over a record; ties always break on card id
+SORT_KEYS: Dict[str, Callable[[CardRecord], float]] = {
+    "id": lambda record: 0,
+    "annual_fee": lambda record: record.annual_fee,
+    "joining_fee": lambda record: record.joining_fee,
+    "lounge_visits": lambda record: -(record.domestic_lounge_visits + record.international_lounge_visits),
+}
+
+# Annual fee facet buckets: (label, lowest fee, highest fee)
+ANNUAL_FEE_BANDS = (
+    ("free", 0, 0),
+    ("up_to_1000", 0.01, 1000),
+    ("1001_to_5000", 1000.01, 5000),
+    ("above_5000", 5000.01, float("inf")),
+)
+
+
+@dataclass
+class CardFilters:
+    """Explore filters; None means the filter is not applied"""
+
+    bank_name: Optional[str] = None
+    card_network: Optional[str] = None
+    card_tier: Optional[str] = None
+    min_annual_fee: Optional[float] = None
+    max_annual_fee: Optional[float] = None
+    max_joining_fee: Optional[float] = None
+    lifetime_free: Optional[bool] = None
+    min_domestic_lounge_visits: Optional[int] = None
+    min_international_lounge_visits: Optional[int] = None
+    merchant: Optional[str] = None
+    min_merchant_rate: Optional[float] = None
+    category: Optional[str] = None
+    min_category_rate: Optional[float] = None
+    salary: Optional[float] = None
+    age: Optional[int] = None
+    is_active: Optional[bool] = True
+
+
+def encode_cursor(sort_key: Tuple[float, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(sort_key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        value, card_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(value), int(card_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the card catalog: records in id order plus indexes from bank, tier, network,
+    merchant and category to record positions. Never modified once built; changes build a new one.
+    """
+
+    __slots__ = (
+        "records", "by_id", "by_bank", "by_tier", "by_network", "by_merchant", "by_category",
+        "active", "inactive", "banks", "merchants", "categories", "merchant_rates", "category_rates",
+        "sort_orders", "search_index", "built_at",
+    )
+
+    def __init__(self, cards: Iterable[CardMasterData]):
+        records: List[CardRecord] = []
+        by_bank: Dict[str, array] = {}
+        by_tier: Dict[str, array] = {}
+        by_network: Dict[str, array] = {}
+        by_merchant: Dict[str, array] = {}
+        by_category: Dict[str, array] = {}
+        active = _positions()
+        inactive = _positions()
+        # Distinct names as stored, in first-seen order, for the filter dropdowns
+        banks: Dict[str, None] = {}
+        merchants: Dict[str, None] = {}
+        categories: Dict[str, None] = {}
+        # Active reward rate per card position, by lowercased merchant / category name
+        merchant_rates: Dict[str, Dict[int, float]] = {}
+        category_rates: Dict[str, Dict[int, float]] = {}
+
+        cards = sorted(cards, key=lambda card: card.id)
+        for position, card in enumerate(cards):
+            records.append(CardRecord(card))
+            banks.setdefault(card.bank_name)
+            by_bank.setdefault(card.bank_name.lower(), _positions()).append(position)
+            by_tier.setdefault((card.card_tier or "").lower(), _positions()).append(position)
+            by_network.setdefault((card.card_network or "").lower(), _positions()).append(position)
+            (active if card.is_active else inactive).append(position)
+
+            for name in {category.category_name for category in card.spending_categories}:
+                categories.setdefault(name)
+                by_category.setdefault(name.lower().strip(), _positions()).append(position)
+            for name in {merchant.merchant_name for merchant in card.merchant_rewards}:
+                merchants.setdefault(name)
+                by_merchant.setdefault(name.lower().strip(), _positions()).append(position)
+            for category in card.spending_categories:
+                if category.is_active and category.reward_rate is not None:
+                    rates = category_rates.setdefault(category.category_name.lower().strip(), {})
+                    rates[position] = max(rates.get(position, 0.0), category.reward_rate)
+            for merchant in card.merchant_rewards:
+                if merchant.is_active and merchant.reward_rate is not None:
+                    rates = merchant_rates.setdefault(merchant.merchant_name.lower().strip(), {})
+                    rates[position] = max(rates.get(position, 0.0), merchant.reward_rate)
+
+        self.records: Tuple[CardRecord, ...] = tuple(records)
+        self.by_id: Dict[int, int] = {record.id: position for position, record in enumerate(records)}
+        self.by_bank = by_bank
+        self.by_tier = by_tier
+        self.by_network = by_network
+        self.by_merchant = by_merchant
+        self.by_category = by_category
+        # Sets, so search can test membership per hit
+        self.active = frozenset(active)
+        self.inactive = frozenset(inactive)
+        self.banks: Tuple[str, ...] = tuple(banks)
+        self.merchants: Tuple[str, ...] = tuple(merchants)
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self.merchant_rates = merchant_rates
+        self.category_rates = category_rates
+        # Keyset indexes: positions sorted by (sort value, card id), with the keys alongside for bisecting
+        self.sort_orders: Dict[str, Tuple[List[Tuple[float, int]], array]] = {}
+        for sort, key in SORT_KEYS.items():
+            ordered = sorted(range(len(records)), key=lambda position: (key(records[position]), records[position].id))
+            self.sort_orders[sort] = (
+                [(key(records[position]), records[position].id) for position in ordered],
+                array("I", ordered)
+            )
+        self.search_index = CardSearchIndex(cards)
+        self.built_at = time.monotonic()
+
+    def get(self, card_id: int) -> Optional[CardRecord]:
+        position = self.by_id.get(card_id)
+        return None if position is None else self.records[position]
+
+    def search(self, query: str, limit: int = 10, is_active: Optional[bool] = True) -> List[Tuple[CardRecord, float]]:
+        """Ranked (record, score) pairs for a free-text query"""
+        # Index positions are snapshot positions, so the activity filter applies before truncating
+        positions = None if is_active is None else (self.active if is_active else self.inactive)
+        hits = self.search_index.search(query, limit, positions)
+        return [(self.records[self.by_id[card_id]], score) for card_id, score in hits]
+
+    def filter(
+        self,
+        bank_name: Optional[str] = None,
+        card_tier: Optional[str] = None,
+        card_network: Optional[str] = None,
+        merchant: Optional[str] = None,
+        category: Optional[str] = None,
+        is_active: Optional[bool] = None,
+    ) -> List[CardRecord]:
+        """Records matching every given filter, in id order; bank_name matches as a substring"""
+        matches: Optional[set] = None
+
+        def narrow(positions: Iterable[int]):
+            nonlocal matches
+            matches = set(positions) if matches is None else matches.intersection(positions)
+
+        if bank_name:
+            needle = bank_name.lower()
+            narrow(position for bank, positions in self.by_bank.items() if needle in bank for position in positions)
+        if card_tier:
+            narrow(self.by_tier.get(card_tier.lower(), ()))
+        if card_network:
+            narrow(self.by_network.get(card_network.lower(), ()))
+        if merchant:
+            narrow(self.by_merchant.get(merchant.lower().strip(), ()))
+        if category:
+            narrow(self.by_category.get(category.lower().strip(), ()))
+        if is_active is not None:
+            narrow(self.active if is_active else self.inactive)
+
+        if matches is None:
+            return list(self.records)
+        return [self.records[position] for position in sorted(matches)]
+
+    def _filter_sets(self, filters: CardFilters) -> Dict[str, Set[int]]:
+        """Matching positions per applied filter group, so facets can leave their own group out"""
+        records = self.records
+        everything = range(len(records))
+
+        def scan(predicate: Callable[[CardRecord], bool]) -> Set[int]:
+            return {position for position in everything if predicate(records[position])}
+
+        groups: Dict[str, Set[int]] = {}
+        if filters.bank_name:
+            needle = filters.bank_name.lower()
+            groups["bank"] = {
+                position for bank, positions in self.by_bank.items() if needle in bank for position in positions
+            }
+        if filters.card_network:
+            groups["network"] = set(self.by_network.get(filters.card_network.lower(), ()))
+        if filters.card_tier:
+            groups["tier"] = set(self.by_tier.get(filters.card_tier.lower(), ()))
+        if filters.is_active is not None:
+            groups["active"] = set(self.active if filters.is_active else self.inactive)
+        if filters.lifetime_free is not None:
+            groups["lifetime_free"] = scan(lambda record: record.is_lifetime_free == filters.lifetime_free)
+        if filters.min_annual_fee is not None or filters.max_annual_fee is not None:
+            low = filters.min_annual_fee if filters.min_annual_fee is not None else float("-inf")
+            high = filters.max_annual_fee if filters.max_annual_fee is not None else float("inf")
+            groups["annual_fee"] = scan(lambda record: low <= record.annual_fee <= high)
+        if filters.max_joining_fee is not None:
+            groups["joining_fee"] = scan(lambda record: record.joining_fee <= filters.max_joining_fee)
+        if filters.min_domestic_lounge_visits is not None:
+            groups["domestic_lounge"] = scan(
+                lambda record: record.domestic_lounge_visits >= filters.min_domestic_lounge_visits
+            )
+        if filters.min_international_lounge_visits is not None:
+            groups["international_lounge"] = scan(
+                lambda record: record.international_lounge_visits >= filters.min_international_lounge_visits
+            )
+        if filters.merchant:
+            rates = self.merchant_rates.get(filters.merchant.lower().strip(), {})
+            minimum = filters.min_merchant_rate or 0.0
+            groups["merchant"] = {position for position, rate in rates.items() if rate >= minimum and rate > 0}
+        if filters.category:
+            rates = self.category_rates.get(filters.category.lower().strip(), {})
+            minimum = filters.min_category_rate or 0.0
+            groups["category"] = {position for position, rate in rates.items() if rate >= minimum and rate > 0}
+        if filters.salary is not None:
+            # Cards without a stated salary requirement stay eligible
+            groups["salary"] = scan(lambda record: record.minimum_salary is None or record.minimum_salary <= filters.salary)
+        if filters.age is not None:
+            groups["age"] = scan(
+                lambda record: (record.minimum_age is None or record.minimum_age <= filters.age)
+                and (record.maximum_age is None or filters.age <= record.maximum_age)
+            )
+        return groups
+
+    def _intersect(self, groups: Dict[str, Set[int]], skip: Optional[str] = None) -> Set[int]:
+        applied = sorted((positions for name, positions in groups.items() if name != skip), key=len)
+        if not applied:
+            return set(range(len(self.records)))
+        result = set(applied[0])
+        for positions in applied[1:]:
+            result &= positions
+        return result
+
+    def _count_by(self, positions: Iterable[int], value: Callable[[CardRecord], Optional[str]]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for position in positions:
+            key = value(self.records[position])
+            if key:
+                counts[key] = counts.get(key, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def explore(
+        self,
+        filters: CardFilters,
+        sort: str = "id",
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """
+        One page of cards matching the filters, keyset-paginated along a sort order, with facet counts.
+        Each facet is counted with every filter applied except its own, so the UI can show what
+        switching that facet's value would return.
+        """
+        keys, order = self.sort_orders[sort]
+        groups = self._filter_sets(filters)
+        matches = self._intersect(groups)
+
+        # Indexes into the sort order, resuming just after the cursor's key
+        index = bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+        page: List[int] = []
+        while index < len(order) and len(page) <= limit:
+            if order[index] in matches:
+                page.append(index)
+            index += 1
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        items = []
+        for position in (order[index] for index in page):
+            item = self.records[position].detail()
+            if filters.merchant:
+                item["merchant_reward_rate"] = self.merchant_rates.get(filters.merchant.lower().strip(), {}).get(position)
+            if filters.category:
+                item["category_reward_rate"] = self.category_rates.get(filters.category.lower().strip(), {}).get(position)
+            items.append(item)
+
+        without_fee = self._intersect(groups, skip="annual_fee")
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(keys[page[-1]]) if has_more else None,
+            "total": len(matches),
+            "facets": {
+                "bank_name": self._count_by(self._intersect(groups, skip="bank"), lambda record: record.bank_name),
+                "card_network": self._count_by(self._intersect(groups, skip="network"), lambda record: record.card_network),
+                "card_tier": self._count_by(self._intersect(groups, skip="tier"), lambda record: record.card_tier),
+                "lifetime_free": sum(
+                    1 for position in self._intersect(groups, skip="lifetime_free")
+                    if self.records[position].is_lifetime_free
+                ),
+                "annual_fee": {
+                    label: sum(1 for position in without_fee if low <= self.records[position].annual_fee <= high)
+                    for label, low, high in ANNUAL_FEE_BANDS
+                },
+            },
+        }
+
+
+class CardCatalogService:
+    """
+    Process-wide catalog snapshot for the read-only card endpoints.
+    A catalog change event builds a replacement in a worker thread and swaps the reference in one
+    assignment; readers holding the previous snapshot finish with it undisturbed.
+    """
+
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.max_age = settings.CARD_CATALOG_MAX_AGE_SECONDS
+        self._build_lock = threading.Lock()
+        self._rebuild_pending = False
+        self._rebuilding = False
+
+        catalog_event_bus.subscribe(self._on_catalog_change)
+
+    def rebuild(self, db: Optional[Session] = None) -> CatalogSnapshot:
+        """Build a new snapshot and swap it in"""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            cards = db.query(CardMasterData).options(
+                selectinload(CardMasterData.spending_categories),
+                selectinload(CardMasterData.merchant_rewards)
+            ).all()
+            snapshot = CatalogSnapshot(cards)
+        finally:
+            if own_session:
+                db.close()
+        self.snapshot = snapshot
+        logger.info(f"✅ Built card catalog snapshot with {len(snapshot.records)} cards")
+        return snapshot
+
+    def _is_stale(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        # The age bound picks up changes committed by other workers
+        return snapshot is None or time.monotonic() - snapshot.built_at > self.max_age
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """Current snapshot, built on first use or when too old"""
+        snapshot = self.snapshot
+        if not self._is_stale(snapshot):
+            return snapshot
+        with self._build_lock:
+            snapshot = self.snapshot
+            if self._is_stale(snapshot):
+                snapshot = self.rebuild()
+        return snapshot
+
+    async def _on_catalog_change(self, change: CatalogChange):
+        """Rebuild in the background; a burst of changes coalesces into back-to-back rebuilds"""
+        self._rebuild_pending = True
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+        try:
+            while self._rebuild_pending:
+                self._rebuild_pending = False
+                await asyncio.to_thread(self._rebuild_locked)
+        except Exception as e:
+            # The previous snapshot keeps serving until the next change or the age bound
+            logger.error(f"Card catalog rebuild failed: {e}")
+        finally:
+            self._rebuilding = False
+
+    def _rebuild_locked(self):
+        with self._build_lock:
+            self.rebuild()
+
+
+# Global instance
+card_catalog_service = CardCatalogService()
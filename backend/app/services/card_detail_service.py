@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.allowed_names import ORDERED_CATEGORIES, ORDERED_MERCHANTS
+from app.core.cache_engine import cache_registry
+from app.core.catalog_events import CatalogChange, card_tag, catalog_event_bus
+from app.core.config import settings
+from app.models.card_master_data import CardMasterData
+from app.schemas.card_master_data import CardMasterDataResponse
+
+logger = logging.getLogger(__name__)
+
+
+def build_card_detail(card: CardMasterData) -> Dict[str, Any]:
+    """Card detail payload with categories and merchants merged into the canonical 15-slot lists"""
+    # Build lookup dicts from DB records, keyed by normalized name
+    existing_categories = {cat.category_name.lower().strip(): cat for cat in card.spending_categories}
+    existing_merchants = {merchant.merchant_name.lower().strip(): merchant for merchant in card.merchant_rewards}
+
+    # Merge against the canonical 15-slot lists — nothing outside these lists is shown
+    merged_categories = []
+    for category_name in ORDERED_CATEGORIES:
+        existing_cat = existing_categories.get(category_name.lower().strip())
+        if existing_cat:
+            merged_categories.append({
+                "id": existing_cat.id,
+                "card_master_id": existing_cat.card_master_id,
+                "category_name": existing_cat.category_name,
+                "category_display_name": existing_cat.category_display_name,
+                "reward_rate": existing_cat.reward_rate,
+                "reward_type": existing_cat.reward_type,
+                "reward_cap": existing_cat.reward_cap,
+                "reward_cap_period": existing_cat.reward_cap_period,
+                "minimum_transaction_amount": existing_cat.minimum_transaction_amount,
+                "is_active": existing_cat.is_active,
+                "valid_from": existing_cat.valid_from,
+                "valid_until": existing_cat.valid_until,
+                "additional_conditions": existing_cat.additional_conditions,
+                "created_at": existing_cat.created_at,
+                "updated_at": existing_cat.updated_at,
+                "reward_display": f"{existing_cat.reward_rate}%" if existing_cat.reward_rate is not None else "Not Available"
+            })
+        else:
+            merged_categories.append({
+                "id": None,
+                "card_master_id": card.id,
+                "category_name": category_name,
+                "category_display_name": category_name.title(),
+                "reward_rate": 0.0,
+                "reward_type": "points",
+                "reward_cap": None,
+                "reward_cap_period": None,
+                "minimum_transaction_amount": None,
+                "is_active": False,
+                "valid_from": None,
+                "valid_until": None,
+                "additional_conditions": None,
+                "created_at": None,
+                "updated_at": None,
+                "reward_display": "Not Available"
+            })
+
+    merged_merchants = []
+    for merchant_name in ORDERED_MERCHANTS:
+        existing_merchant = existing_merchants.get(merchant_name.lower().strip())
+        if existing_merchant:
+            merged_merchants.append({
+                "id": existing_merchant.id,
+                "card_master_id": existing_merchant.card_master_id,
+                "merchant_name": existing_merchant.merchant_name,
+                "merchant_display_name": existing_merchant.merchant_display_name,
+                "merchant_category": existing_merchant.merchant_category,
+                "reward_rate": existing_merchant.reward_rate,
+                "reward_type": existing_merchant.reward_type or "cashback",
+                "reward_cap": existing_merchant.reward_cap,
+                "reward_cap_period": existing_merchant.reward_cap_period,
+                "minimum_transaction_amount": existing_merchant.minimum_transaction_amount,
+                "is_active": existing_merchant.is_active,
+                "valid_from": existing_merchant.valid_from,
+                "valid_until": existing_merchant.valid_until,
+                "requires_registration": existing_merchant.requires_registration if existing_merchant.requires_registration is not None else False,
+                "additional_conditions": existing_merchant.additional_conditions,
+                "created_at": existing_merchant.created_at,
+                "updated_at": existing_merchant.updated_at,
+                "reward_display": f"{existing_merchant.reward_rate}%" if existing_merchant.reward_rate is not None else "Not Available"
+            })
+        else:
+            merged_merchants.append({
+                "id": None,
+                "card_master_id": card.id,
+                "merchant_name": merchant_name,
+                "merchant_display_name": merchant_name.title(),
+                "merchant_category": None,
+                "reward_rate": 0.0,
+                "reward_type": "cashback",
+                "reward_cap": None,
+                "reward_cap_period": None,
+                "minimum_transaction_amount": None,
+                "is_active": False,
+                "valid_from": None,
+                "valid_until": None,
+                "requires_registration": False,
+                "additional_conditions": None,
+                "created_at": None,
+                "updated_at": None,
+                "reward_display": "Not Available"
+            })
+    
+    # Convert to dict and back to handle None values properly
+    card_dict = {
+        "id": card.id,
+        "bank_name": card.bank_name,
+        "card_name": card.card_name,
+        "card_variant": card.card_variant,
+        "card_network": card.card_network,
+        "card_tier": card.card_tier.lower() if card.card_tier else "basic",
+        "joining_fee": card.joining_fee,
+        "annual_fee": card.annual_fee,
+        "is_lifetime_free": card.is_lifetime_free,
+        "annual_fee_waiver_spend": card.annual_fee_waiver_spend,
+        "foreign_transaction_fee": card.foreign_transaction_fee,
+        "late_payment_fee": card.late_payment_fee,
+        "overlimit_fee": card.overlimit_fee,
+        "cash_advance_fee": card.cash_advance_fee,
+        "domestic_lounge_visits": card.domestic_lounge_visits,
+        "international_lounge_visits": card.international_lounge_visits,
+        "lounge_spend_requirement": card.lounge_spend_requirement,
+        "lounge_spend_period": card.lounge_spend_period,
+        "welcome_bonus_points": card.welcome_bonus_points,
+        "welcome_bonus_spend_requirement": card.welcome_bonus_spend_requirement,
+        "welcome_bonus_timeframe": card.welcome_bonus_timeframe,
+        "minimum_credit_limit": card.minimum_credit_limit,
+        "maximum_credit_limit": card.maximum_credit_limit,
+        "minimum_salary": card.minimum_salary,
+        "minimum_age": card.minimum_age,
+        "maximum_age": card.maximum_age,
+        "contactless_enabled": card.contactless_enabled,
+        "chip_enabled": card.chip_enabled,
+        "mobile_wallet_support": card.mobile_wallet_support,
+        "insurance_benefits": card.insurance_benefits,
+        "concierge_service": card.concierge_service if card.concierge_service is not None else False,
+        "milestone_benefits": card.milestone_benefits,
+        "reward_program_name": card.reward_program_name,
+        "reward_expiry_period": card.reward_expiry_period,
+        "reward_conversion_rate": card.reward_conversion_rate,
+        "minimum_redemption_points": card.minimum_redemption_points,
+        "is_active": card.is_active,
+        "is_available_online": card.is_available_online,
+        "launch_date": card.launch_date,
+        "discontinue_date": card.discontinue_date,
+        "description": card.description,
+        "terms_and_conditions_url": card.terms_and_conditions_url,
+        "application_url": card.application_url,
+        "additional_features": card.additional_features,
+        "created_at": card.created_at,
+        "updated_at": card.updated_at,
+        "display_name": card.display_name,
+        "joining_fee_display": card.joining_fee_display,
+        "annual_fee_display": card.annual_fee_display,
+        "spending_categories": merged_categories,
+        "merchant_rewards": merged_merchants
+    }
+    return card_dict
+
+
+class CardDetailService:
+    """
+    Read model for the card detail page.
+    Each card is loaded in one query, merged and serialized once per version, and kept as JSON bytes
+    with an ETag; catalog change events drop the cached version so the next view rebuilds it.
+    """
+
+    def __init__(self):
+        self.cache = cache_registry.get_cache(
+            "card_detail",
+            max_entries=settings.CARD_DETAIL_CACHE_SIZE,
+            default_ttl=settings.CARD_DETAIL_CACHE_TTL_SECONDS
+        )
+        # Bumped per card on every catalog change; a build only caches if its card's generation held
+        self._generations: Dict[int, int] = {}
+        # Makes the generation check and the cache write one step against concurrent invalidations
+        self._lock = threading.Lock()
+        catalog_event_bus.subscribe(self._on_catalog_change)
+
+    def cached(self, card_id: int) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) of the current version if it is cached, without touching the database"""
+        with self._lock:
+            return self.cache.get(str(card_id))
+
+    def get(self, db: Session, card_id: int) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) for a card, building and caching it on a miss; None if the card does not exist"""
+        with self._lock:
+            cached = self.cache.get(str(card_id))
+            generation = self._generations.get(card_id, 0)
+        if cached:
+            return cached
+
+        card = db.query(CardMasterData).options(
+            joinedload(CardMasterData.spending_categories),
+            joinedload(CardMasterData.merchant_rewards)
+        ).filter(CardMasterData.id == card_id).first()
+        if not card:
+            return None
+
+        body = CardMasterDataResponse(**build_card_detail(card)).model_dump_json().encode("utf-8")
+        # Content-derived, so every worker hands out the same ETag for the same version
+        etag = f'"{card_id}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        with self._lock:
+            # A change arrived while this version was being read; serve it once but don't cache it
+            if self._generations.get(card_id, 0) == generation:
+                self.cache.set(str(card_id), (etag, body), tags=[card_tag(card_id)])
+        return etag, body
+
+    async def _on_catalog_change(self, change: CatalogChange):
+        """Drop cached versions of the changed cards"""
+        if change.card_ids:
+            with self._lock:
+                for card_id in change.card_ids:
+                    self._generations[card_id] = self._generations.get(card_id, 0) + 1
+                self.cache.invalidate_tags([card_tag(card_id) for card_id in change.card_ids])
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison, accepting lists, weak validators and *"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+# Global instance
+card_detail_service = CardDetailService()
@@ -13,6 +13,7 @@ from app.models.card_master_data import CardMasterData, CardSpendingCategory, Ca
 from app.models.edit_suggestion import EditSuggestion
 from app.models.card_document import CardDocument
 from app.models.community import CommunityPost
+from app.services.discussion_ranking_service import discussion_ranking_service
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -305,6 +306,7 @@ class CardUpdateService:
                 downvotes=0,
                 comment_count=0
             )
+            discussion_ranking_service.rescore(post)
             
             db.add(post)
             db.commit()
@@ -0,0 +1,188 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, asc, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.community import CommunityComment
+from app.models.user import User
+from app.schemas.community import CommentResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CommentThread:
+    """
+    All live comments of a post, indexed for paged, depth-limited rendering.
+    Built in one pass from rows in display order; children are kept per parent id, so rendering
+    never touches ORM relationships. Replies whose parent was deleted stay hidden, as before.
+    A partial thread (see CommentThreadService.load_page) passes the live reply count of each loaded comment.
+    """
+
+    def __init__(
+        self,
+        rows: List[Tuple[CommunityComment, Optional[User]]],
+        reply_counts: Optional[Dict[int, int]] = None
+    ):
+        self.comments: Dict[int, CommunityComment] = {comment.id: comment for comment, _ in rows}
+        self.authors: Dict[int, str] = {
+            comment.id: author.full_name if author else "Unknown User" for comment, author in rows
+        }
+        # Direct replies per parent id (None for top-level comments), with each comment's index among its siblings
+        self.children: Dict[Optional[int], List[CommunityComment]] = {}
+        self.positions: Dict[int, int] = {}
+        for comment, _ in rows:
+            if comment.parent_id is not None and comment.parent_id not in self.comments:
+                continue
+            siblings = self.children.setdefault(comment.parent_id, [])
+            self.positions[comment.id] = len(siblings)
+            siblings.append(comment)
+        self.reply_counts = reply_counts
+
+    def __len__(self) -> int:
+        return len(self.comments)
+
+    def page(
+        self,
+        parent_id: Optional[int] = None,
+        after: Optional[int] = None,
+        limit: int = 50,
+        depth: int = 3,
+        replies_limit: int = 10,
+    ) -> Tuple[List[CommentResponse], Optional[int]]:
+        """
+        Up to limit replies to parent_id (top-level comments for None) that follow the sibling `after`,
+        each rendered depth levels deep, plus the cursor for the next page (None on the last page).
+        """
+        siblings = self.children.get(parent_id, [])
+        start = 0
+        if after is not None:
+            # An unknown or foreign cursor starts from the beginning rather than failing
+            if self.comments.get(after) is not None and self.comments[after].parent_id == parent_id:
+                start = self.positions.get(after, -1) + 1
+        shown = siblings[start:start + limit]
+        next_cursor = shown[-1].id if shown and start + len(shown) < len(siblings) else None
+        return [self.render(comment, depth, replies_limit) for comment in shown], next_cursor
+
+    def render(self, comment: CommunityComment, depth: int, replies_limit: int) -> CommentResponse:
+        """A loaded comment with up to replies_limit replies per level, depth levels deep"""
+        children = self.children.get(comment.id, [])
+        reply_count = self.reply_counts.get(comment.id, 0) if self.reply_counts is not None else len(children)
+        shown = children[:replies_limit] if depth > 1 else []
+        return CommentResponse(
+            id=comment.id,
+            user_id=comment.user_id,
+            post_id=comment.post_id,
+            parent_id=comment.parent_id,
+            user_name=self.authors[comment.id],
+            body=comment.body,
+            upvotes=comment.upvotes,
+            downvotes=comment.downvotes,
+            net_votes=comment.net_votes,
+            created_at=comment.created_at,
+            updated_at=comment.updated_at or comment.created_at,
+            replies=[self.render(child, depth - 1, replies_limit) for child in shown],
+            reply_count=reply_count,
+            replies_cursor=shown[-1].id if shown and len(shown) < reply_count else None
+        )
+
+
+class CommentThreadService:
+    """Loads a post's comments with their authors: the whole thread, or one continuation page of it"""
+
+    def load(self, db: Session, post_id: int) -> CommentThread:
+        """Every live comment of the post in a single query"""
+        rows = self._with_authors(db).filter(
+            CommunityComment.post_id == post_id,
+            CommunityComment.is_deleted == False
+        ).order_by(asc(CommunityComment.created_at), asc(CommunityComment.id)).all()
+        return CommentThread(rows)
+
+    def load_page(
+        self,
+        db: Session,
+        post_id: int,
+        parent_id: Optional[int] = None,
+        after: Optional[int] = None,
+        limit: int = 50,
+        depth: int = 3,
+        replies_limit: int = 10,
+    ) -> Tuple[List[CommentResponse], Optional[int]]:
+        """
+        The same page CommentThread.page renders, without loading the rest of the thread:
+        a keyset query on (post_id, parent_id, created_at, id) for the page, then one query per
+        rendered level for at most replies_limit replies of each shown comment.
+        """
+        query = self._with_authors(db).filter(
+            CommunityComment.post_id == post_id,
+            self._parent_filter(parent_id),
+            CommunityComment.is_deleted == False
+        )
+        if after is not None:
+            # An unknown or foreign cursor starts from the beginning rather than failing
+            cursor = db.query(CommunityComment.created_at, CommunityComment.id).filter(
+                CommunityComment.id == after,
+                CommunityComment.post_id == post_id,
+                self._parent_filter(parent_id)
+            ).first()
+            if cursor:
+                query = query.filter(or_(
+                    CommunityComment.created_at > cursor.created_at,
+                    and_(CommunityComment.created_at == cursor.created_at, CommunityComment.id > cursor.id)
+                ))
+        rows = query.order_by(asc(CommunityComment.created_at), asc(CommunityComment.id)).limit(limit + 1).all()
+        page_rows = rows[:limit]
+        next_cursor = page_rows[-1][0].id if len(rows) > limit else None
+
+        loaded = list(page_rows)
+        reply_counts: Dict[int, int] = {}
+        level_ids = [comment.id for comment, _ in page_rows]
+        for level in range(depth, 0, -1):
+            if not level_ids:
+                break
+            if level == 1:
+                # Deepest rendered level: replies are only counted
+                reply_counts.update(db.query(CommunityComment.parent_id, func.count(CommunityComment.id)).filter(
+                    CommunityComment.parent_id.in_(level_ids),
+                    CommunityComment.is_deleted == False
+                ).group_by(CommunityComment.parent_id).all())
+                break
+            replies = self._first_replies(db, level_ids, replies_limit)
+            for comment, _, siblings in replies:
+                reply_counts[comment.parent_id] = siblings
+            loaded.extend((comment, author) for comment, author, _ in replies)
+            level_ids = [comment.id for comment, _, _ in replies]
+
+        thread = CommentThread(loaded, reply_counts)
+        return [thread.render(comment, depth, replies_limit) for comment, _ in page_rows], next_cursor
+
+    def _with_authors(self, db: Session):
+        return db.query(CommunityComment, User).outerjoin(User, User.id == CommunityComment.user_id)
+
+    def _parent_filter(self, parent_id: Optional[int]):
+        if parent_id is None:
+            return CommunityComment.parent_id.is_(None)
+        return CommunityComment.parent_id == parent_id
+
+    def _first_replies(
+        self, db: Session, parent_ids: List[int], replies_limit: int
+    ) -> List[Tuple[CommunityComment, Optional[User], int]]:
+        """The first replies_limit live replies of each parent, with the parent's live reply count"""
+        order = (asc(CommunityComment.created_at), asc(CommunityComment.id))
+        ranked = select(
+            CommunityComment.id,
+            func.row_number().over(partition_by=CommunityComment.parent_id, order_by=order).label("position"),
+            func.count().over(partition_by=CommunityComment.parent_id).label("siblings")
+        ).where(
+            CommunityComment.parent_id.in_(parent_ids),
+            CommunityComment.is_deleted == False
+        ).subquery()
+        return db.query(CommunityComment, User, ranked.c.siblings).join(
+            ranked, ranked.c.id == CommunityComment.id
+        ).outerjoin(
+            User, User.id == CommunityComment.user_id
+        ).filter(ranked.c.position <= replies_limit).order_by(*order).all()
+
+
+# Global instance
+comment_thread_service = CommentThreadService()
@@ -0,0 +1,294 @@
+import base64
+import html
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.community import CommunityPost
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# One FTS5 table over posts and comments. Row ids encode the source row (posts 2n, comments 2n+1)
+# so triggers can replace or drop an entry by rowid. Only title and body are indexed.
+_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS community_search USING fts5(
+        kind UNINDEXED, ref_id UNINDEXED, post_id UNINDEXED, card_master_id UNINDEXED, title, body,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # Title hits count three times as much as body hits
+    "INSERT INTO community_search(community_search, rank) VALUES ('rank', 'bm25(0, 0, 0, 0, 3.0, 1.0)')",
+    """
+    CREATE TRIGGER IF NOT EXISTS community_search_post_insert AFTER INSERT ON community_posts
+    WHEN NOT COALESCE(new.is_deleted, 0) BEGIN
+        INSERT INTO community_search(rowid, kind, ref_id, post_id, card_master_id, title, body)
+        VALUES (new.id * 2, 'post', new.id, new.id, new.card_master_id, new.title, COALESCE(new.body, ''));
+    END
+    """,
+    # Vote and counter updates do not touch these columns, so they never reindex
+    """
+    CREATE TRIGGER IF NOT EXISTS community_search_post_update
+    AFTER UPDATE OF title, body, is_deleted, card_master_id ON community_posts BEGIN
+        DELETE FROM community_search WHERE rowid = old.id * 2;
+        INSERT INTO community_search(rowid, kind, ref_id, post_id, card_master_id, title, body)
+        SELECT new.id * 2, 'post', new.id, new.id, new.card_master_id, new.title, COALESCE(new.body, '')
+        WHERE NOT COALESCE(new.is_deleted, 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS community_search_post_delete AFTER DELETE ON community_posts BEGIN
+        DELETE FROM community_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS community_search_comment_insert AFTER INSERT ON community_comments
+    WHEN NOT COALESCE(new.is_deleted, 0) BEGIN
+        INSERT INTO community_search(rowid, kind, ref_id, post_id, card_master_id, title, body)
+        SELECT new.id * 2 + 1, 'comment', new.id, new.post_id, p.card_master_id, '', new.body
+        FROM community_posts p WHERE p.id = new.post_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS community_search_comment_update
+    AFTER UPDATE OF body, is_deleted ON community_comments BEGIN
+        DELETE FROM community_search WHERE rowid = old.id * 2 + 1;
+        INSERT INTO community_search(rowid, kind, ref_id, post_id, card_master_id, title, body)
+        SELECT new.id * 2 + 1, 'comment', new.id, new.post_id, p.card_master_id, '', new.body
+        FROM community_posts p WHERE p.id = new.post_id AND NOT COALESCE(new.is_deleted, 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS community_search_comment_delete AFTER DELETE ON community_comments BEGIN
+        DELETE FROM community_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+_BACKFILL = [
+    """
+    INSERT INTO community_search(rowid, kind, ref_id, post_id, card_master_id, title, body)
+    SELECT id * 2, 'post', id, id, card_master_id, title, COALESCE(body, '')
+    FROM community_posts WHERE NOT COALESCE(is_deleted, 0)
+    """,
+    """
+    INSERT INTO community_search(rowid, kind, ref_id, post_id, card_master_id, title, body)
+    SELECT c.id * 2 + 1, 'comment', c.id, c.post_id, p.card_master_id, '', c.body
+    FROM community_comments c JOIN community_posts p ON p.id = c.post_id
+    WHERE NOT COALESCE(c.is_deleted, 0)
+    """,
+]
+
+# The best bm25 candidates, blended with votes: net votes add a saturating boost of at most
+# vote_weight, so relevance still dominates and the work per query is bounded by the candidate cap
+_SEARCH = """
+    SELECT * FROM (
+        SELECT m.rowid AS rowid, m.kind, m.ref_id, m.post_id, m.card_master_id, m.net_votes,
+               -m.rank + :vote_weight * (m.net_votes * 1.0 / (ABS(m.net_votes) + 10)) AS score
+        FROM (
+            SELECT s.rowid AS rowid, s.kind, s.ref_id, s.post_id, s.card_master_id, s.rank AS rank,
+                   CASE WHEN s.kind = 'comment'
+                        THEN COALESCE(c.upvotes, 0) - COALESCE(c.downvotes, 0)
+                        ELSE COALESCE(p.upvotes, 0) - COALESCE(p.downvotes, 0) END AS net_votes
+            FROM community_search s
+            JOIN community_posts p ON p.id = s.post_id
+            LEFT JOIN community_comments c ON s.kind = 'comment' AND c.id = s.ref_id
+            WHERE community_search MATCH :query AND NOT COALESCE(p.is_deleted, 0) {card_filter}
+            ORDER BY s.rank
+            LIMIT :candidates
+        ) m
+    ) ranked
+    {cursor_filter}
+    ORDER BY score DESC, rowid
+    LIMIT :limit
+"""
+
+# Snippets only for the page being returned; \x02/\x03 mark hits until the text is HTML-escaped
+_SNIPPETS = """
+    SELECT rowid,
+           snippet(community_search, 4, char(2), char(3), '…', 12) AS title_snippet,
+           snippet(community_search, 5, char(2), char(3), '…', 24) AS body_snippet
+    FROM community_search
+    WHERE community_search MATCH :query AND rowid IN ({rowids})
+"""
+
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a snippet and turn its hit markers into <mark> tags"""
+    return html.escape(snippet or "").replace("\x02", "<mark>").replace("\x03", "</mark>")
+
+
+def build_match_query(text_query: str) -> Optional[str]:
+    """FTS5 MATCH expression: every word must appear; the last one may be partial"""
+    words = _WORD.findall(text_query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def encode_cursor(score: float, rowid: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, rowid]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        score, rowid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(rowid)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class CommunitySearchService:
+    """
+    Full-text search over community posts and comments.
+    On SQLite an FTS5 index kept in sync by triggers serves it; other databases fall back to a
+    LIKE search over post titles and bodies.
+    """
+
+    def __init__(self):
+        self.candidates = settings.COMMUNITY_SEARCH_CANDIDATES
+        self.vote_weight = settings.COMMUNITY_SEARCH_VOTE_WEIGHT
+        self.fts_enabled = False
+
+    def ensure_index(self, db: Session) -> bool:
+        """Create the FTS5 table and triggers if missing and index existing rows once"""
+        if db.get_bind().dialect.name != "sqlite":
+            logger.info("Community search: FTS5 needs SQLite, using LIKE search")
+            return False
+        try:
+            exists = db.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'community_search'"
+            )).first()
+            if not exists:
+                for statement in _SCHEMA + _BACKFILL:
+                    db.execute(text(statement))
+                db.commit()
+                logger.info("✅ Built community search index")
+            self.fts_enabled = True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Community search index unavailable, using LIKE search: {e}")
+            self.fts_enabled = False
+        return self.fts_enabled
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        card_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """One page of matching posts and comments, best first, with the cursor for the next page"""
+        match = build_match_query(query)
+        if not match:
+            return {"results": [], "next_cursor": None}
+        after = decode_cursor(cursor) if cursor else None
+        if self.fts_enabled:
+            rows = self._search_fts(db, match, card_id, after, limit + 1)
+        else:
+            rows = self._search_like(db, query, card_id, after, limit + 1)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        post_titles = dict(db.query(CommunityPost.id, CommunityPost.title).filter(
+            CommunityPost.id.in_({row["post_id"] for row in rows})
+        ).all()) if rows else {}
+
+        results = []
+        for row in rows:
+            results.append({
+                "kind": row["kind"],
+                "post_id": row["post_id"],
+                "comment_id": row["ref_id"] if row["kind"] == "comment" else None,
+                "card_master_id": row["card_master_id"],
+                "post_title": post_titles.get(row["post_id"]),
+                "title_snippet": row.get("title_snippet") or "",
+                "snippet": row.get("body_snippet") or "",
+                "net_votes": row["net_votes"],
+                "score": round(row["score"], 4),
+            })
+        last = rows[-1] if rows else None
+        return {
+            "results": results,
+            "next_cursor": encode_cursor(last["score"], last["rowid"]) if has_more else None,
+        }
+
+    def _search_fts(
+        self,
+        db: Session,
+        match: str,
+        card_id: Optional[int],
+        after: Optional[Tuple[float, int]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {
+            "query": match, "vote_weight": self.vote_weight, "candidates": self.candidates, "limit": limit,
+        }
+        card_filter = ""
+        if card_id is not None:
+            card_filter = "AND s.card_master_id = :card_id"
+            params["card_id"] = card_id
+        cursor_filter = ""
+        if after is not None:
+            cursor_filter = "WHERE score < :after_score OR (score = :after_score AND rowid > :after_rowid)"
+            params["after_score"], params["after_rowid"] = after
+
+        statement = _SEARCH.format(card_filter=card_filter, cursor_filter=cursor_filter)
+        rows = [dict(row._mapping) for row in db.execute(text(statement), params)]
+        if rows:
+            rowids = ", ".join(str(int(row["rowid"])) for row in rows)
+            snippets = {
+                snippet.rowid: snippet
+                for snippet in db.execute(text(_SNIPPETS.format(rowids=rowids)), {"query": match})
+            }
+            for row in rows:
+                snippet = snippets.get(row["rowid"])
+                row["title_snippet"] = highlight(snippet.title_snippet) if snippet else ""
+                row["body_snippet"] = highlight(snippet.body_snippet) if snippet else ""
+        return rows
+
+    def _search_like(
+        self,
+        db: Session,
+        query: str,
+        card_id: Optional[int],
+        after: Optional[Tuple[float, int]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Posts containing the text, by net votes; no comment hits or ranking by relevance"""
+        net_votes = CommunityPost.upvotes - CommunityPost.downvotes
+        rowid = CommunityPost.id * 2
+        pattern = f"%{query.strip()}%"
+        posts = db.query(CommunityPost).filter(
+            CommunityPost.is_deleted == False,
+            or_(CommunityPost.title.ilike(pattern), CommunityPost.body.ilike(pattern))
+        )
+        if card_id is not None:
+            posts = posts.filter(CommunityPost.card_master_id == card_id)
+        if after is not None:
+            after_score, after_rowid = after
+            posts = posts.filter(or_(net_votes < after_score, and_(net_votes == after_score, rowid > after_rowid)))
+        posts = posts.order_by(net_votes.desc(), CommunityPost.id).limit(limit).all()
+        return [
+            {
+                "rowid": post.id * 2, "kind": "post", "ref_id": post.id, "post_id": post.id,
+                "card_master_id": post.card_master_id, "net_votes": post.net_votes,
+                "score": float(post.net_votes), "title_snippet": html.escape(post.title),
+                "body_snippet": html.escape((post.body or "")[:200]),
+            }
+            for post in posts
+        ]
+
+
+# Global instance
+community_search_service = CommunitySearchService()
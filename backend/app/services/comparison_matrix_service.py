@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.allowed_names import ORDERED_CATEGORIES, ORDERED_MERCHANTS
+from app.core.catalog_events import CatalogChange, catalog_event_bus
+from app.core.config import settings
+from app.models.card_master_data import CardMasterData
+from app.schemas.card_master_data import CardComparisonData
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical_rewards(rows, name_attr: str, ordered_names: List[str]) -> Dict[str, str]:
+    """reward_display per canonical name in page order, from one pass over a card's reward rows"""
+    found: Dict[str, str] = {}
+    for row in rows:
+        if row.is_active:
+            # First active row wins, as the comparison page always showed
+            found.setdefault(getattr(row, name_attr).lower().strip(), row.reward_display)
+    return {name: found[name] for name in ordered_names if name in found}
+
+
+def build_comparison_row(card: CardMasterData) -> CardComparisonData:
+    """One card's row of the comparison matrix: card fields plus the 30 canonical reward columns"""
+    categories = _canonical_rewards(card.spending_categories, "category_name", ORDERED_CATEGORIES)
+    merchants = _canonical_rewards(card.merchant_rewards, "merchant_name", ORDERED_MERCHANTS)
+    return CardComparisonData(
+        id=card.id,
+        bank_name=card.bank_name,
+        card_name=card.card_name,
+        display_name=card.display_name,
+        joining_fee_display=card.joining_fee_display,
+        annual_fee_display=card.annual_fee_display,
+        annual_fee_waiver_spend=card.annual_fee_waiver_spend,
+        domestic_lounge_visits=card.domestic_lounge_visits,
+        international_lounge_visits=card.international_lounge_visits,
+        lounge_spend_requirement=card.lounge_spend_requirement,
+        lounge_spend_period=card.lounge_spend_period,
+        categories=categories,
+        merchants=merchants,
+    )
+
+
+class ComparisonMatrixService:
+    """
+    In-memory snapshot of the comparison matrix (every card x canonical category/merchant columns).
+    Built once, then patched one card at a time as catalog change events arrive, so requests only slice it.
+    """
+
+    def __init__(self):
+        self.rows: Dict[int, CardComparisonData] = {}
+        self.active_rows: List[CardComparisonData] = []
+        self.built_at: Optional[float] = None
+        self.max_age = settings.COMPARISON_MATRIX_MAX_AGE_SECONDS
+        self._dirty: Set[int] = set()
+        self._active_ids: Set[int] = set()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+        catalog_event_bus.subscribe(self._on_catalog_change)
+
+    def _card_query(self, db: Session):
+        return db.query(CardMasterData).options(
+            selectinload(CardMasterData.spending_categories),
+            selectinload(CardMasterData.merchant_rewards)
+        )
+
+    def rebuild(self, db: Session) -> int:
+        """Build the whole matrix from scratch"""
+        cards = self._card_query(db).order_by(CardMasterData.id).all()
+        rows = {card.id: build_comparison_row(card) for card in cards}
+        active_ids = {card.id for card in cards if card.is_active}
+        with self._lock:
+            self.rows = rows
+            self._active_ids = active_ids
+            self._reindex()
+            self.built_at = time.monotonic()
+        logger.info(f"✅ Built comparison matrix for {len(rows)} cards")
+        return len(rows)
+
+    def patch_cards(self, db: Session, card_ids: Iterable[int]) -> int:
+        """Rebuild only the rows of the given cards; deleted cards drop out of the matrix"""
+        card_ids = set(card_ids)
+        if not card_ids:
+            return 0
+        cards = self._card_query(db).filter(CardMasterData.id.in_(card_ids)).all()
+        fresh = {card.id: build_comparison_row(card) for card in cards}
+        with self._lock:
+            rows = dict(self.rows)
+            active_ids = set(self._active_ids)
+            for card_id in card_ids:
+                rows.pop(card_id, None)
+                active_ids.discard(card_id)
+            rows.update(fresh)
+            active_ids.update(card.id for card in cards if card.is_active)
+            self.rows = rows
+            self._active_ids = active_ids
+            self._reindex()
+        return len(card_ids)
+
+    def _reindex(self):
+        # Swapped in whole so readers slicing the previous list are never disturbed
+        self.active_rows = [self.rows[card_id] for card_id in sorted(self._active_ids)]
+
+    def _needs_rebuild(self) -> bool:
+        # The age bound also picks up changes committed by other workers
+        return self.built_at is None or time.monotonic() - self.built_at > self.max_age
+
+    def ensure_fresh(self, db: Session):
+        """Build on first use or when too old, otherwise apply pending per-card patches"""
+        if self._needs_rebuild():
+            with self._build_lock:
+                # Concurrent first requests wait for one build instead of each running their own
+                if self._needs_rebuild():
+                    self.rebuild(db)
+                    return
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if dirty:
+            try:
+                self.patch_cards(db, dirty)
+            except Exception:
+                with self._lock:
+                    self._dirty |= dirty
+                raise
+
+    def get_rows(self, db: Session, card_ids: Optional[Iterable[int]] = None) -> List[CardComparisonData]:
+        """Every active card's row, or the rows of specific cards in id order"""
+        self.ensure_fresh(db)
+        if card_ids is None:
+            return self.active_rows
+        rows = self.rows
+        return [rows[card_id] for card_id in sorted(set(card_ids)) if card_id in rows]
+
+    async def _on_catalog_change(self, change: CatalogChange):
+        """Mark changed cards for patching on the next read"""
+        with self._lock:
+            self._dirty |= change.card_ids
+
+
+# Global instance
+comparison_matrix_service = ComparisonMatrixService()
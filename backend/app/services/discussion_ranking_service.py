@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import case, extract, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.community import CommunityComment, CommunityPost
+
+logger = logging.getLogger(__name__)
+
+# New posts get up to 12 bonus points, fading linearly over their first day
+RECENCY_WINDOW_HOURS = 24
+RECENCY_POINTS_PER_HOUR = 0.5
+
+
+def engagement_score(post: CommunityPost) -> float:
+    """Vote and discussion activity: upvotes x2, downvotes x-1, comments x3, replies x1.5"""
+    return (
+        (post.upvotes or 0) * 2
+        - (post.downvotes or 0)
+        + (post.comment_count or 0) * 3
+        + (post.reply_count or 0) * 1.5
+    )
+
+
+def recency_bonus(created_at: Optional[datetime], now: datetime) -> float:
+    if created_at is None:
+        # Not flushed yet, so created just now
+        return RECENCY_WINDOW_HOURS * RECENCY_POINTS_PER_HOUR
+    hours_since_posted = (now - created_at.replace(tzinfo=None)).total_seconds() / 3600
+    return max(0.0, (RECENCY_WINDOW_HOURS - hours_since_posted) * RECENCY_POINTS_PER_HOUR)
+
+
+def engagement_expr():
+    """engagement_score as SQL over the post's own counters"""
+    return (
+        func.coalesce(CommunityPost.upvotes, 0) * 2
+        - func.coalesce(CommunityPost.downvotes, 0)
+        + func.coalesce(CommunityPost.comment_count, 0) * 3
+        + func.coalesce(CommunityPost.reply_count, 0) * 1.5
+    )
+
+
+def recency_bonus_expr(dialect_name: str):
+    """recency_bonus as SQL over the post's created_at, measured against the database clock (UTC)"""
+    if dialect_name == "sqlite":
+        hours_since_posted = (func.julianday("now") - func.julianday(CommunityPost.created_at)) * 24
+    else:
+        hours_since_posted = extract("epoch", func.now() - CommunityPost.created_at) / 3600
+    bonus = (RECENCY_WINDOW_HOURS - hours_since_posted) * RECENCY_POINTS_PER_HOUR
+    return case((bonus > 0, bonus), else_=0.0)
+
+
+class DiscussionRankingService:
+    """
+    Keeps the stored engagement and hot scores on community posts current.
+    Writes rescore the post they touch; a periodic decay pass lowers the recency bonus of posts
+    that still carry one, so top discussions are a single indexed query on hot_score.
+    """
+
+    def __init__(self):
+        self.decay_interval = settings.DISCUSSION_DECAY_INTERVAL_SECONDS
+        self._decay_task: Optional[asyncio.Task] = None
+
+    def rescore(self, post: CommunityPost, now: Optional[datetime] = None):
+        """Recompute a post's scores from its counters; the caller commits"""
+        now = now or datetime.utcnow()
+        post.engagement_score = engagement_score(post)
+        post.hot_score = post.engagement_score + recency_bonus(post.created_at, now)
+
+    def rescore_in_place(self, db: Session, post_id: int):
+        """Rescore a post in SQL after its counters were changed by atomic updates, keeping its recency bonus"""
+        score = engagement_expr()
+        # SET expressions read the row as it was, so hot_score - engagement_score is the current bonus
+        db.query(CommunityPost).filter(CommunityPost.id == post_id).update({
+            CommunityPost.engagement_score: score,
+            CommunityPost.hot_score: func.coalesce(CommunityPost.hot_score, 0)
+            - func.coalesce(CommunityPost.engagement_score, 0) + score,
+        }, synchronize_session=False)
+
+    def decay(self, db: Session) -> int:
+        """Rescore posts inside the recency window or still carrying a bonus, however long runs were missed"""
+        window_start = datetime.utcnow() - timedelta(hours=RECENCY_WINDOW_HOURS)
+        # One UPDATE computed from each row's current counters, so concurrent votes are never overwritten.
+        # Once a post's bonus reaches zero its hot_score equals engagement_score and it drops out.
+        updated = db.query(CommunityPost).filter(or_(
+            CommunityPost.created_at >= window_start,
+            func.coalesce(CommunityPost.hot_score, 0) != func.coalesce(CommunityPost.engagement_score, 0)
+        )).update({
+            CommunityPost.engagement_score: engagement_expr(),
+            CommunityPost.hot_score: engagement_expr() + recency_bonus_expr(db.get_bind().dialect.name),
+        }, synchronize_session=False)
+        db.commit()
+        return updated
+
+    def comment_added(self, db: Session, post_id: int, is_reply: bool):
+        """Count a new comment on its post with SQL increments and rescore it; the caller commits"""
+        values = {CommunityPost.comment_count: func.coalesce(CommunityPost.comment_count, 0) + 1}
+        if is_reply:
+            values[CommunityPost.reply_count] = func.coalesce(CommunityPost.reply_count, 0) + 1
+        db.query(CommunityPost).filter(CommunityPost.id == post_id).update(values, synchronize_session=False)
+        self.rescore_in_place(db, post_id)
+
+    def recount_comments(self, db: Session, post_id: int):
+        """Resync a post's comment and reply counters from its live comments and rescore it; the caller commits"""
+        live = select(func.count(CommunityComment.id)).where(
+            CommunityComment.post_id == post_id,
+            CommunityComment.is_deleted == False
+        )
+        db.query(CommunityPost).filter(CommunityPost.id == post_id).update({
+            CommunityPost.comment_count: live.scalar_subquery(),
+            CommunityPost.reply_count: live.where(CommunityComment.parent_id.isnot(None)).scalar_subquery(),
+        }, synchronize_session=False)
+        self.rescore_in_place(db, post_id)
+
+    def top_posts(
+        self,
+        db: Session,
+        limit: int,
+        days_back: Optional[int] = None,
+        min_score: float = 0,
+    ) -> List[CommunityPost]:
+        """Highest hot_score posts, optionally only recent ones"""
+        query = db.query(CommunityPost).filter(
+            CommunityPost.is_deleted == False,
+            CommunityPost.hot_score >= min_score
+        )
+        if days_back:
+            query = query.filter(CommunityPost.created_at >= datetime.utcnow() - timedelta(days=days_back))
+        return query.order_by(CommunityPost.hot_score.desc(), CommunityPost.id.desc()).limit(limit).all()
+
+    def start_decay(self, interval: Optional[float] = None):
+        """Run the decay pass on a timer in the current event loop"""
+        if self._decay_task and not self._decay_task.done():
+            return
+        self._decay_task = asyncio.create_task(self._decay_loop(interval or self.decay_interval))
+
+    async def stop_decay(self):
+        if self._decay_task:
+            self._decay_task.cancel()
+            try:
+                await self._decay_task
+            except asyncio.CancelledError:
+                pass
+            self._decay_task = None
+
+    async def _decay_loop(self, interval: float):
+        while True:
+            try:
+                await asyncio.to_thread(self._decay_once)
+            except Exception as e:
+                logger.error(f"Discussion score decay error: {e}")
+            await asyncio.sleep(interval)
+
+    def _decay_once(self):
+        db = SessionLocal()
+        try:
+            self.decay(db)
+        finally:
+            db.close()
+
+
+# Global instance
+discussion_ranking_service = DiscussionRankingService()
@@ -0,0 +1,66 @@
+import logging
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.card_master_data import CardMasterData
+from app.models.community import PostVote
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class PageHydrator:
+    """
+    Batch loader for what a page of listing rows refers to: authors, the caller's votes and card names.
+    Callers collect ids from the whole page and make one IN (...) query per kind instead of a lazy load
+    or lookup per row. Results are remembered, so asking again for ids already loaded costs nothing.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._users: Dict[int, Optional[User]] = {}
+        self._card_names: Dict[int, Optional[str]] = {}
+        self._post_votes: Dict[tuple, Optional[str]] = {}
+
+    def _missing(self, ids: Iterable[Optional[int]], loaded: Dict) -> set:
+        return {id_ for id_ in ids if id_ is not None and id_ not in loaded}
+
+    def users(self, user_ids: Iterable[Optional[int]]) -> Dict[int, Optional[User]]:
+        """Users by id; ids without a user map to None"""
+        user_ids = list(user_ids)
+        missing = self._missing(user_ids, self._users)
+        if missing:
+            found = {user.id: user for user in self.db.query(User).filter(User.id.in_(missing)).all()}
+            for user_id in missing:
+                self._users[user_id] = found.get(user_id)
+        return {user_id: self._users.get(user_id) for user_id in user_ids if user_id is not None}
+
+    def card_names(self, card_ids: Iterable[Optional[int]]) -> Dict[int, Optional[str]]:
+        """'Bank Card' display names by card id"""
+        card_ids = list(card_ids)
+        missing = self._missing(card_ids, self._card_names)
+        if missing:
+            rows = self.db.query(
+                CardMasterData.id, CardMasterData.bank_name, CardMasterData.card_name
+            ).filter(CardMasterData.id.in_(missing)).all()
+            found = {card_id: f"{bank_name} {card_name}" for card_id, bank_name, card_name in rows}
+            for card_id in missing:
+                self._card_names[card_id] = found.get(card_id)
+        return {card_id: self._card_names.get(card_id) for card_id in card_ids if card_id is not None}
+
+    def post_votes(self, user: Optional[User], post_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """The user's vote type on each post; empty for anonymous callers"""
+        if user is None:
+            return {}
+        post_ids = list(post_ids)
+        missing = {post_id for post_id in post_ids if (user.id, post_id) not in self._post_votes}
+        if missing:
+            rows = self.db.query(PostVote.post_id, PostVote.vote_type).filter(
+                PostVote.user_id == user.id,
+                PostVote.post_id.in_(missing)
+            ).all()
+            found = dict(rows)
+            for post_id in missing:
+                self._post_votes[(user.id, post_id)] = found.get(post_id)
+        return {post_id: self._post_votes[(user.id, post_id)] for post_id in post_ids}
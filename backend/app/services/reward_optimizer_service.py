@@ -0,0 +1,412 @@
+"""
+Cap-aware reward optimiser for a user's card portfolio.
+Splits a monthly spend vector (15 categories + 15 merchants) across the user's cards,
+honouring reward caps, minimum transaction amounts and annual-fee waiver thresholds.
+The allocation core works on padded (users, cards, slots) arrays so a whole batch of
+users is optimised in one set of NumPy operations.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.allowed_names import ORDERED_CATEGORIES, ORDERED_MERCHANTS
+from app.models.card_master_data import CardMasterData
+from app.models.credit_card import CreditCard
+
+logger = logging.getLogger(__name__)
+
+# Spend slots in vector order: every category, then every merchant
+SPEND_SLOTS: List[Tuple[str, str]] = (
+    [("category", name) for name in ORDERED_CATEGORIES] + [("merchant", name) for name in ORDERED_MERCHANTS]
+)
+SLOT_INDEX: Dict[str, int] = {name: i for i, (_, name) in enumerate(SPEND_SLOTS)}
+NUM_SLOTS = len(SPEND_SLOTS)
+
+# Category a merchant's spend falls back to when a card has no merchant-specific rate
+MERCHANT_CATEGORY: Dict[str, str] = {
+    "amazon": "online shopping",
+    "flipkart": "online shopping",
+    "myntra": "online shopping",
+    "nykaa": "online shopping",
+    "ajio": "online shopping",
+    "swiggy": "food delivery",
+    "zomato": "food delivery",
+    "bigbasket": "grocery",
+    "blinkit": "grocery",
+    "uber": "travel",
+    "ola": "travel",
+    "bookmyshow": "entertainment",
+    "netflix": "entertainment",
+    "phonepe": "wallets",
+    "airtel": "utilities",
+}
+
+# Base rate for anything a card has no specific rule for
+BASE_CATEGORY = "offline spends"
+
+# Reward caps are stored per period; the optimiser works in months
+CAP_PERIOD_MONTHS: Dict[str, float] = {
+    "monthly": 1,
+    "quarterly": 3,
+    "yearly": 12,
+    "annual": 12,
+    "annually": 12,
+}
+
+# Legacy per-card rate columns for cards not linked to master data
+USER_CARD_RATE_COLUMNS: Dict[str, str] = {
+    "dining": "reward_rate_dining",
+    "grocery": "reward_rate_groceries",
+    "travel": "reward_rate_travel",
+    "online shopping": "reward_rate_online_shopping",
+    "fuel": "reward_rate_fuel",
+    "entertainment": "reward_rate_entertainment",
+}
+
+
+@dataclass
+class CardRewardProfile:
+    """Per-slot reward terms of one card, aligned with SPEND_SLOTS"""
+    card_id: int
+    card_name: str
+    rates: np.ndarray  # percent
+    reward_caps: np.ndarray  # max reward per month, inf when uncapped
+    min_transaction: np.ndarray  # minimum ticket size to earn the rate
+    annual_fee: float = 0.0
+    fee_waiver_spend: Optional[float] = None  # annual spend that waives the fee
+
+
+def _monthly_cap(reward_cap: Optional[float], period: Optional[str]) -> float:
+    if not reward_cap or reward_cap <= 0:
+        return np.inf
+    return reward_cap / CAP_PERIOD_MONTHS.get((period or "monthly").lower(), 1)
+
+
+def profile_from_master(card_id: int, card_name: str, master: CardMasterData) -> CardRewardProfile:
+    """Build slot vectors from a master card's category and merchant reward rows"""
+    categories = {row.category_name.lower(): row for row in master.spending_categories if row.is_active}
+    merchants = {row.merchant_name.lower(): row for row in master.merchant_rewards if row.is_active}
+    base = categories.get(BASE_CATEGORY)
+
+    rates = np.zeros(NUM_SLOTS)
+    reward_caps = np.full(NUM_SLOTS, np.inf)
+    min_transaction = np.zeros(NUM_SLOTS)
+
+    for i, (dimension, name) in enumerate(SPEND_SLOTS):
+        if dimension == "merchant":
+            row = merchants.get(name) or categories.get(MERCHANT_CATEGORY.get(name, "")) or base
+        else:
+            row = categories.get(name) or base
+        if row is None:
+            continue
+        rates[i] = row.reward_rate or 0.0
+        reward_caps[i] = _monthly_cap(row.reward_cap, row.reward_cap_period)
+        min_transaction[i] = row.minimum_transaction_amount or 0.0
+
+    annual_fee = 0.0 if master.is_lifetime_free else (master.annual_fee or 0.0)
+    return CardRewardProfile(
+        card_id=card_id,
+        card_name=card_name,
+        rates=rates,
+        reward_caps=reward_caps,
+        min_transaction=min_transaction,
+        annual_fee=annual_fee,
+        fee_waiver_spend=master.annual_fee_waiver_spend,
+    )
+
+
+def profile_from_user_card(card: CreditCard) -> CardRewardProfile:
+    """Build slot vectors from the legacy reward_rate_* columns of an unlinked user card"""
+    general = card.reward_rate_general or 0.0
+    category_rates = {
+        category: getattr(card, column) for category, column in USER_CARD_RATE_COLUMNS.items()
+        if getattr(card, column) is not None
+    }
+
+    rates = np.full(NUM_SLOTS, general)
+    for i, (dimension, name) in enumerate(SPEND_SLOTS):
+        category = MERCHANT_CATEGORY.get(name) if dimension == "merchant" else name
+        if category in category_rates:
+            rates[i] = category_rates[category]
+
+    return CardRewardProfile(
+        card_id=card.id,
+        card_name=card.card_name,
+        rates=rates,
+        reward_caps=np.full(NUM_SLOTS, np.inf),
+        min_transaction=np.zeros(NUM_SLOTS),
+        annual_fee=card.annual_fee or 0.0,
+    )
+
+
+def spend_vector(spend: Dict[str, float]) -> np.ndarray:
+    """Map {category/merchant name: monthly amount} onto SPEND_SLOTS order"""
+    vector = np.zeros(NUM_SLOTS)
+    for name, amount in spend.items():
+        key = name.strip().lower()
+        if key not in SLOT_INDEX:
+            raise ValueError(f"Unknown spend category or merchant: '{name}'")
+        if amount < 0:
+            raise ValueError(f"Spend for '{name}' cannot be negative")
+        vector[SLOT_INDEX[key]] = amount
+    return vector
+
+
+def allocate_spend(spend: np.ndarray, rates: np.ndarray, spend_caps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Greedy water-filling of spend (U, S) across cards (U, C, S).
+    Each slot's spend goes to the highest-rate card until its cap is used up, then overflows
+    to the next card. Returns the allocation (U, C, S) and the spend no card rewards (U, S).
+    """
+    order = np.argsort(-rates, axis=1, kind="stable")
+    sorted_caps = np.take_along_axis(spend_caps, order, axis=1)
+
+    # Spend already absorbed by higher-rate cards before each card in the order
+    filled_before = np.zeros_like(sorted_caps)
+    filled_before[:, 1:] = np.cumsum(sorted_caps, axis=1)[:, :-1]
+    sorted_alloc = np.minimum(np.maximum(spend[:, None, :] - filled_before, 0.0), sorted_caps)
+
+    allocation = np.zeros_like(sorted_alloc)
+    np.put_along_axis(allocation, order, sorted_alloc, axis=1)
+    overflow = np.maximum(spend - allocation.sum(axis=1), 0.0)
+    return allocation, overflow
+
+
+class RewardOptimizerService:
+    """Portfolio-level spend allocation that maximises net annual rewards"""
+
+    def load_profiles(self, db: Session, user_ids: List[int]) -> Dict[int, List[CardRewardProfile]]:
+        """Reward profiles of every active card for a set of users, in one query"""
+        cards = db.query(CreditCard).options(
+            selectinload(CreditCard.card_master_data).selectinload(CardMasterData.spending_categories),
+            selectinload(CreditCard.card_master_data).selectinload(CardMasterData.merchant_rewards),
+        ).filter(
+            CreditCard.user_id.in_(user_ids),
+            CreditCard.is_active == True
+        ).order_by(CreditCard.user_id, CreditCard.id).all()
+
+        profiles: Dict[int, List[CardRewardProfile]] = {user_id: [] for user_id in user_ids}
+        for card in cards:
+            if card.card_master_data:
+                profile = profile_from_master(card.id, card.card_name, card.card_master_data)
+            else:
+                profile = profile_from_user_card(card)
+            profiles[card.user_id].append(profile)
+        return profiles
+
+    def optimize(
+        self,
+        db: Session,
+        user_id: int,
+        spend: Dict[str, float],
+        ticket_sizes: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """Optimise one user's monthly spend across their portfolio"""
+        profiles = self.load_profiles(db, [user_id])
+        return self.optimize_profiles({user_id: profiles[user_id]}, {user_id: spend}, ticket_sizes)[user_id]
+
+    def optimize_batch(
+        self,
+        db: Session,
+        spends: Dict[int, Dict[str, float]],
+        batch_size: int = 1000
+    ) -> Dict[int, Dict[str, Any]]:
+        """Optimise many users, e.g. an overnight run, loading and solving batch_size users at a time"""
+        results: Dict[int, Dict[str, Any]] = {}
+        user_ids = list(spends)
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            profiles = self.load_profiles(db, chunk)
+            results.update(self.optimize_profiles(profiles, {user_id: spends[user_id] for user_id in chunk}))
+            logger.info(f"Optimised rewards for {min(start + batch_size, len(user_ids))}/{len(user_ids)} users")
+        return results
+
+    def optimize_profiles(
+        self,
+        profiles: Dict[int, List[CardRewardProfile]],
+        spends: Dict[int, Dict[str, float]],
+        ticket_sizes: Optional[Dict[str, float]] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Solve a batch of portfolios already loaded into profiles.
+        Slots missing from ticket_sizes (all of them without it) treat the slot's monthly spend as
+        one payment when checking minimum transaction amounts.
+        """
+        user_ids = list(spends)
+        num_cards = max((len(profiles.get(user_id, [])) for user_id in user_ids), default=0)
+        spend = np.stack([spend_vector(spends[user_id]) for user_id in user_ids]) if user_ids else np.zeros((0, NUM_SLOTS))
+        tickets = spend
+        if ticket_sizes:
+            given = spend_vector({name: 1 for name in ticket_sizes}) > 0
+            tickets = np.where(given, spend_vector(ticket_sizes), spend)
+
+        # Padded (U, C, S) arrays; padding cards have zero rate and zero capacity
+        shape = (len(user_ids), max(num_cards, 1), NUM_SLOTS)
+        rates = np.zeros(shape)
+        reward_caps = np.zeros(shape)
+        min_transaction = np.zeros(shape)
+        for u, user_id in enumerate(user_ids):
+            for c, profile in enumerate(profiles.get(user_id, [])):
+                rates[u, c] = profile.rates
+                reward_caps[u, c] = profile.reward_caps
+                min_transaction[u, c] = profile.min_transaction
+
+        # A rate only applies when the typical ticket clears the card's minimum transaction amount
+        eligible = (tickets[:, None, :] >= min_transaction) & (rates > 0)
+        rates = np.where(eligible, rates, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spend_caps = np.where(eligible, reward_caps / (rates / 100.0), 0.0)
+
+        allocation, overflow = allocate_spend(spend, rates, spend_caps)
+
+        results = {}
+        for u, user_id in enumerate(user_ids):
+            user_profiles = profiles.get(user_id, [])
+            count = len(user_profiles)
+            user_alloc = allocation[u, :count].copy()
+            user_overflow = overflow[u].copy()
+            self._apply_fee_waivers(user_profiles, user_alloc, user_overflow, rates[u, :count], spend_caps[u, :count])
+            results[user_id] = self._summarize(
+                user_id, user_profiles, user_alloc, user_overflow, rates[u, :count], reward_caps[u, :count]
+            )
+        return results
+
+    def _apply_fee_waivers(
+        self,
+        profiles: List[CardRewardProfile],
+        allocation: np.ndarray,
+        overflow: np.ndarray,
+        rates: np.ndarray,
+        spend_caps: np.ndarray
+    ):
+        """
+        Shift spend onto cards that are short of their fee-waiver threshold when the rewards
+        given up are worth less than the fee saved. Unrewarded overflow is moved first.
+        """
+        monthly_waiver = np.array([
+            (profile.fee_waiver_spend or 0.0) / 12.0 if profile.annual_fee > 0 and profile.fee_waiver_spend else 0.0
+            for profile in profiles
+        ])
+
+        for c in sorted(range(len(profiles)), key=lambda i: -profiles[i].annual_fee):
+            shortfall = monthly_waiver[c] - allocation[c].sum()
+            if monthly_waiver[c] <= 0 or shortfall <= 0:
+                continue
+
+            # Candidate moves: (reward lost per rupee, slot, donor card or -1 for overflow, amount)
+            room = np.maximum(spend_caps[c] - allocation[c], 0.0)
+            donor_surplus = np.where(
+                monthly_waiver > 0,
+                np.maximum(allocation.sum(axis=1) - monthly_waiver, 0.0),
+                np.inf
+            )
+            moves = []
+            for j in np.nonzero(overflow > 0)[0]:
+                moves.append((0.0, j, -1, overflow[j]))
+            for d in range(len(profiles)):
+                if d == c:
+                    continue
+                for j in np.nonzero(allocation[d] > 0)[0]:
+                    gain = rates[c, j] if room[j] > 0 else 0.0
+                    moves.append((max(rates[d, j] - gain, 0.0) / 100.0, j, d, allocation[d, j]))
+            moves.sort(key=lambda move: move[0])
+
+            planned = []
+            monthly_loss = 0.0
+            remaining = shortfall
+            for loss, j, d, amount in moves:
+                if remaining <= 0:
+                    break
+                if d >= 0:
+                    amount = min(amount, donor_surplus[d])
+                amount = min(amount, remaining)
+                if amount <= 0:
+                    continue
+                planned.append((j, d, amount))
+                monthly_loss += loss * amount
+                remaining -= amount
+                if d >= 0:
+                    donor_surplus[d] -= amount
+
+            if remaining > 0 or monthly_loss * 12 >= profiles[c].annual_fee:
+                continue
+
+            for j, d, amount in planned:
+                allocation[c, j] += amount
+                if d >= 0:
+                    allocation[d, j] -= amount
+                else:
+                    overflow[j] -= amount
+
+    def _summarize(
+        self,
+        user_id: int,
+        profiles: List[CardRewardProfile],
+        allocation: np.ndarray,
+        overflow: np.ndarray,
+        rates: np.ndarray,
+        reward_caps: np.ndarray
+    ) -> Dict[str, Any]:
+        """Per-card and per-slot breakdown with annual totals net of fees"""
+        if profiles:
+            # Unrewarded spend still has to go on a card; park it on the best-rate card for the slot
+            best_card = np.argmax(rates, axis=0)
+            allocation[best_card, np.arange(NUM_SLOTS)] += overflow
+            rewards = np.minimum(allocation * rates / 100.0, reward_caps)
+        else:
+            rewards = allocation
+
+        cards = []
+        fees_paid = 0.0
+        fees_waived = 0.0
+        for c, profile in enumerate(profiles):
+            monthly_spend = float(allocation[c].sum())
+            waived = bool(profile.fee_waiver_spend) and monthly_spend * 12 >= profile.fee_waiver_spend
+            if profile.annual_fee > 0:
+                if waived:
+                    fees_waived += profile.annual_fee
+                else:
+                    fees_paid += profile.annual_fee
+            cards.append({
+                "card_id": profile.card_id,
+                "card_name": profile.card_name,
+                "monthly_spend": round(monthly_spend, 2),
+                "monthly_reward": round(float(rewards[c].sum()), 2),
+                "annual_fee": profile.annual_fee,
+                "fee_waiver_spend": profile.fee_waiver_spend,
+                "fee_waived": waived,
+            })
+
+        allocations = []
+        for c, j in zip(*np.nonzero(allocation > 0)):
+            dimension, name = SPEND_SLOTS[j]
+            allocations.append({
+                "dimension": dimension,
+                "name": name,
+                "card_id": profiles[c].card_id,
+                "card_name": profiles[c].card_name,
+                "amount": round(float(allocation[c, j]), 2),
+                "reward_rate": float(rates[c, j]),
+                "reward": round(float(rewards[c, j]), 2),
+            })
+
+        monthly_reward = float(rewards.sum()) if profiles else 0.0
+        return {
+            "user_id": user_id,
+            "monthly_reward": round(monthly_reward, 2),
+            "annual_reward": round(monthly_reward * 12, 2),
+            "annual_fees_paid": round(fees_paid, 2),
+            "annual_fees_waived": round(fees_waived, 2),
+            "net_annual_value": round(monthly_reward * 12 - fees_paid, 2),
+            "unrewarded_monthly_spend": round(float(overflow.sum()), 2),
+            "cards": cards,
+            "allocations": allocations,
+        }
+
+
+# Global instance
+reward_optimizer_service = RewardOptimizerService()
@@ -0,0 +1,155 @@
+import logging
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.card_master_data import CardMasterData, CardSpendingCategory, CardMerchantReward
+from app.models.card_reward_ranking import CardRewardRanking
+from app.models.edit_suggestion import EditSuggestion
+
+logger = logging.getLogger(__name__)
+
+MERCHANT = "merchant"
+CATEGORY = "category"
+DIMENSIONS = (MERCHANT, CATEGORY)
+
+# Edit suggestion field types that change a ranked reward row
+SUGGESTION_DIMENSIONS = {
+    "merchant_reward": MERCHANT,
+    "merchant_reward_cap": MERCHANT,
+    "spending_category": CATEGORY,
+    "spending_category_cap": CATEGORY,
+}
+
+
+class RewardRankingService:
+    """Maintains the materialized top-N cards per merchant and per spending category"""
+
+    def __init__(self):
+        self.top_n = settings.REWARD_RANKING_TOP_N
+
+    def _reward_model(self, dimension: str):
+        """Reward table and name column backing a ranking dimension"""
+        if dimension == MERCHANT:
+            return CardMerchantReward, CardMerchantReward.merchant_name
+        if dimension == CATEGORY:
+            return CardSpendingCategory, CardSpendingCategory.category_name
+        raise ValueError(f"Unknown ranking dimension: {dimension}")
+
+    def _ranked_rows(self, db: Session, dimension: str, name: Optional[str] = None):
+        """Active (reward, card) pairs ordered by name, then reward rate"""
+        model, name_col = self._reward_model(dimension)
+        query = db.query(func.lower(name_col), model, CardMasterData).join(
+            CardMasterData, CardMasterData.id == model.card_master_id
+        ).filter(
+            model.is_active == True,
+            CardMasterData.is_active == True,
+            model.reward_rate > 0
+        )
+        if name is not None:
+            query = query.filter(func.lower(name_col) == name)
+        return query.order_by(func.lower(name_col), model.reward_rate.desc(), CardMasterData.id)
+
+    def _build_rankings(self, dimension: str, name: str, rows) -> List[CardRewardRanking]:
+        return [
+            CardRewardRanking(
+                dimension=dimension,
+                name=name,
+                rank=rank,
+                card_master_id=card.id,
+                bank_name=card.bank_name,
+                card_name=card.card_name,
+                reward_rate=reward.reward_rate,
+                reward_type=reward.reward_type,
+                reward_cap=reward.reward_cap,
+                reward_cap_period=reward.reward_cap_period,
+            )
+            for rank, (_, reward, card) in enumerate(rows, start=1)
+        ]
+
+    def refresh(self, db: Session, dimension: str, name: str) -> int:
+        """
+        Recompute the ranking for one merchant or category inside the caller's transaction.
+        The caller commits, so the ranking changes atomically with the reward rows it reflects.
+        """
+        name = name.lower()
+        # Sessions run with autoflush off; pending reward edits must be visible to the ranking query
+        db.flush()
+
+        db.query(CardRewardRanking).filter(
+            CardRewardRanking.dimension == dimension,
+            CardRewardRanking.name == name
+        ).delete(synchronize_session=False)
+
+        rows = self._ranked_rows(db, dimension, name).limit(self.top_n).all()
+        db.add_all(self._build_rankings(dimension, name, rows))
+        return len(rows)
+
+    def refresh_for_suggestion(self, db: Session, suggestion: EditSuggestion) -> int:
+        """Refresh the ranking touched by an approved edit suggestion, if any"""
+        dimension = SUGGESTION_DIMENSIONS.get(suggestion.field_type)
+        if not dimension:
+            return 0
+        return self.refresh(db, dimension, suggestion.field_name)
+
+    def card_ranking_keys(self, db: Session, card_id: int) -> List[Tuple[str, str]]:
+        """Every (dimension, name) ranking a card can appear in"""
+        keys = []
+        for dimension in DIMENSIONS:
+            model, name_col = self._reward_model(dimension)
+            names = db.query(func.lower(name_col)).filter(model.card_master_id == card_id).distinct().all()
+            keys.extend((dimension, name) for (name,) in names)
+        return keys
+
+    def refresh_keys(self, db: Session, keys: List[Tuple[str, str]]) -> int:
+        """Refresh a set of rankings, e.g. the keys captured before a card was deleted"""
+        for dimension, name in set(keys):
+            self.refresh(db, dimension, name)
+        return len(set(keys))
+
+    def refresh_for_card(self, db: Session, card_id: int) -> int:
+        """Refresh every ranking a card appears in, e.g. after it is activated or deactivated"""
+        return self.refresh_keys(db, self.card_ranking_keys(db, card_id))
+
+    def refresh_all(self, db: Session) -> int:
+        """Rebuild every ranking from scratch and commit"""
+        try:
+            db.query(CardRewardRanking).delete(synchronize_session=False)
+
+            total = 0
+            for dimension in DIMENSIONS:
+                for name, rows in groupby(self._ranked_rows(db, dimension), key=lambda row: row[0]):
+                    rankings = self._build_rankings(dimension, name, list(rows)[:self.top_n])
+                    db.add_all(rankings)
+                    total += len(rankings)
+
+            db.commit()
+            logger.info(f"✅ Rebuilt {total} card reward rankings")
+            return total
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Failed to rebuild card reward rankings: {e}")
+            raise
+
+    def ensure_built(self, db: Session) -> int:
+        """Build the rankings on first start when the table is still empty"""
+        if db.query(CardRewardRanking.id).first():
+            return 0
+        return self.refresh_all(db)
+
+    def get_rankings(self, db: Session, dimension: str, name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Top cards for a merchant or category as an indexed lookup"""
+        self._reward_model(dimension)
+        rankings = db.query(CardRewardRanking).filter(
+            CardRewardRanking.dimension == dimension,
+            CardRewardRanking.name == name.lower()
+        ).order_by(CardRewardRanking.rank).limit(limit or self.top_n).all()
+        return [ranking.to_dict() for ranking in rankings]
+
+
+# Global instance
+reward_ranking_service = RewardRankingService()
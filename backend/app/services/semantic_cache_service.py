@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.allowed_names import ORDERED_CATEGORIES, ORDERED_MERCHANTS
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "global"
+
+
+def user_scope(user_id: int) -> str:
+    """Cache scope for answers that depend on a single user's portfolio"""
+    return f"user:{user_id}"
+
+
+def _tag_field(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def entity_signature(query: str) -> str:
+    """
+    Canonical merchant/category names mentioned in a query, sorted and joined.
+    Two paraphrases only share a cached answer when they mention the same entities,
+    so "best card for amazon" never serves the Flipkart answer despite near-identical embeddings.
+    """
+    query_lower = query.lower()
+    entities = [
+        name for name in ORDERED_MERCHANTS + ORDERED_CATEGORIES
+        if re.search(rf"\b{re.escape(name)}\b", query_lower)
+    ]
+    return ",".join(sorted(entities))
+
+
+class SemanticCacheService:
+    """Answer cache keyed on query embeddings so paraphrased questions reuse earlier agent runs"""
+
+    def __init__(self, vector_service):
+        self.vector_service = vector_service
+        self.enabled = settings.CACHE_ENABLED and settings.SEMANTIC_CACHE_ENABLED
+        self.similarity_threshold = settings.SIMILARITY_THRESHOLD
+        self.ttl = settings.CACHE_TTL
+
+        # Cosine space so that 1 - distance is the cosine similarity used elsewhere
+        self.collection = vector_service.client.get_or_create_collection(
+            name=settings.SEMANTIC_CACHE_COLLECTION_NAME,
+            embedding_function=vector_service.embedding_function,
+            metadata={"description": "Semantic cache of SQL agent answers", "hnsw:space": "cosine"}
+        )
+
+    async def lookup(
+        self,
+        query: str,
+        query_embedding: List[float],
+        user_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached answer of the closest earlier question above the similarity threshold"""
+        if not self.enabled:
+            return None
+
+        try:
+            scopes = [{"scope": GLOBAL_SCOPE}]
+            if user_id:
+                scopes.append({"scope": user_scope(user_id)})
+            scope_filter = {"$or": scopes} if len(scopes) > 1 else scopes[0]
+
+            results = await asyncio.to_thread(
+                self.collection.query,
+                query_embeddings=[query_embedding],
+                n_results=1,
+                where={"$and": [scope_filter, {"entities": entity_signature(query)}]},
+                include=["metadatas", "distances"]
+            )
+
+            if not results["ids"] or not results["ids"][0]:
+                return None
+
+            entry_id = results["ids"][0][0]
+            metadata = results["metadatas"][0][0]
+            similarity = 1 - results["distances"][0][0]
+
+            if similarity < self.similarity_threshold:
+                return None
+
+            if time.time() - metadata.get("created_at", 0) > self.ttl:
+                await asyncio.to_thread(self.collection.delete, ids=[entry_id])
+                return None
+
+            logger.info(f"Semantic cache hit (similarity={similarity:.3f}) for: {query}")
+            return json.loads(metadata["payload"])
+
+        except Exception as e:
+            logger.error(f"Semantic cache lookup error: {e}")
+            return None
+
+    async def store(
+        self,
+        query: str,
+        query_embedding: List[float],
+        payload: Dict[str, Any],
+        scope: str = GLOBAL_SCOPE,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """Store an answer under the question's embedding, tagged with the catalog entities it depends on"""
+        if not self.enabled:
+            return False
+
+        try:
+            normalized_query = " ".join(query.lower().split())
+            entry_id = hashlib.md5(f"{scope}|{normalized_query}".encode()).hexdigest()
+
+            await asyncio.to_thread(
+                self.collection.upsert,
+                ids=[entry_id],
+                embeddings=[query_embedding],
+                documents=[query],
+                metadatas=[{
+                    "scope": scope,
+                    "entities": entity_signature(query),
+                    "created_at": time.time(),
+                    "payload": json.dumps(payload, default=str),
+                    # Chroma metadata is flat, so each tag becomes its own filterable key
+                    **{_tag_field(tag): 1 for tag in tags or []}
+                }]
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Semantic cache store error: {e}")
+            return False
+
+    async def invalidate_tags(self, tags: List[str]) -> bool:
+        """Drop every cached answer carrying any of the tags"""
+        if not tags:
+            return True
+
+        try:
+            filters = [{_tag_field(tag): 1} for tag in tags]
+            where = {"$or": filters} if len(filters) > 1 else filters[0]
+            await asyncio.to_thread(self.collection.delete, where=where)
+            return True
+
+        except Exception as e:
+            logger.error(f"Semantic cache tag invalidation error: {e}")
+            return False
+
+    async def clear(self) -> bool:
+        """Drop every cached answer"""
+        try:
+            existing = await asyncio.to_thread(self.collection.get, include=[])
+            if existing["ids"]:
+                await asyncio.to_thread(self.collection.delete, ids=existing["ids"])
+            return True
+
+        except Exception as e:
+            logger.error(f"Semantic cache clear error: {e}")
+            return False
@@ -1,8 +1,11 @@
+import asyncio
+from collections import OrderedDict
 import chromadb
 from chromadb.utils import embedding_functions
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 import logging
+import hashlib
 import json
 import yaml
 from datetime import datetime
@@ -35,6 +38,10 @@ class VectorService:
             model_name=settings.EMBEDDING_MODEL
         )
         
+        # Bounded LRU of query embeddings keyed by normalised text, shared by every collection query
+        self._embedding_memo: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._embedding_memo_size = settings.EMBEDDING_MEMO_SIZE
+        
         # Initialize only essential collections
         self._initialize_collections()
     
@@ -100,6 +107,27 @@ class VectorService:
             logger.error(f"❌ Failed to add document: {e}")
             raise
     
+    async def embed_query(self, query: str) -> List[float]:
+        """Compute the embedding for a query string, memoised so each distinct question is embedded once"""
+        key = " ".join(query.lower().split())
+        if key in self._embedding_memo:
+            self._embedding_memo.move_to_end(key)
+            return self._embedding_memo[key]
+        
+        embeddings = await asyncio.to_thread(self.embedding_function, [query])
+        embedding = list(embeddings[0])
+        
+        self._embedding_memo[key] = embedding
+        while len(self._embedding_memo) > self._embedding_memo_size:
+            self._embedding_memo.popitem(last=False)
+        return embedding
+
+    async def _query_input(self, query: str, query_embedding: Optional[List[float]]) -> Dict[str, Any]:
+        """Query collections by embedding so Chroma never re-embeds the same text per collection"""
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
+        return {"query_embeddings": [query_embedding]}
+
     def _compress_content(self, content: str, max_length: int = 1000) -> str:
         """Compress content to reduce storage size"""
         if len(content) <= max_length:
@@ -115,7 +143,8 @@ class VectorService:
         query: str,
         user_id: Optional[int] = None,
         limit: int = 5,
-        collection_name: str = "main"
+        collection_name: str = "main",
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """Search for relevant documents with optimized retrieval"""
         try:
@@ -124,9 +153,10 @@ class VectorService:
             # Optimize search by reducing results for better performance
             optimized_limit = min(limit, 3)  # Max 3 results for efficiency
             
-            # Search in main collection
-            results = collection.query(
-                query_texts=[query],
+            # Search in main collection; Chroma is blocking, so keep it off the event loop
+            results = await asyncio.to_thread(
+                collection.query,
+                **await self._query_input(query, query_embedding),
                 n_results=optimized_limit,
                 include=["documents", "metadatas", "distances"]
             )
@@ -232,7 +262,7 @@ class VectorService:
             raise ValueError(f"Unknown collection: {collection_name}")
 
     async def load_tuning_data(self) -> bool:
-        """Load tuning data from YAML file and store in vector database"""
+        """Sync tuning examples from the YAML file, re-embedding only examples whose content changed"""
         try:
             # Path to tuning data file
             tuning_file = Path(__file__).parent.parent / "data" / "tuning_data.yaml"
@@ -245,52 +275,86 @@ class VectorService:
             with open(tuning_file, 'r', encoding='utf-8') as f:
                 data = yaml.safe_load(f)
             
-            # Create or recreate tuning collection to ensure fresh data
-            try:
-                self.client.delete_collection(name="tuning_examples")
-            except:
-                pass  # Collection doesn't exist
-            
-            self.tuning_collection = self.client.create_collection(
+            # Passing metadata here would overwrite the stored one, so read it before deciding to rebuild
+            self.tuning_collection = self.client.get_or_create_collection(
                 name="tuning_examples",
-                embedding_function=self.embedding_function,
-                metadata={"description": "Tuning examples for credit card recommendations"}
+                embedding_function=self.embedding_function
             )
+            # Vectors from another embedding model can't be compared (or may not even share a dimension)
+            stored_model = (self.tuning_collection.metadata or {}).get("embedding_model")
+            if stored_model != settings.EMBEDDING_MODEL:
+                if stored_model:
+                    logger.info(f"Tuning examples were embedded with {stored_model}; rebuilding for {settings.EMBEDDING_MODEL}")
+                await asyncio.to_thread(self.client.delete_collection, "tuning_examples")
+                self.tuning_collection = self.client.create_collection(
+                    name="tuning_examples",
+                    embedding_function=self.embedding_function,
+                    metadata={
+                        "description": "Tuning examples for credit card recommendations",
+                        "embedding_model": settings.EMBEDDING_MODEL
+                    }
+                )
             
-            # Add each example to the vector database
-            for i, example in enumerate(data.get('tuning_examples', [])):
+            # Content-addressed ids (model included): unchanged examples keep their stored embeddings across restarts
+            desired = {}
+            for example in data.get('tuning_examples', []):
                 # Combine question, SQL query, and answer for embedding
                 content = f"Question: {example['question']}\nSQL Query: {example['sql_query']}\nAnswer: {example['answer']}"
-                
-                # Add to vector database
-                self.tuning_collection.add(
-                    documents=[content],
-                    metadatas=[{
-                        "type": "tuning_example",
-                        "category": example.get('category', 'general'),
-                        "question": example['question'],
-                        "sql_query": example['sql_query'],
-                        "answer": example['answer']
-                    }],
-                    ids=[f"tuning_{i}"]
+                category = example.get('category', 'general')
+                content_hash = hashlib.sha256(
+                    f"{settings.EMBEDDING_MODEL}\n{content}\n{category}".encode("utf-8")
+                ).hexdigest()
+                desired[f"tuning_{content_hash[:32]}"] = (content, {
+                    "type": "tuning_example",
+                    "category": category,
+                    "question": example['question'],
+                    "sql_query": example['sql_query'],
+                    "answer": example['answer'],
+                    "content_hash": content_hash
+                })
+            
+            existing = await asyncio.to_thread(self.tuning_collection.get, include=[])
+            existing_ids = set(existing["ids"])
+            stale_ids = sorted(existing_ids - set(desired))
+            new_ids = [doc_id for doc_id in desired if doc_id not in existing_ids]
+            
+            if stale_ids:
+                await asyncio.to_thread(self.tuning_collection.delete, ids=stale_ids)
+            
+            # One batched upsert embeds only the new or changed examples
+            if new_ids:
+                await asyncio.to_thread(
+                    self.tuning_collection.upsert,
+                    ids=new_ids,
+                    documents=[desired[doc_id][0] for doc_id in new_ids],
+                    metadatas=[desired[doc_id][1] for doc_id in new_ids]
                 )
             
-            logger.info(f"✅ Loaded {len(data.get('tuning_examples', []))} tuning examples")
+            logger.info(
+                f"✅ Synced {len(desired)} tuning examples "
+                f"({len(new_ids)} embedded, {len(stale_ids)} removed, {len(desired) - len(new_ids)} reused)"
+            )
             return True
             
         except Exception as e:
             logger.error(f"❌ Failed to load tuning data: {e}")
             return False
 
-    async def get_tuning_examples(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
+    async def get_tuning_examples(
+        self,
+        query: str,
+        limit: int = 3,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
         """Get relevant tuning examples for a query"""
         try:
             if not hasattr(self, 'tuning_collection'):
                 return []
             
             # Search for relevant examples
-            results = self.tuning_collection.query(
-                query_texts=[query],
+            results = await asyncio.to_thread(
+                self.tuning_collection.query,
+                **await self._query_input(query, query_embedding),
                 n_results=limit,
                 include=["documents", "metadatas", "distances"]
             )
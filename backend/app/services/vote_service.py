@@ -0,0 +1,120 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.community import CommunityComment, CommunityPost, CommentVote, PostVote
+from app.services.discussion_ranking_service import discussion_ranking_service
+
+logger = logging.getLogger(__name__)
+
+# Vote type -> counter column on the voted row
+COUNTERS = {"upvote": "upvotes", "downvote": "downvotes"}
+
+
+@dataclass
+class VoteResult:
+    """The vote row a request acted on, captured before commit"""
+
+    id: int
+    vote_type: str
+    created_at: Optional[datetime]
+    action: str  # "added", "removed" or "changed"
+
+
+class VoteService:
+    """
+    Toggle-style voting with one vote row per (user, target) and counters changed by atomic SQL.
+    Voting the same way again removes the vote (the frontend's un-vote click); voting the other way
+    switches it. A first vote that loses the insert race to an identical one counts as already applied.
+    Counter changes are applied as `col = col + delta` in the database, never read-modify-write in
+    Python, and only when this request's own vote row change took effect, so concurrent votes cannot
+    lose updates.
+    """
+
+    def __init__(self, vote_model, target_model, target_key: str):
+        self.vote_model = vote_model
+        self.target_model = target_model
+        self.target_key = target_key
+
+    def cast(self, db: Session, user_id: int, target_id: int, vote_type: str) -> VoteResult:
+        """Apply a vote inside the caller's transaction; the caller commits"""
+        vote_model = self.vote_model
+        target_column = getattr(vote_model, self.target_key)
+
+        # A concurrent first vote by the same user wins the unique constraint; retry against its row
+        conflicted = False
+        for attempt in range(2):
+            existing = db.query(vote_model).filter(
+                vote_model.user_id == user_id,
+                target_column == target_id
+            ).first()
+
+            if existing is None:
+                vote = vote_model(user_id=user_id, vote_type=vote_type, **{self.target_key: target_id})
+                db.add(vote)
+                try:
+                    db.flush()
+                except IntegrityError:
+                    db.rollback()
+                    if attempt:
+                        raise
+                    conflicted = True
+                    continue
+                self._apply(db, target_id, {vote_type: 1})
+                return VoteResult(vote.id, vote_type, vote.created_at, "added")
+
+            if conflicted and existing.vote_type == vote_type:
+                # A double-submitted first vote: the winning request already added it, so this is a no-op
+                # rather than a toggle that would remove it again
+                return VoteResult(existing.id, vote_type, existing.created_at, "added")
+
+            result = VoteResult(existing.id, vote_type, existing.created_at, "")
+            if existing.vote_type == vote_type:
+                removed = db.query(vote_model).filter(
+                    vote_model.id == existing.id
+                ).delete(synchronize_session=False)
+                # Another request already removed it; its counter change already happened
+                self._apply(db, target_id, {vote_type: -1} if removed else {})
+                result.action = "removed"
+            else:
+                changed = db.query(vote_model).filter(
+                    vote_model.id == existing.id,
+                    vote_model.vote_type == existing.vote_type
+                ).update({vote_model.vote_type: vote_type}, synchronize_session=False)
+                self._apply(db, target_id, {existing.vote_type: -1, vote_type: 1} if changed else {})
+                result.action = "changed"
+            return result
+
+    def _apply(self, db: Session, target_id: int, deltas: Dict[str, int]):
+        values = {}
+        for vote_type, delta in deltas.items():
+            column = getattr(self.target_model, COUNTERS[vote_type])
+            current = func.coalesce(column, 0)
+            # Decrements never go below zero, as the Python version guaranteed
+            values[column] = current + delta if delta > 0 else case((current + delta > 0, current + delta), else_=0)
+        if values:
+            db.query(self.target_model).filter(
+                self.target_model.id == target_id
+            ).update(values, synchronize_session=False)
+            self.after_apply(db, target_id)
+
+    def after_apply(self, db: Session, target_id: int):
+        """Hook for state derived from the counters"""
+
+
+class PostVoteService(VoteService):
+    def __init__(self):
+        super().__init__(PostVote, CommunityPost, "post_id")
+
+    def after_apply(self, db: Session, target_id: int):
+        discussion_ranking_service.rescore_in_place(db, target_id)
+
+
+# Global instances
+post_vote_service = PostVoteService()
+comment_vote_service = VoteService(CommentVote, CommunityComment, "comment_id")
@@ -0,0 +1,44 @@
+"""Add card reward rankings
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the materialized best-card-per-merchant/category table"""
+    op.create_table(
+        'card_reward_rankings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('card_master_id', sa.Integer(), nullable=False),
+        sa.Column('bank_name', sa.String(length=100), nullable=False),
+        sa.Column('card_name', sa.String(length=200), nullable=False),
+        sa.Column('reward_rate', sa.Float(), nullable=False),
+        sa.Column('reward_type', sa.String(length=50), nullable=True),
+        sa.Column('reward_cap', sa.Float(), nullable=True),
+        sa.Column('reward_cap_period', sa.String(length=20), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['card_master_id'], ['card_master_data.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dimension', 'name', 'rank', name='uq_ranking_dimension_name_rank')
+    )
+    op.create_index(op.f('ix_card_reward_rankings_id'), 'card_reward_rankings', ['id'], unique=False)
+
+
+def downgrade():
+    """Drop the card reward rankings table"""
+    op.drop_index(op.f('ix_card_reward_rankings_id'), table_name='card_reward_rankings')
+    op.drop_table('card_reward_rankings')
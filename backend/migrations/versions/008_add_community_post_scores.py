@@ -0,0 +1,57 @@
+"""Add stored engagement and hot scores to community posts
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add reply count and ranking score columns, backfilled from existing comments and votes"""
+    with op.batch_alter_table('community_posts') as batch_op:
+        batch_op.add_column(sa.Column('reply_count', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('engagement_score', sa.Float(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('hot_score', sa.Float(), nullable=True, server_default='0'))
+
+    # Counters as the old per-request COUNT queries computed them
+    op.execute("""
+        UPDATE community_posts SET
+            comment_count = (
+                SELECT COUNT(*) FROM community_comments c
+                WHERE c.post_id = community_posts.id AND c.is_deleted = false
+            ),
+            reply_count = (
+                SELECT COUNT(*) FROM community_comments c
+                WHERE c.post_id = community_posts.id AND c.is_deleted = false AND c.parent_id IS NOT NULL
+            )
+    """)
+    # Recent posts get their recency bonus on the first decay pass after startup
+    op.execute("""
+        UPDATE community_posts SET
+            engagement_score = COALESCE(upvotes, 0) * 2 - COALESCE(downvotes, 0)
+                + comment_count * 3 + reply_count * 1.5,
+            hot_score = COALESCE(upvotes, 0) * 2 - COALESCE(downvotes, 0)
+                + comment_count * 3 + reply_count * 1.5
+    """)
+
+    op.create_index('ix_community_posts_ranking', 'community_posts', ['is_deleted', 'hot_score'], unique=False)
+    op.create_index(op.f('ix_community_posts_created_at'), 'community_posts', ['created_at'], unique=False)
+
+
+def downgrade():
+    """Drop the ranking columns and indexes"""
+    op.drop_index(op.f('ix_community_posts_created_at'), table_name='community_posts')
+    op.drop_index('ix_community_posts_ranking', table_name='community_posts')
+    with op.batch_alter_table('community_posts') as batch_op:
+        batch_op.drop_column('hot_score')
+        batch_op.drop_column('engagement_score')
+        batch_op.drop_column('reply_count')
@@ -0,0 +1,62 @@
+"""Enforce one vote per user per post and per comment
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Drop duplicate votes left by concurrent requests, recount the counters, then add unique constraints"""
+    # Keep each user's earliest vote per target
+    op.execute("""
+        DELETE FROM post_votes WHERE id NOT IN (
+            SELECT MIN(id) FROM post_votes GROUP BY user_id, post_id
+        )
+    """)
+    op.execute("""
+        DELETE FROM comment_votes WHERE id NOT IN (
+            SELECT MIN(id) FROM comment_votes GROUP BY user_id, comment_id
+        )
+    """)
+
+    # Lost updates left some counters wrong; the vote rows are the source of truth
+    op.execute("""
+        UPDATE community_posts SET
+            upvotes = (SELECT COUNT(*) FROM post_votes v WHERE v.post_id = community_posts.id AND v.vote_type = 'upvote'),
+            downvotes = (SELECT COUNT(*) FROM post_votes v WHERE v.post_id = community_posts.id AND v.vote_type = 'downvote')
+    """)
+    op.execute("""
+        UPDATE community_comments SET
+            upvotes = (SELECT COUNT(*) FROM comment_votes v WHERE v.comment_id = community_comments.id AND v.vote_type = 'upvote'),
+            downvotes = (SELECT COUNT(*) FROM comment_votes v WHERE v.comment_id = community_comments.id AND v.vote_type = 'downvote')
+    """)
+    # Keep each post's current recency bonus while its engagement score catches up with the recount
+    op.execute("""
+        UPDATE community_posts SET
+            hot_score = COALESCE(hot_score, 0) - COALESCE(engagement_score, 0)
+                + upvotes * 2 - downvotes + COALESCE(comment_count, 0) * 3 + COALESCE(reply_count, 0) * 1.5,
+            engagement_score = upvotes * 2 - downvotes + COALESCE(comment_count, 0) * 3 + COALESCE(reply_count, 0) * 1.5
+    """)
+
+    with op.batch_alter_table('post_votes') as batch_op:
+        batch_op.create_unique_constraint('uq_post_vote_user_post', ['user_id', 'post_id'])
+    with op.batch_alter_table('comment_votes') as batch_op:
+        batch_op.create_unique_constraint('uq_comment_vote_user_comment', ['user_id', 'comment_id'])
+
+
+def downgrade():
+    """Drop the vote unique constraints"""
+    with op.batch_alter_table('comment_votes') as batch_op:
+        batch_op.drop_constraint('uq_comment_vote_user_comment', type_='unique')
+    with op.batch_alter_table('post_votes') as batch_op:
+        batch_op.drop_constraint('uq_post_vote_user_post', type_='unique')
@@ -0,0 +1,28 @@
+"""Index community comments for keyset thread pages
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add the (post_id, parent_id, created_at, id) index behind comment continuation pages"""
+    op.create_index(
+        'ix_community_comments_thread', 'community_comments',
+        ['post_id', 'parent_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade():
+    """Drop the comment thread index"""
+    op.drop_index('ix_community_comments_thread', table_name='community_comments')
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark the read-only card endpoints: per-request database queries (as the endpoints used to
+run) against the in-memory catalog snapshot. Requests are issued through FastAPI's TestClient
+so routing and serialization are included in both numbers. Runs against a throwaway SQLite
+database filled with synthetic cards, never the application's.
+
+Usage: python scripts/benchmark_card_catalog.py [--seconds 5] [--cards 500]
+"""
+
+import argparse
+import random
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The engine is created on import, so point it at the throwaway database first
+BENCH_DIRECTORY = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIRECTORY, 'bench.db')}"
+os.environ["DEBUG"] = "false"  # SQL echo would dominate the per-request figures
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, SessionLocal, engine, get_db
+from app.models.card_master_data import CardMasterData, CardSpendingCategory, CardMerchantReward
+from app.api.v1.endpoints.card_master_data import router
+from app.services.card_catalog_service import card_catalog_service
+
+PATHS = ["/cards?limit=100", "/cards?bank_name=hdfc", "/banks", "/categories", "/merchants"]
+
+BANKS = ["HDFC", "ICICI", "SBI", "Axis", "Kotak", "IDFC First", "AU", "Yes", "IndusInd", "RBL"]
+NETWORKS = ["Visa", "Mastercard", "RuPay", "Amex"]
+TIERS = ["basic", "premium", "super_premium"]
+CATEGORIES = ["fuel", "dining", "groceries", "travel", "utilities", "education", "movies", "shopping"]
+MERCHANTS = ["amazon", "flipkart", "swiggy", "zomato", "myntra", "uber", "bigbasket", "makemytrip"]
+
+
+def populate(cards: int):
+    Base.metadata.create_all(engine, tables=[
+        CardMasterData.__table__, CardSpendingCategory.__table__, CardMerchantReward.__table__
+    ])
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(CardMasterData, [
+            {
+                "id": card_id, "bank_name": random.choice(BANKS), "card_name": f"Card {card_id}",
+                "card_network": random.choice(NETWORKS), "card_tier": random.choice(TIERS),
+                "joining_fee": random.choice([0, 500, 1000, 2500]), "annual_fee": random.choice([0, 500, 1000, 2500]),
+                "domestic_lounge_visits": random.randint(0, 12), "is_active": random.random() > 0.1,
+            }
+            for card_id in range(1, cards + 1)
+        ])
+        db.bulk_insert_mappings(CardSpendingCategory, [
+            {
+                "card_master_id": card_id, "category_name": category, "category_display_name": category.title(),
+                "reward_rate": random.uniform(0.5, 5), "is_active": True,
+            }
+            for card_id in range(1, cards + 1) for category in random.sample(CATEGORIES, 3)
+        ])
+        db.bulk_insert_mappings(CardMerchantReward, [
+            {
+                "card_master_id": card_id, "merchant_name": merchant, "merchant_display_name": merchant.title(),
+                "reward_rate": random.uniform(0.5, 10), "is_active": True,
+            }
+            for card_id in range(1, cards + 1) for merchant in random.sample(MERCHANTS, 3)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_db_app() -> FastAPI:
+    """The endpoints as they were before the snapshot: one query set per request"""
+    app = FastAPI()
+
+    @app.get("/cards")
+    def cards(skip: int = 0, limit: int = 100, bank_name: str = None, db: Session = Depends(get_db)):
+        query = db.query(CardMasterData)
+        if bank_name:
+            query = query.filter(CardMasterData.bank_name.ilike(f"%{bank_name}%"))
+        return [
+            {
+                "id": card.id,
+                "bank_name": card.bank_name,
+                "card_name": card.card_name,
+                "display_name": card.display_name,
+                "card_network": card.card_network,
+                "joining_fee_display": card.joining_fee_display,
+                "annual_fee_display": card.annual_fee_display,
+                "is_active": card.is_active
+            }
+            for card in query.offset(skip).limit(limit).all()
+        ]
+
+    @app.get("/banks")
+    def banks(db: Session = Depends(get_db)):
+        return [bank[0] for bank in db.query(CardMasterData.bank_name).distinct().all()]
+
+    @app.get("/categories")
+    def categories(db: Session = Depends(get_db)):
+        return [name[0] for name in db.query(CardSpendingCategory.category_name).distinct().all()]
+
+    @app.get("/merchants")
+    def merchants(db: Session = Depends(get_db)):
+        return [name[0] for name in db.query(CardMerchantReward.merchant_name).distinct().all()]
+
+    return app
+
+
+def build_snapshot_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def requests_per_second(client: TestClient, path: str, seconds: float) -> float:
+    client.get(path)  # Warm up (builds the snapshot on first use)
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = client.get(path)
+        response.raise_for_status()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Time spent on each endpoint per variant")
+    parser.add_argument("--cards", type=int, default=500)
+    args = parser.parse_args()
+
+    populate(args.cards)
+
+    db_client = TestClient(build_db_app())
+    snapshot_client = TestClient(build_snapshot_app())
+    card_catalog_service.get_snapshot()
+
+    # TestClient's own per-request cost caps both columns; an empty endpoint shows the ceiling
+    baseline = FastAPI()
+    baseline.get("/empty")(lambda: [])
+    ceiling = requests_per_second(TestClient(baseline), "/empty", args.seconds)
+    print(f"harness ceiling (empty endpoint): {ceiling:.0f} req/s")
+
+    print(f"{'endpoint':<28}{'db req/s':>12}{'snapshot req/s':>18}{'speedup':>10}")
+    for path in PATHS:
+        before = requests_per_second(db_client, path, args.seconds)
+        after = requests_per_second(snapshot_client, path, args.seconds)
+        print(f"{path:<28}{before:>12.0f}{after:>18.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark top discussions on a synthetic community: the old per-post scoring (two COUNT queries
+per score, every non-deleted post per tier) against the stored hot_score top-K query.
+Runs against a throwaway SQLite database, never the application's.
+
+Usage: python scripts/benchmark_top_discussions.py [--posts 100000] [--legacy-sample 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import User, CardMasterData, CommunityPost, CommunityComment
+from app.services.discussion_ranking_service import discussion_ranking_service, engagement_score, recency_bonus
+
+TIERS = [(7, 10), (30, 5), (None, 0), (7, 0), (None, 0)]
+
+
+def populate(session, posts: int):
+    session.add(User(id=1, email="bench@example.com", hashed_password="x"))
+    session.add(CardMasterData(id=1, bank_name="Bench Bank", card_name="Bench Card", card_network="Visa"))
+    session.flush()
+
+    now = datetime.utcnow()
+    post_rows = []
+    comment_rows = []
+    for post_id in range(1, posts + 1):
+        created_at = now - timedelta(hours=random.expovariate(1 / 24 / 30))
+        comments = random.choice([0, 0, 0, 1, 2, 5])
+        replies = random.randint(0, max(comments - 1, 0))
+        row = {
+            "id": post_id, "user_id": 1, "card_master_id": 1, "title": f"Post {post_id}",
+            "upvotes": random.randint(0, 20), "downvotes": random.randint(0, 5),
+            "comment_count": comments, "reply_count": replies, "is_deleted": random.random() < 0.05,
+            "created_at": created_at,
+        }
+        post = CommunityPost(**row)
+        row["engagement_score"] = engagement_score(post)
+        row["hot_score"] = row["engagement_score"] + recency_bonus(created_at, now)
+        post_rows.append(row)
+        # The first comment is top-level; replies answer it
+        first_comment_id = len(comment_rows) + 1
+        for index in range(comments):
+            comment_rows.append({
+                "id": len(comment_rows) + 1, "user_id": 1, "post_id": post_id, "body": "...",
+                "is_deleted": False, "parent_id": first_comment_id if 0 < index <= replies else None,
+                "created_at": created_at,
+            })
+    session.bulk_insert_mappings(CommunityPost, post_rows)
+    session.bulk_insert_mappings(CommunityComment, comment_rows)
+    session.commit()
+
+
+def legacy_top_discussions(db, limit: int, sample: int):
+    """The old endpoint's work, restricted to the newest `sample` posts per tier"""
+    def calculate_engagement_score(post):
+        comment_count = db.query(CommunityComment).filter(
+            CommunityComment.post_id == post.id,
+            CommunityComment.is_deleted == False
+        ).count()
+        reply_count = db.query(CommunityComment).filter(
+            CommunityComment.post_id == post.id,
+            CommunityComment.parent_id.isnot(None),
+            CommunityComment.is_deleted == False
+        ).count()
+        hours_since_posted = (datetime.utcnow() - post.created_at).total_seconds() / 3600
+        return (post.upvotes * 2 - post.downvotes + comment_count * 3 + reply_count * 1.5
+                + max(0, (24 - hours_since_posted) * 0.5))
+
+    for days_back, min_engagement in TIERS:
+        query = db.query(CommunityPost).filter(CommunityPost.is_deleted == False)
+        if days_back:
+            query = query.filter(CommunityPost.created_at >= datetime.utcnow() - timedelta(days=days_back))
+        posts = query.order_by(CommunityPost.id.desc()).limit(sample).all()
+        scored = []
+        for post in posts:
+            score = calculate_engagement_score(post)
+            if score >= min_engagement:
+                scored.append((score, calculate_engagement_score(post), post))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        if scored:
+            return scored[:limit]
+    return []
+
+
+def stored_top_discussions(db, limit: int):
+    for days_back, min_engagement in TIERS:
+        posts = discussion_ranking_service.top_posts(db, limit, days_back, min_engagement)
+        if posts:
+            return posts
+    return []
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument(
+        "--legacy-sample", type=int, default=2000,
+        help="Posts the legacy path scores per tier; its cost is linear, so the full figure is extrapolated"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[
+            User.__table__, CardMasterData.__table__, CommunityPost.__table__, CommunityComment.__table__
+        ])
+        Session = sessionmaker(bind=engine)
+        db = Session()
+
+        started = time.perf_counter()
+        populate(db, args.posts)
+        print(f"Populated {args.posts} posts in {time.perf_counter() - started:.1f}s")
+
+        decay_ms = timed(lambda: discussion_ranking_service.decay(db), 3)
+        stored_ms = timed(lambda: stored_top_discussions(db, 5), 50)
+        legacy_ms = timed(lambda: legacy_top_discussions(db, 5, args.legacy_sample), 1)
+        eligible = db.query(CommunityPost).filter(CommunityPost.is_deleted == False).count()
+        db.close()
+
+    print(f"stored hot_score query:   {stored_ms:10.2f} ms per request")
+    print(f"decay pass:               {decay_ms:10.2f} ms per run (every {discussion_ranking_service.decay_interval}s)")
+    print(f"legacy, {args.legacy_sample} posts/tier:  {legacy_ms:10.2f} ms per request")
+    print(f"legacy, extrapolated to {eligible} scanned posts: {legacy_ms * eligible / args.legacy_sample / 1000:.1f} s per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import threading
+
+from app.core import cache_engine as cache_engine_module
+from app.core.cache_engine import CacheEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    engine = CacheEngine("test", max_entries=3)
+    for key in "abc":
+        engine.set(key, key)
+    engine.get("a")  # a is now the most recently used
+    engine.set("d", "d")
+
+    assert engine.keys() == ["c", "a", "d"]
+    assert engine.get_stats()["evictions"] == 1
+
+
+def test_byte_bound_evicts_until_the_total_fits():
+    engine = CacheEngine("test", max_entries=100, max_bytes=100)
+    for key in "abcd":
+        engine.set(key, "x" * 30)
+    assert (engine.keys(), engine.size_bytes) == (["b", "c", "d"], 90)
+
+    engine.set("big", "x" * 70)
+    assert (engine.keys(), engine.size_bytes) == (["d", "big"], 100)
+
+    # A value larger than the whole bound is refused rather than flushing the namespace
+    assert engine.set("d", "x" * 101) is False
+    assert (engine.keys(), engine.size_bytes) == (["big"], 70)
+
+
+def test_entries_expire_on_read_and_in_the_sweep(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_engine_module, "time", clock)
+    engine = CacheEngine("test", max_entries=10, default_ttl=60)
+    engine.set("short", 1, ttl=10)
+    engine.set("default", 2)
+    engine.set("forever", 3, ttl=float("inf"))
+
+    clock.now += 30
+    assert engine.get("short") is None
+    assert engine.get("default") == 2 and engine.ttl("default") == 30
+
+    clock.now += 30
+    assert engine.purge_expired() == 1
+    assert engine.keys() == ["forever"] and engine.ttl("forever") is None
+    assert engine.get_stats()["expirations"] == 2
+
+
+def test_tag_invalidation_drops_only_tagged_entries():
+    engine = CacheEngine("test", max_entries=10)
+    engine.set("a", 1, tags=["card:1"])
+    engine.set("b", 2, tags=["card:1", "card:2"])
+    engine.set("c", 3, tags=["card:2"])
+    # Overwriting replaces the entry's tags
+    engine.set("c", 3, tags=["card:3"])
+
+    assert engine.invalidate_tags(["card:2"]) == 1
+    assert engine.keys() == ["a", "c"]
+    assert engine.invalidate_tags(["card:1", "card:9"]) == 1
+    assert engine.keys() == ["c"]
+    assert engine.get_stats()["tags"] == 1
+
+
+def test_maintenance_and_stats_are_safe_alongside_threadpool_writers():
+    engine = CacheEngine("test", max_entries=200, default_ttl=0.001)
+    errors = []
+    stop = threading.Event()
+
+    def writer(offset):
+        try:
+            i = 0
+            while not stop.is_set():
+                key = f"{offset}-{i % 500}"
+                engine.set(key, "x" * 10, tags=[f"tag-{i % 7}"])
+                engine.get(key)
+                i += 1
+        except Exception as e:  # pragma: no cover - the failure being tested for
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        # What the event loop and the admin stats endpoint do concurrently
+        for _ in range(2000):
+            engine.purge_expired(limit=50)
+            engine.top_keys(5)
+            engine.recount_size()
+            engine.invalidate_tags(["tag-3"])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    # The running byte count still matches the entries, so no update was lost
+    assert engine.size_bytes == sum(entry.size for entry in engine._entries.values())
+    assert len(engine) <= 200
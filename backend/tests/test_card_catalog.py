@@ -0,0 +1,33 @@
+from app.models.card_master_data import CardMasterData
+from app.services.card_catalog_service import CatalogSnapshot
+
+
+def make_card(card_id, card_name, is_active=True):
+    return CardMasterData(
+        id=card_id,
+        bank_name="Test Bank",
+        card_name=card_name,
+        card_network="Visa",
+        card_tier="basic",
+        is_active=is_active,
+        spending_categories=[],
+        merchant_rewards=[],
+    )
+
+
+def test_search_fills_the_page_when_top_hits_are_inactive():
+    # Inactive cards rank first (exact name match); active ones only match the prefix
+    cards = [make_card(card_id, "Regalia", is_active=False) for card_id in range(1, 13)]
+    cards += [make_card(card_id, "Regalia Gold") for card_id in range(13, 18)]
+    snapshot = CatalogSnapshot(cards)
+
+    results = snapshot.search("regalia", limit=5)
+
+    assert [record.id for record, _ in results] == [13, 14, 15, 16, 17]
+
+
+def test_search_can_include_inactive_cards():
+    snapshot = CatalogSnapshot([make_card(1, "Regalia", is_active=False), make_card(2, "Regalia Gold")])
+
+    assert {record.id for record, _ in snapshot.search("regalia", is_active=None)} == {1, 2}
+    assert [record.id for record, _ in snapshot.search("regalia", is_active=False)] == [1]
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.core.catalog_events import CatalogChange
+from app.models import CardMasterData
+from app.services import card_detail_service as card_detail_module
+from app.services.card_detail_service import CardDetailService
+
+
+def make_service():
+    service = CardDetailService()
+    service.cache.clear()
+    return service
+
+
+def test_detail_is_cached_and_invalidated(db):
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.commit()
+    service = make_service()
+
+    etag, body = service.get(db, 1)
+    assert service.cached(1) == (etag, body)
+
+    asyncio.run(service._on_catalog_change(CatalogChange(card_ids={1})))
+    assert service.cached(1) is None
+
+
+def test_version_read_before_a_change_is_not_cached(db, monkeypatch):
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.commit()
+    service = make_service()
+    build = card_detail_module.build_card_detail
+
+    def build_during_edit(card):
+        # The card was read; an edit commits and its event arrives before the result is cached
+        asyncio.run(service._on_catalog_change(CatalogChange(card_ids={1})))
+        return build(card)
+
+    monkeypatch.setattr(card_detail_module, "build_card_detail", build_during_edit)
+    assert service.get(db, 1) is not None
+    assert service.cached(1) is None
+
+    monkeypatch.setattr(card_detail_module, "build_card_detail", build)
+    etag, body = service.get(db, 1)
+    assert service.cached(1) == (etag, body)
@@ -0,0 +1,14 @@
+from app.core.catalog_events import answer_tags
+
+
+def test_answer_tags_cover_routed_and_agent_card_columns():
+    rows = [
+        {"card_id": 3, "bank_name": "HDFC"},  # router templates
+        {"card_master_id": 4, "bank_name": "Axis"},  # agent SQL
+    ]
+
+    tags = answer_tags("best card for amazon", rows)
+
+    assert "card:3" in tags
+    assert "card:4" in tags
+    assert "merchant:amazon" in tags
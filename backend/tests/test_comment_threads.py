@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from app.models import CardMasterData, CommunityComment, CommunityPost, User
+from app.services.comment_thread_service import comment_thread_service
+
+
+def seed(db):
+    """Post 1: 25 top-level comments (some sharing a timestamp), comment 1 has 15 replies, each with one reply"""
+    start = datetime(2026, 1, 1)
+    db.add(User(id=1, email="a@example.com", hashed_password="x", first_name="A"))
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.add(CommunityPost(id=1, user_id=1, card_master_id=1, title="Post"))
+    db.add_all(
+        CommunityComment(id=comment_id, user_id=1, post_id=1, body=f"top {comment_id}",
+                         created_at=start + timedelta(minutes=comment_id // 2))
+        for comment_id in range(1, 26)
+    )
+    db.add_all(
+        CommunityComment(id=100 + n, user_id=1, post_id=1, parent_id=1, body=f"reply {n}",
+                         created_at=start + timedelta(hours=1, minutes=n))
+        for n in range(15)
+    )
+    db.add_all(
+        CommunityComment(id=200 + n, user_id=1, post_id=1, parent_id=100 + n, body=f"nested {n}",
+                         created_at=start + timedelta(hours=2, minutes=n))
+        for n in range(15)
+    )
+    # Deleted comments and their replies stay hidden
+    db.add(CommunityComment(id=26, user_id=1, post_id=1, body="gone", is_deleted=True, created_at=start))
+    db.add(CommunityComment(id=300, user_id=1, post_id=1, parent_id=26, body="orphan", created_at=start))
+    db.commit()
+
+
+def pages(db, parent_id=None, **kwargs):
+    """Every page from load_page, following cursors"""
+    collected, after = [], None
+    while True:
+        comments, after = comment_thread_service.load_page(db, 1, parent_id=parent_id, after=after, **kwargs)
+        collected.append(comments)
+        if after is None:
+            return collected
+
+
+def test_keyset_pages_match_the_full_thread(db):
+    seed(db)
+    thread = comment_thread_service.load(db, 1)
+
+    for parent_id in (None, 1):
+        expected, after = [], None
+        while True:
+            comments, after = thread.page(parent_id=parent_id, after=after, limit=4, depth=3, replies_limit=5)
+            expected.append(comments)
+            if after is None:
+                break
+        assert pages(db, parent_id, limit=4, depth=3, replies_limit=5) == expected
+
+    top_level = [comment.id for page in pages(db, limit=10) for comment in page]
+    assert top_level == list(range(1, 26))
+
+
+def test_depth_and_reply_limits(db):
+    seed(db)
+    comments, _ = comment_thread_service.load_page(db, 1, limit=1, depth=2, replies_limit=10)
+    first = comments[0]
+    assert (first.reply_count, len(first.replies), first.replies_cursor) == (15, 10, 109)
+    # Second level is the last one rendered: replies are counted, not shown
+    assert all(reply.replies == [] and reply.reply_count == 1 for reply in first.replies)
+
+    rest, next_cursor = comment_thread_service.load_page(db, 1, parent_id=1, after=first.replies_cursor, depth=1)
+    assert [reply.id for reply in rest] == list(range(110, 115))
+    assert next_cursor is None
+
+
+def test_unknown_or_foreign_cursor_starts_over(db):
+    seed(db)
+    first_page, _ = comment_thread_service.load_page(db, 1, limit=3, depth=1)
+    for cursor in (999, 105):
+        comments, _ = comment_thread_service.load_page(db, 1, after=cursor, limit=3, depth=1)
+        assert comments == first_page
+
+
+def test_continuation_query_count_is_constant(db, count_queries):
+    seed(db)
+    counts = []
+    for limit in (2, 20):
+        db.expire_all()
+        with count_queries() as queries:
+            comment_thread_service.load_page(db, 1, limit=limit, depth=3, replies_limit=5)
+        counts.append(queries.count)
+
+    # The page, then one query per level below it: replies, nested replies, counts under the last level
+    assert counts == [4, 4]
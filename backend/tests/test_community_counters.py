@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models import CardMasterData, CommunityComment, CommunityPost, PostVote, User
+from app.services.discussion_ranking_service import discussion_ranking_service
+from app.services.vote_service import post_vote_service
+
+
+def seed(db, created_at=None):
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    db.add(User(id=2, email="b@example.com", hashed_password="x"))
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.add(CommunityPost(
+        id=1, user_id=1, card_master_id=1, title="Post", created_at=created_at or datetime.utcnow(),
+        upvotes=0, downvotes=0, comment_count=0, reply_count=0, engagement_score=0, hot_score=0,
+    ))
+    db.commit()
+
+
+def test_comment_counters_are_sql_increments_and_rescore(db):
+    seed(db)
+    db.add(CommunityComment(id=1, user_id=2, post_id=1, body="top"))
+    discussion_ranking_service.comment_added(db, 1, is_reply=False)
+    db.add(CommunityComment(id=2, user_id=2, post_id=1, parent_id=1, body="reply"))
+    discussion_ranking_service.comment_added(db, 1, is_reply=True)
+    db.commit()
+
+    post = db.get(CommunityPost, 1)
+    assert (post.comment_count, post.reply_count) == (2, 1)
+    assert post.engagement_score == 2 * 3 + 1 * 1.5
+
+    db.query(CommunityComment).filter(CommunityComment.id == 2).update({CommunityComment.is_deleted: True})
+    discussion_ranking_service.recount_comments(db, 1)
+    db.commit()
+    db.refresh(post)
+    assert (post.comment_count, post.reply_count) == (1, 0)
+    assert post.engagement_score == 3
+
+
+def test_decay_scores_from_current_counters(db):
+    seed(db, created_at=datetime.utcnow() - timedelta(hours=12))
+    # A vote counted in SQL after the stored scores were last written
+    db.query(CommunityPost).filter(CommunityPost.id == 1).update({CommunityPost.upvotes: 5})
+    db.commit()
+
+    assert discussion_ranking_service.decay(db) == 1
+
+    post = db.get(CommunityPost, 1)
+    assert post.engagement_score == 10
+    # 12 hours into the 24-hour window leaves about 6 bonus points
+    assert abs(post.hot_score - 16) < 0.1
+
+
+def test_decay_clears_bonus_of_posts_that_aged_out_unseen(db):
+    # Scored when new, then no decay ran until well after the window (e.g. during an outage)
+    seed(db, created_at=datetime.utcnow() - timedelta(days=3))
+    db.query(CommunityPost).filter(CommunityPost.id == 1).update({CommunityPost.hot_score: 12})
+    db.commit()
+
+    assert discussion_ranking_service.decay(db) == 1
+    post = db.get(CommunityPost, 1)
+    assert post.hot_score == post.engagement_score == 0
+
+    # Settled posts outside the window are left alone
+    assert discussion_ranking_service.decay(db) == 0
+
+
+def test_double_submitted_first_vote_is_applied_once(session_factory):
+    with session_factory() as db:
+        seed(db)
+
+    loser = session_factory()
+    raced = []
+
+    @event.listens_for(loser, "before_flush")
+    def concurrent_identical_vote(session, flush_context, instances):
+        # The other request inserts the same first vote between this one's lookup and insert
+        if raced:
+            return
+        raced.append(True)
+        with session_factory() as winner:
+            post_vote_service.cast(winner, 2, 1, "upvote")
+            winner.commit()
+
+    result = post_vote_service.cast(loser, 2, 1, "upvote")
+    loser.commit()
+    loser.close()
+
+    assert result.action == "added"
+    with session_factory() as db:
+        assert db.query(PostVote).filter(PostVote.user_id == 2, PostVote.post_id == 1).count() == 1
+        assert db.get(CommunityPost, 1).upvotes == 1
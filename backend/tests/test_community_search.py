@@ -0,0 +1,96 @@
+import pytest
+
+from app.models import CardMasterData, CommunityComment, CommunityPost, User
+from app.services.community_search_service import CommunitySearchService
+
+
+def make_service(db):
+    service = CommunitySearchService()
+    assert service.ensure_index(db)
+    return service
+
+
+def seed(db):
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.commit()
+
+
+def hits(service, db, query, **kwargs):
+    return [(row["kind"], row["comment_id"] or row["post_id"]) for row in service.search(db, query, **kwargs)["results"]]
+
+
+def test_triggers_keep_the_index_in_sync_with_edits_and_deletes(db):
+    seed(db)
+    service = make_service(db)
+    db.add(CommunityPost(id=1, user_id=1, card_master_id=1, title="Fuel surcharge waiver", body="Works at every pump"))
+    db.add(CommunityComment(id=1, user_id=1, post_id=1, body="Mine reversed the surcharge"))
+    db.commit()
+    assert sorted(hits(service, db, "surcharge")) == [("comment", 1), ("post", 1)]
+
+    comment = db.get(CommunityComment, 1)
+    comment.body = "Mine took two billing cycles"
+    db.commit()
+    assert hits(service, db, "surcharge") == [("post", 1)]
+    assert hits(service, db, "billing") == [("comment", 1)]
+
+    # Soft-deleting a post drops it; a counter update leaves the index alone
+    db.get(CommunityPost, 1).upvotes = 5
+    db.commit()
+    assert hits(service, db, "pump") == [("post", 1)]
+    db.get(CommunityPost, 1).is_deleted = True
+    db.commit()
+    assert hits(service, db, "pump") == []
+
+    db.delete(db.get(CommunityComment, 1))
+    db.commit()
+    db.get(CommunityPost, 1).is_deleted = False
+    db.commit()
+    assert hits(service, db, "billing") == []
+    assert hits(service, db, "pump") == [("post", 1)]
+
+
+def test_cursor_pages_cover_every_result_once_in_score_order(db):
+    seed(db)
+    service = make_service(db)
+    db.add_all(
+        CommunityPost(id=post_id, user_id=1, card_master_id=1, title=f"Cashback tip {post_id}",
+                      body="cashback", upvotes=post_id % 4, downvotes=0)
+        for post_id in range(1, 26)
+    )
+    db.commit()
+
+    seen, scores, cursor = [], [], None
+    while True:
+        page = service.search(db, "cashback", cursor=cursor, limit=10)
+        seen.extend(row["post_id"] for row in page["results"])
+        scores.extend(row["score"] for row in page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == list(range(1, 26))
+    assert scores == sorted(scores, reverse=True)
+    # Equally relevant posts are ordered by votes, so the least voted come last
+    assert page["results"][-1]["net_votes"] == 0
+
+    with pytest.raises(ValueError):
+        service.search(db, "cashback", cursor="not-a-cursor")
+
+
+def test_snippets_are_escaped_around_highlights(db):
+    seed(db)
+    service = make_service(db)
+    db.add(CommunityPost(id=1, user_id=1, card_master_id=1, title="Lounge <b>access</b>",
+                         body="<script>alert(1)</script> lounge visits & guest passes"))
+    db.commit()
+
+    result = service.search(db, "lounge")["results"][0]
+    assert result["title_snippet"] == "<mark>Lounge</mark> &lt;b&gt;access&lt;/b&gt;"
+    assert "&lt;script&gt;alert(1)&lt;/script&gt; <mark>lounge</mark> visits &amp; guest passes" in result["snippet"]
+    assert "<script>" not in result["snippet"]
+
+    # The LIKE fallback escapes too
+    service.fts_enabled = False
+    result = service.search(db, "lounge")["results"][0]
+    assert "<script>" not in result["snippet"] and "&lt;b&gt;" in result["title_snippet"]
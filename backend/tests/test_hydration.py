@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from app.api.v1.endpoints.card_reviews import get_card_reviews
+from app.api.v1.endpoints.community import get_card_posts, get_top_discussions
+from app.models import CardMasterData, CardReview, CommunityPost, PostVote, User
+
+
+def seed(db, posts=100, users=20):
+    now = datetime.utcnow()
+    db.add_all(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x", first_name=f"User{user_id}")
+               for user_id in range(1, users + 1))
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.add_all(
+        CommunityPost(
+            id=post_id, user_id=post_id % users + 1, card_master_id=1, title=f"Post {post_id}",
+            created_at=now - timedelta(hours=post_id), upvotes=post_id % 7, downvotes=0,
+            comment_count=0, reply_count=0, engagement_score=post_id % 7 * 2, hot_score=post_id % 7 * 2 + 20,
+        )
+        for post_id in range(1, posts + 1)
+    )
+    db.add_all(
+        CardReview(id=review_id, user_id=review_id % users + 1, card_master_id=1, overall_rating=review_id % 5 + 1)
+        for review_id in range(1, posts + 1)
+    )
+    db.add_all(PostVote(user_id=1, post_id=post_id, vote_type="upvote") for post_id in range(1, posts + 1, 3))
+    db.commit()
+    return db.get(User, 1)
+
+
+def test_card_posts_page_query_count_is_constant(db, count_queries):
+    user = seed(db)
+
+    counts = []
+    for limit in (10, 100):
+        db.expire_all()
+        db.refresh(user)  # The authenticated user arrives loaded
+        with count_queries() as queries:
+            page = get_card_posts(card_id=1, skip=0, limit=limit, sort_by="newest", db=db, current_user=user)
+        assert len(page.posts) == limit
+        counts.append(queries.count)
+
+    # Card lookup, total count, page, authors, the caller's votes
+    assert counts == [5, 5]
+    assert any(post.user_vote == "upvote" for post in page.posts)
+
+
+def test_card_reviews_query_count_is_constant(db, count_queries):
+    seed(db)
+
+    counts = []
+    for limit in (10, 100):
+        db.expire_all()
+        with count_queries() as queries:
+            page = get_card_reviews(card_id=1, skip=0, limit=limit, db=db)
+        assert len(page.reviews) == limit
+        counts.append(queries.count)
+
+    # Card lookup, total count, page, average rating, reviewers
+    assert counts == [5, 5]
+    assert all(review.user_name != "Unknown User" for review in page.reviews)
+
+
+def test_top_discussions_query_count_is_constant(db, count_queries):
+    seed(db)
+
+    counts = []
+    for limit in (1, 10):
+        db.expire_all()
+        with count_queries() as queries:
+            response = get_top_discussions(limit=limit, db=db)
+        counts.append(queries.count)
+
+    # First tier's top-K, authors, card names
+    assert counts == [3, 3]
+    assert response is not None
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.core.query_router import QueryRouter
+from app.core.sql_executor import AsyncSQLExecutor
+from app.models import CardMasterData, CardRewardRanking
+
+
+@pytest.mark.parametrize("query, user_id, intent, params", [
+    ("Which is the best card for Amazon?", None, "merchant_best", {"merchant": "amazon"}),
+    ("best card for amazon pay", None, "merchant_best", {"merchant": "amazon"}),
+    # The merchant is more specific than the category it also names
+    ("top card for swiggy food delivery", None, "merchant_best", {"merchant": "swiggy"}),
+    ("best credit card for petrol", None, "category_best", {"category": "fuel"}),
+    ("best card for dining among my cards", 7, "category_best_portfolio", {"category": "dining", "user_id": 7}),
+    ("how many cards do I have", 7, "card_count", {"user_id": 7}),
+])
+def test_templated_intents_are_recognised(query, user_id, intent, params):
+    match = QueryRouter(sql_executor=None).classify(query, user_id)
+    assert (match.intent, match.params) == (intent, params)
+
+
+@pytest.mark.parametrize("query, user_id", [
+    # Fees, comparisons, caps and eligibility need the agent even when an entity is named
+    ("compare amazon vs flipkart cards", None),
+    ("annual fee of the best amazon card", None),
+    ("best card for travel with lounge access", None),
+    ("what is the cashback cap on the best fuel card", None),
+    ("am I eligible for the best dining card", None),
+    # Two entities, or none
+    ("best card for amazon and flipkart", None),
+    ("best card for olaf", None),
+    # A bare entity is below the confidence bar
+    ("amazon card", None),
+    # Portfolio counts need a user
+    ("how many cards do I have", None),
+])
+def test_disqualified_or_ambiguous_queries_fall_back(query, user_id):
+    assert QueryRouter(sql_executor=None).classify(query, user_id) is None
+
+
+def test_route_reads_rankings_and_counts_fallbacks(db, tmp_path):
+    db.add(CardMasterData(id=1, bank_name="Bank", card_name="Card", card_network="Visa"))
+    db.add_all(
+        CardRewardRanking(dimension="merchant", name="amazon", rank=rank, card_master_id=1,
+                          bank_name="Bank", card_name=f"Card {rank}", reward_rate=10 - rank)
+        for rank in range(1, 6)
+    )
+    db.commit()
+    executor = AsyncSQLExecutor(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    router = QueryRouter(executor)
+
+    async def scenario():
+        try:
+            routed = await router.route("best card for amazon", max_results=3)
+            # No ranking rows for this merchant: the agent answers instead
+            empty = await router.route("best card for flipkart")
+            disqualified = await router.route("amazon card fees")
+            return routed, empty, disqualified
+        finally:
+            await executor.engine.dispose()
+
+    routed, empty, disqualified = asyncio.run(scenario())
+    assert [row["card_name"] for row in routed.results] == ["Card 1", "Card 2", "Card 3"]
+    assert empty is None and disqualified is None
+
+    stats = router.get_stats()
+    assert (stats["total_queries"], stats["routed"], stats["fallbacks"]) == (3, 1, 2)
+    assert stats["routes"]["merchant_best"]["empty"] == 1
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from app.core.cache_engine import CacheEngine
+from app.core.redis_cache import TieredCache, pack, unpack
+
+
+def make_worker(server, namespace="test"):
+    """One worker's tiered cache: its own L1 over the shared (fake) Redis"""
+    return TieredCache(namespace, CacheEngine(namespace, max_entries=100, default_ttl=60),
+                       client=fakeredis.FakeAsyncRedis(server=server))
+
+
+async def until(condition, timeout=2.0):
+    """Wait for pub/sub delivery"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+async def subscribed(worker, count=1):
+    """Wait until the invalidation channel has the listeners started so far"""
+    for _ in range(200):
+        (_, listeners), = await worker.client.pubsub_numsub(worker.channel)
+        if listeners >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("invalidation listener never subscribed")
+
+
+def run(scenario):
+    async def main():
+        server = fakeredis.FakeServer()
+        workers = [make_worker(server), make_worker(server)]
+        try:
+            await scenario(*workers)
+        finally:
+            for worker in workers:
+                await worker.close()
+
+    asyncio.run(main())
+
+
+def test_msgpack_round_trip_of_row_values():
+    row = {"id": 1, "name": "Card", "rate": Decimal("2.5"), "at": datetime(2024, 1, 2, 3, 4), "tags": {"a"}}
+
+    assert unpack(pack(row)) == {"id": 1, "name": "Card", "rate": 2.5, "at": "2024-01-02T03:04:00", "tags": ["a"]}
+
+
+def test_l2_fills_another_workers_l1_and_delete_reaches_both():
+    async def scenario(first, second):
+        await first.set("answer", {"rows": [1, 2]})
+        assert first.l1.get("answer") == {"rows": [1, 2]}
+
+        # Not in the second worker's L1 yet: read from L2, then served from its L1
+        assert await second.get("answer") == {"rows": [1, 2]}
+        assert second.l2_hits == 1
+        assert second.l1.get("answer") == {"rows": [1, 2]}
+
+        await subscribed(first, 2)
+        assert await first.delete("answer")
+        await until(lambda: second.l1.get("answer") is None)
+        assert await second.get("answer") is None
+        assert second.l2_misses == 1
+
+    run(scenario)
+
+
+def test_ttl_is_carried_to_l2_tag_sets_and_l1_fills():
+    async def scenario(first, second):
+        await first.set("answer", "value", ttl=30, tags=["card:1"])
+
+        assert 29_000 < await first.client.pttl(first._key("answer")) <= 30_000
+        assert 29_000 < await first.client.pttl(first._tag_key("card:1")) <= 30_000
+        await second.get("answer")
+        assert 29 < second.l1.ttl("answer") <= 30
+
+        # A longer-lived member extends the tag set; a shorter one never shortens it
+        await first.set("other", "value", ttl=120, tags=["card:1"])
+        await first.set("third", "value", ttl=5, tags=["card:1"])
+        assert await first.client.pttl(first._tag_key("card:1")) > 100_000
+
+    run(scenario)
+
+
+def test_invalidation_evicts_other_workers_l1():
+    async def scenario(first, second):
+        await first.set("a", 1, tags=["card:1"])
+        await first.set("b", 2, tags=["card:2"])
+        await second.get("a")
+        await second.get("b")
+        await subscribed(first, 2)
+
+        # Overwrites evict the stale copy elsewhere
+        await first.set("b", 3)
+        await until(lambda: second.l1.get("b") is None)
+        assert await second.get("b") == 3
+
+        # Tag invalidation drops L2 entries and other workers' L1 copies
+        assert await first.invalidate_tags(["card:1"]) == 1
+        await until(lambda: second.l1.get("a") is None)
+        assert await second.get("a") is None
+
+    run(scenario)
+
+
+@pytest.mark.parametrize("version", [6, 7])
+def test_tag_expiry_works_with_and_without_pexpire_options(version):
+    async def main():
+        cache = make_worker(fakeredis.FakeServer(version=version))
+        try:
+            assert await cache.set("a", 1, ttl=30, tags=["card:1"])
+            assert await cache.set("b", 1, ttl=90, tags=["card:1"])
+            assert await cache.set("c", 1, ttl=10, tags=["card:1"])
+            assert 80_000 < await cache.client.pttl(cache._tag_key("card:1")) <= 90_000
+            assert cache.expire_options is (version >= 7)
+        finally:
+            await cache.close()
+
+    asyncio.run(main())
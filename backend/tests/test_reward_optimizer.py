@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.services.reward_optimizer_service import (
+    NUM_SLOTS, SLOT_INDEX, CardRewardProfile, reward_optimizer_service
+)
+
+
+def make_profile(card_id, rates, min_transaction=None):
+    """A card with uncapped rates per slot name and optional minimum transaction amounts"""
+    rate_vector = np.zeros(NUM_SLOTS)
+    min_vector = np.zeros(NUM_SLOTS)
+    for name, rate in rates.items():
+        rate_vector[SLOT_INDEX[name]] = rate
+    for name, amount in (min_transaction or {}).items():
+        min_vector[SLOT_INDEX[name]] = amount
+    return CardRewardProfile(
+        card_id=card_id,
+        card_name=f"Card {card_id}",
+        rates=rate_vector,
+        reward_caps=np.full(NUM_SLOTS, np.inf),
+        min_transaction=min_vector,
+    )
+
+
+def test_partial_ticket_sizes_fall_back_to_monthly_spend():
+    profile = make_profile(1, {"amazon": 5, "swiggy": 5}, {"amazon": 100, "swiggy": 100})
+    spend = {"amazon": 1000, "swiggy": 1000}
+
+    result = reward_optimizer_service.optimize_profiles({7: [profile]}, {7: spend}, {"amazon": 50})[7]
+
+    rewards = {allocation["name"]: allocation["reward"] for allocation in result["allocations"]}
+    # amazon's 50 ticket misses the minimum; swiggy has no ticket size, so its 1000 spend counts as one payment
+    assert rewards["amazon"] == 0.0
+    assert rewards["swiggy"] == 50.0
+
+
+def test_ticket_sizes_apply_to_every_user_in_a_batch():
+    profile = make_profile(1, {"swiggy": 5}, {"swiggy": 200})
+    spends = {1: {"swiggy": 1000}, 2: {"swiggy": 100}}
+
+    results = reward_optimizer_service.optimize_profiles({1: [profile], 2: [profile]}, spends, {"swiggy": 300})
+
+    assert results[1]["monthly_reward"] == 50.0
+    assert results[2]["monthly_reward"] == 5.0
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.single_flight import SingleFlight, single_flight
+
+
+def test_concurrent_callers_share_one_result():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": 42}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("q", compute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.get_stats() == {"in_flight": 0, "executions": 1, "coalesced": 4, "timeouts": 0}
+
+
+def test_computation_is_cancelled_only_with_its_last_waiter():
+    flight = SingleFlight("test")
+    started, cancelled = [], []
+
+    async def compute():
+        started.append(1)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("q", compute))
+        second = asyncio.create_task(flight.do("q", compute))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == [] and not second.done()
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == [1]
+
+        # Nothing is in flight any more, so the next caller starts a new computation
+        third = asyncio.create_task(flight.do("q", compute))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        await asyncio.gather(first, second, third, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert len(started) == 2
+
+
+def test_waits_are_bounded_by_the_timeout():
+    flight = SingleFlight("test")
+    cancelled = []
+
+    async def compute():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("q", compute, timeout=0.01)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    # The only waiter gave up, so the computation was abandoned too
+    assert cancelled == [1]
+    assert flight.get_stats()["timeouts"] == 1 and flight.get_stats()["in_flight"] == 0
+
+
+def test_sync_calls_coalesce_and_a_none_key_bypasses():
+    runs = []
+    release = threading.Event()
+
+    @single_flight(key=lambda value, coalesce=True: value if coalesce else None, name="test_sync")
+    def compute(value, coalesce=True):
+        runs.append(value)
+        release.wait(5)
+        return value * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(compute(21))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    # Let every thread reach the in-flight call before the leader finishes
+    while compute.flight.executions + compute.flight.coalesced < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 4 and runs == [21]
+    assert compute(5, coalesce=False) == 10 and runs == [21, 5]
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.sql_executor import AsyncSQLExecutor, _normalize_statement
+
+
+def test_writes_inside_a_cte_are_rejected():
+    with pytest.raises(ValueError):
+        _normalize_statement("WITH t AS (SELECT 1) DELETE FROM users")
+
+
+def test_comment_markers_inside_literals_are_kept():
+    query = "SELECT * FROM cards WHERE name LIKE '%--x%' AND id > 1 -- trailing note\n;"
+
+    assert _normalize_statement(query) == "SELECT * FROM cards WHERE name LIKE '%--x%' AND id > 1"
+    assert _normalize_statement("SELECT 1; -- done") == "SELECT 1"
+
+
+def test_semicolons_only_separate_statements_outside_literals():
+    assert _normalize_statement("SELECT * FROM notes WHERE note = 'a;b';") == "SELECT * FROM notes WHERE note = 'a;b'"
+    with pytest.raises(ValueError):
+        _normalize_statement("SELECT 1; DROP TABLE users")
+
+
+def test_keywords_in_literals_and_identifiers_are_allowed():
+    assert _normalize_statement('SELECT "update" FROM t WHERE x = \'delete me\'')
+    with pytest.raises(ValueError):
+        _normalize_statement("SELECT * INTO backup FROM users")
+
+
+def test_connections_are_read_only(tmp_path):
+    path = tmp_path / "target.db"
+    setup = create_engine(f"sqlite:///{path}")
+    with setup.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (note TEXT)"))
+        conn.execute(text("INSERT INTO notes VALUES ('a;b')"))
+    setup.dispose()
+
+    async def run():
+        executor = AsyncSQLExecutor(f"sqlite+aiosqlite:///{path}")
+        try:
+            rows = await executor.execute("SELECT note FROM notes WHERE note = 'a;b'")
+            # Bypass the statement check: the connection itself refuses to write
+            async with executor.engine.connect() as conn:
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("DELETE FROM notes"))
+            return rows
+        finally:
+            await executor.dispose()
+
+    assert asyncio.run(run()) == [{"note": "a;b"}]